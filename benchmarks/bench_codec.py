@@ -0,0 +1,68 @@
+"""
+Size and speed of snapshots per codec: compression alone and with encryption.
+Run from the repository root:
+
+    python -m benchmarks.bench_codec [--records N] [--notes N]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_memory import add_notes, add_records
+from src.assistant import Assistant
+from src.codec import Codec
+
+PASSWORD = 'benchmark password'
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--notes', type=int, default=50_000)
+    args = parser.parse_args()
+
+    data = Assistant()
+    rnd = random.Random(1)
+    add_records(data, args.records, rnd)
+    add_notes(data, args.notes, rnd)
+    names = [f"Contact {rnd.randrange(args.records)}" for _ in range(1000)]
+
+    print(f"{'codec':<14} {'size MiB':>9} {'save s':>8} {'MB/s':>6} {'load all s':>11} {'MB/s':>6} "
+          f"{'1000 lookups ms':>16}")
+    plain_size = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for compression in ('none', 'zlib', 'lzma'):
+            for encrypted in (False, True):
+                codec = Codec.from_password(PASSWORD if encrypted else None, compression)
+                filename = os.path.join(tmp, f"{compression}-{encrypted}")
+
+                started = time.perf_counter()
+                with open(filename, 'wb') as f:
+                    data.dump_segments(f, {}, codec)
+                save = time.perf_counter() - started
+                size = os.path.getsize(filename)
+                plain_size = plain_size or size
+
+                started = time.perf_counter()
+                loaded = Assistant.load_segments(filename, lambda descriptor: codec)[1]
+                for name in names:
+                    loaded.get_record(name)
+                lookups = time.perf_counter() - started
+
+                started = time.perf_counter()
+                loaded = Assistant.load_segments(filename, lambda descriptor: codec)[1]
+                for _ in loaded.get_records():
+                    pass
+                for _ in loaded.get_notes():
+                    pass
+                load = time.perf_counter() - started
+
+                label = compression + (' + enc' if encrypted else '')
+                print(f"{label:<14} {size / 2 ** 20:9.1f} {save:8.2f} {plain_size / save / 1e6:6.1f} {load:11.2f} "
+                      f"{plain_size / load / 1e6:6.1f} {lookups * 1000:16.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Queries scanning the whole contact book: a loop over Record objects against the columnar copy
+the Assistant builds for them. Run from the repository root:
+
+    python -m benchmarks.bench_columnar [--records N]
+"""
+import argparse
+import random
+import time
+from collections import defaultdict
+from datetime import date
+
+from src.assistant import Assistant
+from src.fields import Name, Phone, Email, Birthday
+
+DOMAINS = ['gmail.com', 'ukr.net', 'example.com', 'outlook.com', 'proton.me']
+
+
+def build(count: int) -> Assistant:
+    rnd = random.Random(1)
+    data = Assistant()
+    data.add_records([
+        (Name.trusted(f"Contact {i}"),
+         [Phone.trusted(f"{rnd.randrange(10 ** 9, 10 ** 10)}")],
+         Email.trusted(f"contact{i}@{rnd.choice(DOMAINS)}"),
+         None,
+         Birthday.trusted(date(rnd.randint(1950, 2010), rnd.randint(1, 12), rnd.randint(1, 28))))
+        for i in range(count)])
+    return data
+
+
+def loop_domain(data: Assistant, domain: str) -> list:
+    return [rec.name for rec in data.get_records() if rec.email.rpartition('@')[2].lower() == domain]
+
+
+def loop_born_between(data: Assistant, start: date, end: date) -> list:
+    return [rec.name for rec in data.get_records() if rec.birthday and start <= rec.birthday <= end]
+
+
+def loop_duplicate_phones(data: Assistant) -> dict:
+    owners = defaultdict(set)
+    for rec in data.get_records():
+        for phone in rec.phones:
+            owners[str(phone)].add(rec.name)
+    return {phone: names for phone, names in owners.items() if len(names) > 1}
+
+
+def timed(label: str, func, *args) -> None:
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<32} {time.perf_counter() - started:8.3f} s  ({len(result)} found)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = build(args.records)
+    start, end = date(1980, 1, 1), date(1989, 12, 31)
+
+    timed("domain, record loop", loop_domain, data, 'gmail.com')
+    timed("born between, record loop", loop_born_between, data, start, end)
+    timed("duplicate phones, record loop", loop_duplicate_phones, data)
+
+    started = time.perf_counter()
+    data._contact_columns()
+    print(f"{'building columns':<32} {time.perf_counter() - started:8.3f} s")
+
+    timed("domain, columns", data._contact_columns().with_email_domain, 'gmail.com')
+    timed("born between, columns", data._contact_columns().born_between, start, end)
+    timed("duplicate phones, columns", data._contact_columns().duplicate_phones)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Read throughput of threads sharing an Assistant while another thread keeps changing it: queries under the
+read lock against queries of a snapshot. Run from the repository root:
+
+    python -m benchmarks.bench_concurrency [--records N] [--threads 1 2 4 8] [--writes 100] [--max-age 5]
+"""
+import argparse
+import random
+import threading
+import time
+
+from benchmarks.bench_memory import add_records
+from src.assistant import Assistant
+from src.concurrency import SharedAssistant
+
+
+def query(data, rnd: random.Random, records: int) -> None:
+    num = rnd.randrange(records)
+    data.find_records_by_phone(f"{1000000000 + num}")
+    data.search_records(f"Contact {num // 100}", 5)
+
+
+def run(shared: SharedAssistant, mode: str, threads: int, seconds: float, writes: float, max_age: float,
+        records: int) -> None:
+    stop = threading.Event()
+    counts = [0] * threads
+    written = [0]
+
+    def writer():
+        rnd = random.Random(0)
+        # On a fixed schedule, so time spent waiting for the lock doesn't lower the rate.
+        next_write = time.perf_counter()
+        while not stop.wait(max(0.0, next_write - time.perf_counter())):
+            next_write += 1 / writes
+            shared.add_phone(f"Contact {rnd.randrange(records)}", f"{rnd.randrange(3000000000, 4000000000)}")
+            written[0] += 1
+
+    def reader(num: int):
+        rnd = random.Random(num)
+        while not stop.is_set():
+            query(shared if mode == 'locked' else shared.snapshot(max_age), rnd, records)
+            counts[num] += 1
+
+    workers = [threading.Thread(target=writer)] + [threading.Thread(target=reader, args=(num,))
+                                                   for num in range(threads)]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    print(f"{mode:<9} {threads:>7} {sum(counts) / elapsed:>10.0f} {written[0] / elapsed:>9.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writes', type=float, default=100, help='writes per second')
+    parser.add_argument('--max-age', type=float, default=5, help='seconds a snapshot may lag behind')
+    args = parser.parse_args()
+
+    data = Assistant()
+    add_records(data, args.records, random.Random(1))
+    shared = SharedAssistant(data)
+
+    print(f"{'mode':<9} {'threads':>7} {'reads/s':>10} {'writes/s':>9}")
+    for mode in ('locked', 'snapshot'):
+        for threads in args.threads:
+            run(shared, mode, threads, args.seconds, args.writes, args.max_age, args.records)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Start-up cost of a saved database: loading a whole-database pickle against opening a segmented snapshot,
+and the first lookups afterwards. Run from the repository root:
+
+    python -m benchmarks.bench_load [--records N] [--notes N]
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from benchmarks.bench_memory import add_notes, add_records
+from src.assistant import Assistant
+
+
+def timed(label: str, func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    print(f"{label:<36} {(time.perf_counter() - started) * 1000:10.1f} ms")
+    return result
+
+
+def load_pickle(filename: str) -> Assistant:
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--notes', type=int, default=50_000)
+    args = parser.parse_args()
+
+    data = Assistant()
+    rnd = random.Random(1)
+    add_records(data, args.records, rnd)
+    add_notes(data, args.notes, rnd)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_file, segment_file = os.path.join(tmp, 'data.pickle'), os.path.join(tmp, 'data.segments')
+        with open(pickle_file, 'wb') as f:
+            timed("save, pickle", pickle.dump, data, f)
+        with open(segment_file, 'wb') as f:
+            timed("save, segments", data.dump_segments, f, {})
+        print(f"file size, pickle / segments         {os.path.getsize(pickle_file) >> 20} / "
+              f"{os.path.getsize(segment_file) >> 20} MiB")
+
+        name, title = f"Contact {args.records // 2}", f"Note {args.notes // 2}"
+        for label, load in (("pickle", load_pickle), ("segments", lambda fn: Assistant.load_segments(fn)[1])):
+            loaded = timed(f"load, {label}", load, segment_file if label == 'segments' else pickle_file)
+            timed(f"first show-record, {label}", loaded.get_record, name)
+            timed(f"first show-note, {label}", loaded.get_note, title)
+            timed(f"first phone search, {label}", loaded.find_records_by_phone, f"{1000000000 + args.records // 2}")
+
+        # Unchanged segments are copied from the loaded snapshot, only the edited records are pickled again.
+        loaded = Assistant.load_segments(segment_file)[1]
+        for i in range(10):
+            loaded.edit_record_address(f"Contact {i * 1000}", "street 1, kyiv")
+        with open(os.path.join(tmp, 'data.segments.new'), 'wb') as f:
+            timed("save 10 edits, segments", loaded.dump_segments, f, {})
+
+
+if __name__ == '__main__':
+    main()
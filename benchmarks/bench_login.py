@@ -0,0 +1,51 @@
+"""
+Login latency at chosen password hashing costs, against the SHA-256 filename check used before the account index.
+Run from the repository root, the index is written to a temporary directory:
+
+    python -m benchmarks.bench_login [--scrypt 4096 16384 32768] [--pbkdf2 100000 600000] [--logins N]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from src.accounts import AccountIndex, legacy_filename
+from src.data_manager import DataManager
+
+EMAIL = 'user@example.com'
+PASSWORD = 'correct horse battery'
+
+
+def timed(label: str, login, logins: int) -> None:
+    timings = []
+    for _ in range(logins):
+        started = time.perf_counter()
+        login()
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    mean, p99 = sum(timings) / len(timings), timings[int(len(timings) * 0.99)]
+    print(f"{label:<24} {mean * 1000:9.2f} ms  p99 {p99 * 1000:9.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scrypt', type=int, nargs='*', default=[2 ** 12, 2 ** 14, 2 ** 15], help='scrypt n values')
+    parser.add_argument('--pbkdf2', type=int, nargs='*', default=[100_000, 600_000], help='PBKDF2 iterations')
+    parser.add_argument('--logins', type=int, default=20)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    open(legacy_filename(EMAIL, PASSWORD), 'wb').close()
+    timed('sha256 + file check', lambda: DataManager.data_exists(legacy_filename(EMAIL, PASSWORD)), args.logins)
+
+    kdfs = [{'name': 'scrypt', 'n': n, 'r': 8, 'p': 1} for n in args.scrypt]
+    kdfs += [{'name': 'pbkdf2', 'iterations': iterations} for iterations in args.pbkdf2]
+    for num, kdf in enumerate(kdfs):
+        accounts = AccountIndex(f'accounts{num}.json', kdf)
+        accounts.signup(EMAIL, PASSWORD)
+        cost = f"n={kdf['n']}" if kdf['name'] == 'scrypt' else f"{kdf['iterations']} iterations"
+        timed(f"{kdf['name']} {cost}", lambda: accounts.authenticate(EMAIL, PASSWORD), args.logins)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Heap bytes per record and per note held by an in-memory Assistant, indexes included.
+Run from the repository root:
+
+    python -m benchmarks.bench_memory [--records N] [--notes N]
+"""
+import argparse
+import gc
+import random
+import tracemalloc
+from datetime import datetime, timedelta
+
+from src.assistant import Assistant
+from src.fields import Name, Phone, Email, Address, Birthday
+
+CITIES = ['kyiv', 'lviv', 'odesa', 'kharkiv', 'dnipro', 'london', 'berlin', 'warsaw']
+TAGS = ['work', 'home', 'family', 'urgent', 'ideas', 'travel']
+
+
+def add_records(data: Assistant, count: int, rnd: random.Random) -> None:
+    for i in range(count):
+        name = f"Contact {i}"
+        address = f"street {rnd.randrange(500)}, {rnd.choice(CITIES)}"
+        birthday = f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(1950, 2010)}"
+        data.add_record(Name(name), Phone(f"{1000000000 + i}"), Email(f"contact{i}@example.com"), Address(address),
+                        Birthday(birthday))
+        if i % 3 == 0:
+            data.add_phone(name, f"{2000000000 + i}")
+
+
+def add_notes(data: Assistant, count: int, rnd: random.Random) -> None:
+    for tag in TAGS:
+        data.create_tag(tag)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        title = f"Note {i}"
+        data.add_note(title, f"Call contact {i} about the {rnd.choice(TAGS)} plans", start + timedelta(minutes=i))
+        for tag in rnd.sample(TAGS, 2):
+            data.add_tag_to_note(title, tag)
+
+
+def measure(build, *args) -> int:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    data = build(*args)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del data
+    return used
+
+
+def build_records(count: int) -> Assistant:
+    data = Assistant()
+    add_records(data, count, random.Random(1))
+    return data
+
+
+def build_notes(count: int) -> Assistant:
+    data = Assistant()
+    add_notes(data, count, random.Random(1))
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--notes', type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"bytes per record: {measure(build_records, args.records) / args.records:.0f}")
+    print(f"bytes per note:   {measure(build_notes, args.notes) / args.notes:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Load generator for the command server: concurrent clients each sending commands back to back,
+a share of them writes. Reports requests per second and latency percentiles.
+Run from the repository root, it starts a server with generated contacts in a separate process:
+
+    python -m benchmarks.bench_server [--clients N] [--seconds S] [--writes 0.1] [--records N]
+
+or measures a running server (writes add phones to 'Contact <n>' records):
+
+    python -m benchmarks.bench_server --connect 127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+from src.assistant import Assistant
+
+
+async def client(address: str, deadline: float, writes: float, records: int, seed: int, latencies: List[float],
+                 errors: List[str]) -> None:
+    host, _, port = address.rpartition(':')
+    reader, writer = await asyncio.open_connection(host or '127.0.0.1', int(port))
+    rnd = random.Random(seed)
+
+    while time.perf_counter() < deadline:
+        num = rnd.randrange(records)
+        if rnd.random() < writes:
+            cmd = f'add-phone --name "Contact {num}" --phone {rnd.randrange(3000000000, 4000000000)}'
+        elif rnd.random() < 0.5:
+            cmd = f'find-by-phone --phone {1000000000 + num}'
+        else:
+            cmd = f'search-records --query "Contact {num // 100}" --limit 5'
+
+        started = time.perf_counter()
+        writer.write(cmd.encode() + b'\n')
+        await writer.drain()
+        reply = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - started)
+        if not reply['ok']:
+            errors.append(reply['message'])
+
+    writer.write(b'exit\n')
+    writer.close()
+
+
+async def generate_load(address: str, clients: int, seconds: float, writes: float, records: int) -> None:
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(client(address, started + seconds, writes, records, seed, latencies, errors)
+                           for seed in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"clients {clients}, writes {writes:.0%}: {len(latencies) / elapsed:.0f} requests/s, "
+          f"p50 {percentile(0.5):.2f} ms, p99 {percentile(0.99):.2f} ms, errors {len(errors)}")
+
+
+def serve(address: str, records: int) -> None:
+    from benchmarks.bench_memory import add_records
+    from src.server import CommandServer
+
+    data = Assistant()
+    add_records(data, records, random.Random(1))
+    asyncio.run(CommandServer(data).serve(address, lambda addr: print('ready', flush=True)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connect', metavar='ADDRESS', help="measure a running server at 'host:port'")
+    parser.add_argument('--serve', metavar='ADDRESS', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--writes', type=float, default=0.1)
+    parser.add_argument('--records', type=int, default=100_000)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.records)
+        return
+
+    address, server = args.connect, None
+    if address is None:
+        address = f"127.0.0.1:{args.port}"
+        server = subprocess.Popen([sys.executable, '-m', 'benchmarks.bench_server', '--serve', address,
+                                   '--records', str(args.records)], stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+
+    try:
+        for clients in args.clients:
+            asyncio.run(generate_load(address, clients, args.seconds, args.writes, args.records))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold start of the assistant entry point: a fresh interpreter importing main, then running its first command.
+Every run starts a new process, the median of the runs is reported along with the slowest imports seen by
+'python -X importtime'. With --baseline the same is measured on another commit, e.g. the one before a change:
+
+    python -m benchmarks.bench_startup [--runs 15] [--top 10] [--baseline HEAD~1]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from typing import Dict, List
+
+STAGES = {
+    'import main': 'import main',
+    'first command': 'import io, main\n'
+                     'from src.cmd_parser import CommandParser\n'
+                     "CommandParser.parse('help', None, interactive=False, out=io.StringIO()).handle_input()",
+}
+
+
+def run(code: str, cwd: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    options = ['-X', 'importtime'] if importtime else []
+    return subprocess.run([sys.executable, *options, '-c', code], cwd=cwd, capture_output=True, text=True, check=True)
+
+
+def startup_ms(code: str, cwd: str, runs: int) -> float:
+    run(code, cwd)  # compiles the bytecode cache
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        run(code, cwd)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def slowest_imports(code: str, cwd: str, top: int) -> List[str]:
+    """:return: modules imported by the code's own imports by cumulative time, including what they import."""
+    cumulative: Dict[str, int] = {}
+    for line in run(code, cwd, importtime=True).stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, name = line[len('import time:'):].split('|')
+        # Nesting is shown by two spaces per level after the separator's one.
+        if len(name) - len(name.lstrip()) == 3:
+            cumulative[name.strip()] = int(total)
+    return [f"{name:<32} {us / 1000:8.2f} ms" for name, us in sorted(cumulative.items(), key=lambda i: -i[1])[:top]]
+
+
+def checkout(ref: str) -> str:
+    """:return: directory with the files of the commit."""
+    target = tempfile.mkdtemp()
+    archive = os.path.join(target, 'tree.tar')
+    subprocess.run(['git', 'archive', '--format=tar', '-o', archive, ref], check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target, filter='data')
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=15)
+    parser.add_argument('--top', type=int, default=10, help='number of slowest imports to list')
+    parser.add_argument('--baseline', metavar='REF', help='git commit to compare with')
+    args = parser.parse_args()
+
+    trees = {'current': os.getcwd()}
+    if args.baseline:
+        trees[args.baseline] = checkout(args.baseline)
+
+    # An interpreter that imports nothing, the floor of any startup.
+    print(f"{'python -c pass':<16} {startup_ms('pass', os.getcwd(), args.runs):8.1f} ms")
+    for label, tree in trees.items():
+        for stage, code in STAGES.items():
+            print(f"{stage:<16} {startup_ms(code, tree, args.runs):8.1f} ms  {label}")
+        print(f"slowest imports of main, {label}:")
+        for line in slowest_imports('import main', tree, args.top):
+            print(f"  {line}")
+
+
+if __name__ == '__main__':
+    main()
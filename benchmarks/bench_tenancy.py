@@ -0,0 +1,53 @@
+"""
+Opening user sessions through the tenant cache: sessions of recently active users reuse their loaded data,
+the others load it from disk. Users are picked with a skewed distribution, a few of them are much more active.
+Run from the repository root, the users' files are written to a temporary directory:
+
+    python -m benchmarks.bench_tenancy [--users N] [--records N] [--sessions N] [--budget MiB]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.bench_memory import add_records
+from src.tenancy import TenantCache
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--records', type=int, default=2000, help='records per user')
+    parser.add_argument('--sessions', type=int, default=2000)
+    parser.add_argument('--budget', type=float, default=32, help='MiB of loaded data to keep')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    rnd = random.Random(1)
+    users = [(f"user{num}@example.com", f"password{num}") for num in range(args.users)]
+    setup = TenantCache(budget=0)
+    for email, password in users:
+        with setup.session(email, password, create=True) as tenant:
+            add_records(tenant.data, args.records, rnd)
+
+    cache = TenantCache(budget=int(args.budget * 1024 * 1024))
+    timings = {True: [], False: []}
+    for _ in range(args.sessions):
+        email, password = users[min(int(rnd.paretovariate(1.2)) - 1, args.users - 1)]
+        hits = cache.hits
+        started = time.perf_counter()
+        with cache.session(email, password) as tenant:
+            tenant.data.find_records_by_phone('1000000001')
+        timings[cache.hits > hits].append(time.perf_counter() - started)
+    cache.close()
+
+    stats = cache.stats()
+    print(f"hit ratio {stats['hit_ratio']:.0%}, {stats['evictions']} evictions")
+    for hit, label in ((True, 'cached'), (False, 'loaded')):
+        if timings[hit]:
+            print(f"{label} session: {sum(timings[hit]) / len(timings[hit]) * 1000:8.2f} ms ({len(timings[hit])})")
+
+
+if __name__ == '__main__':
+    main()
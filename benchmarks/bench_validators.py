@@ -0,0 +1,70 @@
+"""
+Per-value cost of field validation: the former per-call implementations, the shared validators
+and their batch API. Run from the repository root:
+
+    python -m benchmarks.bench_validators [--size N]
+"""
+import argparse
+import random
+import re
+import timeit
+from datetime import datetime
+
+from src import validators
+
+
+def legacy_phone(value):
+    if not value.isdigit():
+        raise ValueError("All characters are not digits")
+    if len(value) != 10:
+        raise ValueError("Phone number must be 10 digits long")
+    return value
+
+
+def legacy_email(value):
+    if not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value):
+        raise ValueError(f"{value} - email address format is invalid")
+    return value
+
+
+def legacy_birthday(value):
+    date = datetime.strptime(value, "%d.%m.%Y").date()
+    if date > datetime.today().date():
+        raise ValueError("Birthdate is from the future")
+    return date
+
+
+def make_columns(size):
+    rnd = random.Random(1)
+    phones = [f"{rnd.randrange(10 ** 9, 10 ** 10)}" for _ in range(size)]
+    emails = [f"user{rnd.randrange(10 ** 6)}@example{rnd.randrange(100)}.com" for _ in range(size)]
+    birthdays = [f"{rnd.randint(1, 28):02d}.{rnd.randint(1, 12):02d}.{rnd.randint(1940, 2010)}" for _ in range(size)]
+    return phones, emails, birthdays
+
+
+def per_value_ns(func, size, repeat=5):
+    return min(timeit.repeat(func, number=1, repeat=repeat)) / size * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100_000, help='values per column')
+    size = parser.parse_args().size
+
+    phones, emails, birthdays = make_columns(size)
+    cases = [
+        ('phone', phones, legacy_phone, validators.validate_phone, validators.validate_phones),
+        ('email', emails, legacy_email, validators.validate_email, validators.validate_emails),
+        ('birthday', birthdays, legacy_birthday, validators.parse_birthday, validators.parse_birthdays),
+    ]
+
+    print(f"{'field':<10}{'legacy ns':>12}{'single ns':>12}{'batch ns':>12}")
+    for name, column, legacy, single, batch in cases:
+        print(f"{name:<10}"
+              f"{per_value_ns(lambda: [legacy(v) for v in column], size):>12.0f}"
+              f"{per_value_ns(lambda: [single(v) for v in column], size):>12.0f}"
+              f"{per_value_ns(lambda: batch(column), size):>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,94 @@
-from src.cmd_handlers import HandlerResponse
-from src.cmd_parser import CommandParser
+import argparse
+import os
+import sys
+
+from src.accounts import AccountIndex
 from src.data_manager import DataManager
+from src.exceptions import AuthenticationError
 from src.picture import StartupPicture
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='A CLI telephone book with notes manager.')
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands from FILE one per line without prompting, '-' reads them from stdin")
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help="serve commands to network clients on 'host:port', ':port' or a Unix socket path")
+    parser.add_argument('--multi-user', action='store_true',
+                        help="with --serve: serve many users, each client logs in with its email and password")
+    parser.add_argument('--email', help="log in without prompting, defaults to the ASSISTANT_EMAIL variable")
+    parser.add_argument('--password-file', metavar='FILE',
+                        help="file with the password on its first line, defaults to the ASSISTANT_PASSWORD variable")
+    return parser.parse_args()
+
+
+def open_data_manager(args) -> DataManager:
+    """
+    Log in with the email and password given on the command line or in the environment, or ask for them.
+    A batch that can't ask, its stdin isn't a terminal, exits at once instead of reading the credentials
+    from the commands or waiting forever.
+    """
+    email = args.email or os.environ.get('ASSISTANT_EMAIL')
+    if args.password_file:
+        with open(args.password_file, encoding='utf-8') as f:
+            password = f.readline().rstrip('\r\n')
+    else:
+        password = os.environ.get('ASSISTANT_PASSWORD')
+
+    if email and password:
+        accounts = AccountIndex(legacy_exists=DataManager.data_exists)
+        try:
+            filename = accounts.authenticate(email, password)
+        except AuthenticationError as e:
+            sys.exit(str(e))
+        return DataManager(filename=filename, password=password, accounts=accounts)
+
+    if args.batch and not sys.stdin.isatty():
+        sys.exit("--batch without a terminal needs --email and --password-file, "
+                 "or the ASSISTANT_EMAIL and ASSISTANT_PASSWORD variables.")
+    return DataManager()
+
+
 def main():
+    args = parse_args()
+
     StartupPicture.print_picture()
-    dm = DataManager()
+    # Only the modules of the chosen mode are imported, the server's asyncio isn't needed by the prompt.
+    if args.serve and args.multi_user:
+        from src.server import run_server
+        from src.tenancy import TenantCache
+
+        run_server(None, args.serve, tenants=TenantCache())
+        return
+
+    dm = open_data_manager(args)
     data = dm.load_data()
 
-    while True:
-        cmd = input('Enter the command (use \'help\' to list all available commands): ')
-        response = CommandParser.parse(cmd, data).handle_input()
+    if args.batch:
+        from src.batch import run_batch
+
+        batch_file = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+        with batch_file:
+            result = run_batch(batch_file, data)
+        print(f"Executed {result.executed} commands, {result.failed} failed.")
+    elif args.serve:
+        from src.server import run_server
+
+        run_server(data, args.serve, lambda: dm.autosave(data))
+    else:
+        from src.cmd_handlers import HandlerResponse
+        from src.cmd_parser import CommandParser
+
+        while True:
+            cmd = input('Enter the command (use \'help\' to list all available commands): ')
+            response = CommandParser.parse(cmd, data).handle_input()
 
-        if response.msg:
-            print(response.msg)
+            if response.msg:
+                print(response.msg)
 
-        if response.status == HandlerResponse.Status.FINISH:
-            break
+            if response.status == HandlerResponse.Status.FINISH:
+                break
+            dm.autosave(data)
 
     dm.save_data(data)
 
@@ -1,23 +1,50 @@
-from src.exceptions import RecordPropertyNotFound, UnknownInputCommand
-from src.fields import Name, Phone, Email, Address, Birthday
-from src.record import Record
-from src.tag import Tag
-from src.note import Note
-from src.picture import StartupPicture
-from src.assistant import Assistant
-from src.data_manager import DataManager
-
-from src.cmd_handlers import HelpCommandHandler
-from src.cmd_handlers import AddRecordCommandHandler
-from src.cmd_handlers import CreateTagCommandHandler
-from src.cmd_handlers import EditRecordCommandHandler
-from src.cmd_handlers import RemoveRecordCommandHandler
-from src.cmd_handlers import SearchRecordCommandHandler
-from src.cmd_handlers import ShowAllRecordsCommandHandler
-from src.cmd_handlers import AddPhoneCommandHandler
-from src.cmd_handlers import ShowUpcomingBirthdayRecordsCommandHandler
-from src.cmd_handlers import ExitCommandHandler
-from src.cmd_handlers import SortNotesByTagCommandHandler
-from src.cmd_handlers import UnknownRecordCommandHandler
-
-from src.cmd_parser import CommandParser
\ No newline at end of file
+"""
+Names below are imported on first access (PEP 562), so 'import src' or importing one submodule doesn't load
+every command handler and their dependencies.
+"""
+import importlib
+
+_exports = {
+    'RecordPropertyNotFound': 'src.exceptions',
+    'UnknownInputCommand': 'src.exceptions',
+    'Name': 'src.fields',
+    'Phone': 'src.fields',
+    'Email': 'src.fields',
+    'Address': 'src.fields',
+    'Birthday': 'src.fields',
+    'Record': 'src.record',
+    'Tag': 'src.tag',
+    'Note': 'src.note',
+    'StartupPicture': 'src.picture',
+    'Assistant': 'src.assistant',
+    'DataManager': 'src.data_manager',
+
+    'HelpCommandHandler': 'src.cmd_handlers',
+    'AddRecordCommandHandler': 'src.cmd_handlers',
+    'CreateTagCommandHandler': 'src.cmd_handlers',
+    'EditRecordCommandHandler': 'src.cmd_handlers',
+    'RemoveRecordCommandHandler': 'src.cmd_handlers',
+    'SearchRecordCommandHandler': 'src.cmd_handlers',
+    'ShowAllRecordsCommandHandler': 'src.cmd_handlers',
+    'AddPhoneCommandHandler': 'src.cmd_handlers',
+    'ShowUpcomingBirthdayRecordsCommandHandler': 'src.cmd_handlers',
+    'ExitCommandHandler': 'src.cmd_handlers',
+    'SortNotesByTagCommandHandler': 'src.cmd_handlers',
+    'UnknownRecordCommandHandler': 'src.cmd_handlers',
+
+    'CommandParser': 'src.cmd_parser',
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name: str):
+    if name not in _exports:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    value = getattr(importlib.import_module(_exports[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports))
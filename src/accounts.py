@@ -0,0 +1,141 @@
+"""
+Index of user accounts: email -> salted password hash and the name of the user's data file.
+
+Passwords are hashed with scrypt or PBKDF2-SHA256 at a configurable cost, the parameters are stored with every
+account, so the cost can be raised without breaking existing logins: an account is rehashed with the current
+parameters on its next login. The key of the data file is derived from the password separately, with its own salt,
+see src.codec.
+
+Accounts created before the index existed have no entry, their data file is named by the SHA-256 of the email and
+the password. Such an account is added to the index on its first login.
+"""
+import hashlib
+import hmac
+import json
+import os
+import secrets
+from typing import Any, Callable, Dict
+
+from src.exceptions import AuthenticationError
+
+DEFAULT_KDF = {
+    'scrypt': {'name': 'scrypt', 'n': 2 ** 14, 'r': 8, 'p': 1},
+    'pbkdf2': {'name': 'pbkdf2', 'iterations': 600_000},
+}
+
+
+def kdf_from_env() -> Dict[str, Any]:
+    """
+    Password hashing set by ASSISTANT_KDF ('scrypt' by default or 'pbkdf2') and ASSISTANT_KDF_COST:
+    the scrypt n (a power of 2) or the number of PBKDF2 iterations.
+    """
+    name = os.environ.get('ASSISTANT_KDF', 'scrypt')
+    if name not in DEFAULT_KDF:
+        raise ValueError(f"Unknown password hashing '{name}'. Use one of: {', '.join(DEFAULT_KDF)}")
+    kdf = dict(DEFAULT_KDF[name])
+    cost = os.environ.get('ASSISTANT_KDF_COST')
+    if cost:
+        kdf['n' if name == 'scrypt' else 'iterations'] = int(cost)
+    return kdf
+
+
+def hash_password(password: str, salt: bytes, kdf: Dict[str, Any]) -> bytes:
+    if kdf['name'] == 'scrypt':
+        return hashlib.scrypt(password.encode(), salt=salt, n=kdf['n'], r=kdf['r'], p=kdf['p'], dklen=32,
+                              maxmem=256 * kdf['n'] * kdf['r'] * kdf['p'])
+    if kdf['name'] == 'pbkdf2':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, kdf['iterations'])
+    raise ValueError(f"Unknown password hashing '{kdf['name']}'.")
+
+
+def legacy_filename(email: str, password: str) -> str:
+    """Data file name of an account created before the index existed."""
+    return hashlib.sha256(email.encode() + password.encode()).hexdigest()
+
+
+class AccountIndex:
+    def __init__(self, filename: str = 'accounts.json', kdf: Dict[str, Any] = None,
+                 legacy_exists: Callable[[str], bool] = None) -> None:
+        """
+        :param kdf: password hashing of new accounts, see kdf_from_env.
+        :param legacy_exists: checks whether a data file of an account not in the index exists.
+                              Without it such accounts are not migrated.
+        """
+        self.filename = filename
+        self.kdf = kdf or kdf_from_env()
+        self._legacy_exists = legacy_exists
+        self._accounts: Dict[str, Dict[str, Any]] = self._load()
+
+    @staticmethod
+    def normalize(email: str) -> str:
+        """Emails are matched case-insensitively."""
+        return email.strip().lower()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.filename, encoding='utf-8') as f:
+                return json.load(f)['accounts']
+        except FileNotFoundError:
+            return {}
+
+    def _save(self) -> None:
+        # Replaced atomically and readable only by the owner, it holds password hashes.
+        tmp_filename = self.filename + '.tmp'
+        fd = os.open(tmp_filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'accounts': self._accounts}, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+
+    def _store(self, email: str, password: str, data_file: str) -> None:
+        salt = os.urandom(16)
+        # Another process may have changed the index since it was read.
+        self._accounts = self._load()
+        self._accounts[self.normalize(email)] = {
+            'salt': salt.hex(),
+            'hash': hash_password(password, salt, self.kdf).hex(),
+            'kdf': self.kdf,
+            'data': data_file,
+        }
+        self._save()
+
+    def exists(self, email: str) -> bool:
+        return self.normalize(email) in self._accounts
+
+    def signup(self, email: str, password: str) -> str:
+        """
+        Create an account.
+        :return: name of the new account's data file.
+        """
+        self._accounts = self._load()
+        if self.exists(email):
+            raise ValueError("User with such email already exists!")
+        data_file = secrets.token_hex(32)
+        self._store(email, password, data_file)
+        return data_file
+
+    def authenticate(self, email: str, password: str) -> str:
+        """
+        Check the password. Logins take the same time whether the email is known or not.
+        :return: name of the account's data file.
+        """
+        account = self._accounts.get(self.normalize(email))
+        if account is None:
+            self._accounts = self._load()
+            account = self._accounts.get(self.normalize(email))
+
+        if account is None:
+            data_file = legacy_filename(email, password)
+            if self._legacy_exists is not None and self._legacy_exists(data_file):
+                self._store(email, password, data_file)
+                return data_file
+            hash_password(password, b'\x00' * 16, self.kdf)
+            raise AuthenticationError("User with such email or password does not exist!")
+
+        expected = bytes.fromhex(account['hash'])
+        if not hmac.compare_digest(hash_password(password, bytes.fromhex(account['salt']), account['kdf']), expected):
+            raise AuthenticationError("User with such email or password does not exist!")
+        if account['kdf'] != self.kdf:
+            self._store(email, password, account['data'])
+        return account['data']
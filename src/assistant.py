@@ -1,28 +1,298 @@
 import copy
-from datetime import datetime, timedelta, date
-from typing import List, Generator, Tuple
-
-from prettytable import PrettyTable
-
-from src import Note
+from contextlib import contextmanager
+from itertools import islice
+from datetime import datetime, timedelta, date, time
+from typing import TYPE_CHECKING, Callable, List, Generator, Tuple
+
+from src import Note, segments
+from src.codec import Codec
+from src.columnar import ContactColumns
+from src.journal import Journal
 from src.fields import Name, Phone, Address, Email, Birthday
+from src.indexes import BirthdayIndex, NameIndex, SortedIndex, SortedKeys, TextIndex, evaluate_boolean_query
 from src.record import Record
 from src.tag import Tag
 
+if TYPE_CHECKING:
+    from prettytable import PrettyTable
+
 
 class Assistant:
     def __init__(self) -> None:
         self._records = {}
         self._notes = {}
         self._tags = {}
+        self._next_tag_id = 1
+        self._journal = None
+        self._phone_index = {}
+        self._birthday_index = BirthdayIndex()
+        self._text_index = TextIndex()
+        self._created_index = SortedIndex()
+        self._modified_index = SortedIndex()
+        self._tag_postings = {}
+        self._tag_records = {}
+        self._name_index = NameIndex()
+        self._columns = None
+        self._indexed = True
+        self._dirty = False
+
+    # Journal holds an open file and belongs to the storage, not to the data.
+    # Derived lookup structures are not stored either, they are rebuilt from the data on load.
+    _indexes = ('_phone_index', '_birthday_index', '_text_index', '_created_index', '_modified_index',
+                '_tag_postings', '_tag_records', '_name_index')
+    _transient = ('_journal', *_indexes, '_columns', '_indexed', '_dirty')
+    # Methods changing the data, the operations the journal records.
+    mutations = frozenset({
+        'add_record', 'add_records', 'edit_record_phone', 'edit_record_email', 'edit_record_address',
+        'edit_record_birthday', 'edit_record_name', 'remove_record', 'add_phone', 'remove_phone',
+        'add_note', 'add_tag_to_note', 'edit_notes_title', 'edit_notes_content', 'remove_note',
+        'link_note_to_record', 'create_tag', 'delete_tag', 'edit_tag',
+    })
+    # Queries only read the data once it is settled, threads may run them side by side, see SharedAssistant.
+    concurrent_reads = True
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        for attr in self._transient:
+            state.pop(attr, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self._restore(state)
+
+    def __getattr__(self, name: str):
+        # Indexes of a lazily loaded database are built on first use.
+        if name in Assistant._indexes and self.__dict__.get('_indexed') is False:
+            self._rebuild_indexes()
+            return getattr(self, name)
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _restore(self, state: dict, lazy: bool = False) -> None:
+        """
+        :param lazy: records and notes are loaded on demand, indexes are not built until a query needs them.
+                     Until then mutations skip index maintenance, the indexes are built from the current data.
+        """
+        self.__dict__.update(state)
+        self._journal = None
+        self._dirty = False
+
+        if '_next_tag_id' not in state:
+            # Data saved before tags had ids. Tags are shared between the tags dict and the notes.
+            # Older versions didn't re-key renamed tags.
+            self._next_tag_id = 1
+            self._tags = {tag.name: tag for tag in self._tags.values()}
+            for tag in self._tags.values():
+                tag.id = self._new_tag_id()
+
+        if lazy:
+            self._indexed = False
+            self._columns = None
+        else:
+            self._rebuild_indexes()
+
+    def dump_segments(self, f, header: dict, codec: Codec = None) -> None:
+        """Write the database to a binary file as a segmented snapshot, see src.segments."""
+        state = self.__getstate__()
+        records, notes = state.pop('_records'), state.pop('_notes')
+        segments.dump(f, header, state, {'records': records, 'notes': notes}, codec)
+
+    @classmethod
+    def load_segments(cls, filename: str, codec: Callable[[dict], Codec] = None) -> Tuple[dict, 'Assistant']:
+        """
+        Open a segmented snapshot without loading records and notes.
+        :param codec: returns the codec for the descriptor stored in the file, see SegmentFile.
+        :return: header the snapshot was written with and the database.
+        """
+        source = segments.SegmentFile(filename, codec)
+        state = source.load_pickle(*source.index['meta'])
+        state['_records'] = source.segment_map('records')
+        state['_notes'] = source.segment_map('notes')
+
+        database = cls.__new__(cls)
+        database._restore(state, lazy=True)
+        source.tags = database._tag_resolver()
+        return source.index['header'], database
+
+    def _tag_resolver(self) -> Callable[[int], Tag | None]:
+        """:return: function finding a current tag by id, tags rarely change so the lookup dict is cached."""
+        by_id = {}
+
+        def resolve(tag_id: int) -> Tag | None:
+            nonlocal by_id
+            tag = by_id.get(tag_id)
+            if tag is None or self._tags.get(tag.name) is not tag:
+                # Replaced rather than refilled, a concurrent reader keeps a complete dict.
+                by_id = {tag.id: tag for tag in self._tags.values()}
+                tag = by_id.get(tag_id)
+            return tag
+
+        return resolve
+
+    def _rebuild_indexes(self) -> None:
+        self._indexed = True
+        self._phone_index = {}
+        self._birthday_index = BirthdayIndex()
+        self._text_index = TextIndex()
+        self._created_index = SortedIndex()
+        self._modified_index = SortedIndex()
+        self._tag_postings = {tag.id: SortedKeys() for tag in self._tags.values()}
+        # Tag id -> names of the records with a linked note carrying the tag.
+        self._tag_records = {}
+        self._name_index = NameIndex()
+        self._columns = None
+        for rec in self._records.values():
+            self._index_record(rec)
+        for note in self._notes.values():
+            self._index_note(note)
+
+    def settle(self) -> None:
+        """
+        Do the index work deferred to the next query now: build the indexes of a lazily loaded database
+        and merge keys buffered by mutations. Until the next mutation queries only read, so threads can
+        run them side by side.
+        """
+        if not self._indexed:
+            self._rebuild_indexes()
+        self._name_index.settle()
+        for titles in self._tag_postings.values():
+            titles.settle()
+
+    def _index_record(self, rec: Record) -> None:
+        if not self._indexed:
+            return
+        self._name_index.add(rec.name)
+        for phone in rec.phones:
+            self._index_phone(str(phone), rec.name)
+        if rec.birthday:
+            self._birthday_index.add(rec.name, rec.birthday)
+        for note in rec.notes:
+            self._index_record_note(rec.name, note)
+        if self._columns is not None:
+            self._columns.add(rec)
+
+    def _unindex_record(self, rec: Record) -> None:
+        if not self._indexed:
+            return
+        self._name_index.remove(rec.name)
+        for phone in rec.phones:
+            names = self._phone_index.get(str(phone))
+            if names is not None and rec.name in names:
+                names = tuple(name for name in names if name != rec.name)
+                if names:
+                    self._phone_index[str(phone)] = names
+                else:
+                    del self._phone_index[str(phone)]
+        if rec.birthday:
+            self._birthday_index.remove(rec.name, rec.birthday)
+        for note in rec.notes:
+            for tag in note.tags:
+                names = self._tag_records.get(tag.id)
+                if names is not None:
+                    names.discard(rec.name)
+                    if not names:
+                        del self._tag_records[tag.id]
+        if self._columns is not None:
+            self._columns.remove(rec.name)
+
+    def _index_phone(self, phone: str, name: str) -> None:
+        # A phone almost always belongs to one contact: a tuple of names costs a fraction of a set.
+        if not self._indexed:
+            return
+        names = self._phone_index.get(phone, ())
+        if name not in names:
+            self._phone_index[phone] = names + (name,)
+
+    def _index_record_note(self, name: str, note: Note) -> None:
+        if not self._indexed:
+            return
+        for tag in note.tags:
+            self._tag_records.setdefault(tag.id, set()).add(name)
+
+    def _contact_columns(self) -> ContactColumns:
+        # Built by the first query scanning all contacts, then kept in step by _index_record/_unindex_record.
+        if self._columns is None:
+            # Published when complete, concurrent readers may build it twice but never see it half-built.
+            columns = ContactColumns()
+            columns.extend(self._records.values())
+            self._columns = columns
+        return self._columns
+
+    def _index_note(self, note: Note) -> None:
+        if not self._indexed:
+            return
+        self._text_index.add(note.title, f"{note.title}\n{Note.unformat_note(note.content)}")
+        self._created_index.add(note.created_at, note.title)
+        if note.modified_at:
+            self._modified_index.add(note.modified_at, note.title)
+        for tag in note.tags:
+            if tag.id in self._tag_postings:
+                self._tag_postings[tag.id].add(note.title)
+
+    def _unindex_note(self, note: Note) -> None:
+        if not self._indexed:
+            return
+        self._text_index.remove(note.title)
+        self._created_index.remove(note.created_at, note.title)
+        if note.modified_at:
+            self._modified_index.remove(note.modified_at, note.title)
+        for tag in note.tags:
+            if tag.id in self._tag_postings:
+                self._tag_postings[tag.id].discard(note.title)
+
+    def attach_journal(self, journal: Journal | None) -> None:
+        """Log every subsequent mutation to the journal. Pass None to stop logging."""
+        self._journal = journal
+
+    @property
+    def journal(self) -> Journal | None:
+        return self._journal
+
+    @property
+    def dirty(self) -> bool:
+        """Whether anything changed since the last mark_saved()."""
+        return self._dirty
+
+    def mark_saved(self) -> None:
+        self._dirty = False
+
+    @staticmethod
+    def _changed(mapping, key) -> None:
+        # Segments of a lazily loaded database are copied to the next snapshot unless reported here.
+        if isinstance(mapping, segments.SegmentMap):
+            mapping.changed(key)
+
+    def _log(self, operation: str, *args) -> None:
+        # Every mutation ends here.
+        self._dirty = True
+        if self._journal is not None:
+            self._journal.append(operation, args)
+
+    @contextmanager
+    def batch(self):
+        """
+        Group many mutations, e.g. commands of a batch file.
+        Journal entries are buffered and flushed once when the batch ends instead of after every mutation.
+        """
+        journal = self._journal
+        if journal is None or not journal.autoflush:
+            yield self
+            return
+
+        journal.autoflush = False
+        try:
+            yield self
+        finally:
+            journal.autoflush = True
+            journal.flush()
 
     def record_exists(self, name: str) -> bool:
-        if self._records.get(name):
-            return True
-        return False
+        return name in self._records
 
     def phone_exists(self, phone: str) -> bool:
-        return any(str(p) == phone for rec in self._records.values() for p in rec.phones)
+        return phone in self._phone_index
+
+    def find_records_by_phone(self, phone: str) -> List[Record]:
+        return [self._records[name] for name in sorted(self._phone_index.get(phone, ()))]
 
     def tag_exists(self, name: str) -> bool:
         if self._tags.get(name):
@@ -31,88 +301,186 @@ class Assistant:
 
     def add_record(self, name: Name, phone: Phone, email: Email = None, address: Address = None,
                    birthday: Birthday = None) -> None:
-        self._records[str(name)] = Record(name, phone, email, address, birthday)
+        if str(name) in self._records:
+            self._unindex_record(self._records[str(name)])
+
+        rec = Record(name, phone, email, address, birthday)
+        self._records[str(name)] = rec
+        self._index_record(rec)
+        self._log('add_record', name, phone, email, address, birthday)
+
+    def add_records(self, records: List[Tuple[Name, List[Phone], Email, Address, Birthday]]) -> None:
+        """
+        Add many records at once, e.g. from an import. The whole list is a single journal entry.
+        :param records: (name, phones, email, address, birthday) of every record, at least one phone each.
+        """
+        for name, phones, email, address, birthday in records:
+            if str(name) in self._records:
+                self._unindex_record(self._records[str(name)])
+
+            rec = Record(name, phones[0], email, address, birthday)
+            rec.phones.extend(phones[1:])
+            self._records[str(name)] = rec
+            self._index_record(rec)
+        self._log('add_records', records)
 
     def edit_record_phone(self, rec_name: str, old_phone: str, new_phone: str) -> None:
         rec = self._records[rec_name]
+        new_phone_field = Phone(new_phone)
+        self._unindex_record(rec)
 
         for idx, phone in enumerate(rec.phones):
             if str(phone) == old_phone:
-                rec.phones[idx] = Phone(new_phone)
+                rec.phones[idx] = new_phone_field
+
+        self._index_record(rec)
+        self._changed(self._records, rec_name)
+        self._log('edit_record_phone', rec_name, old_phone, new_phone)
 
     def edit_record_email(self, rec_name: str, new_value: str) -> None:
         rec = self._records[rec_name]
         rec.email = new_value
+        if self._columns is not None:
+            self._columns.add(rec)
+        self._changed(self._records, rec_name)
+        self._log('edit_record_email', rec_name, new_value)
 
     def edit_record_address(self, rec_name: str, new_value: str) -> None:
         rec = self._records[rec_name]
         rec.address = new_value
+        self._changed(self._records, rec_name)
+        self._log('edit_record_address', rec_name, new_value)
 
     def edit_record_birthday(self, rec_name: str, new_value: str) -> None:
         rec = self._records[rec_name]
+        self._unindex_record(rec)
         rec.birthday = new_value
+        self._index_record(rec)
+        self._changed(self._records, rec_name)
+        self._log('edit_record_birthday', rec_name, new_value)
 
     def edit_record_name(self, rec_name: str, new_value: str) -> None:
         rec = self._records[rec_name]
+        self._unindex_record(rec)
         rec.name = new_value
+        # Keep the record reachable by its new name.
+        if rec.name != rec_name and rec.name in self._records:
+            self._unindex_record(self._records[rec.name])
+        self._records[rec.name] = self._records.pop(rec_name)
+        self._index_record(rec)
+        self._log('edit_record_name', rec_name, new_value)
 
     def remove_record(self, rec_name: str) -> None:
-        del self._records[rec_name]
+        self._unindex_record(self._records.pop(rec_name))
+        self._log('remove_record', rec_name)
 
     def get_record(self, name: str) -> Record:
         return self._records.get(name)
 
+    def search_records(self, query: str, limit: int = 10) -> List[Record]:
+        """
+        Names starting with the query come first, then names within a small edit distance of it.
+        """
+        names = self._name_index.prefix(query, limit)
+        if len(names) < limit:
+            found = set(names)
+            names += [name for _, name in self._name_index.fuzzy(query, limit) if name not in found]
+        return [self._records[name] for name in names[:limit]]
+
     def get_records(self) -> List[Record]:
         return self._records.values()
 
+    def iter_records(self, offset: int = 0, limit: int = None) -> Generator[Record, None, None]:
+        yield from islice(self._records.values(), offset, None if limit is None else offset + limit)
+
+    def count_records(self) -> int:
+        return len(self._records)
+
     def add_phone(self, name: str, phone: str) -> None:
-        self._records[name].phones.append(Phone(phone))
+        rec = self._records[name]
+        rec.phones.append(Phone(phone))
+        self._index_phone(phone, name)
+        if self._columns is not None:
+            self._columns.add(rec)
+        self._changed(self._records, name)
+        self._log('add_phone', name, phone)
 
     def remove_phone(self, name: str, phone: str) -> None:
-        self._records[name].phones = [p for p in self._records[name].phones if p.value != phone]
-
-    def get_records_with_upcoming_birthday(self) -> Generator[Tuple[str, date], None, None]:
+        rec = self._records[name]
+        self._unindex_record(rec)
+        rec.phones = [p for p in rec.phones if p.value != phone]
+        self._index_record(rec)
+        self._changed(self._records, name)
+        self._log('remove_phone', name, phone)
+
+    def get_records_with_upcoming_birthday(self, days: int = 7) -> Generator[Tuple[str, date], None, None]:
         today = datetime.now().date()
-        end_date = today + timedelta(days=7)
 
-        for rec in self._records.values():
-            if rec.birthday:
-                user_bday = rec.birthday
-                bday_this_year = user_bday.replace(year=today.year)
+        for name, bday_this_year in self._birthday_index.upcoming(today, days):
+            if bday_this_year.weekday() == 5:  # Saturday
+                bday_this_year += timedelta(days=2)
+            elif bday_this_year.weekday() == 6:  # Sunday
+                bday_this_year += timedelta(days=1)
+
+            yield name, bday_this_year
 
-                if today <= bday_this_year <= end_date:
-                    if bday_this_year.weekday() == 5:  # Saturday
-                        bday_this_year += timedelta(days=2)
-                    elif bday_this_year.weekday() == 6:  # Sunday
-                        bday_this_year += timedelta(days=1)
+    def find_records_by_email_domain(self, domain: str) -> List[Record]:
+        """:param domain: part of the email after '@', case-insensitive."""
+        return [self._records[name] for name in sorted(self._contact_columns().with_email_domain(domain))]
 
-                    yield rec.name, bday_this_year
+    def find_records_born_between(self, start_date: date, end_date: date) -> List[Record]:
+        names = self._contact_columns().born_between(start_date, end_date)
+        return sorted((self._records[name] for name in names), key=lambda rec: (rec.birthday, rec.name))
+
+    def get_duplicate_phones(self) -> List[Tuple[str, List[str]]]:
+        """:return: (phone, sorted names) of every phone shared by several contacts, ordered by phone."""
+        return [(phone, sorted(set(names))) for phone, names in self._contact_columns().duplicate_phones().items()]
 
     def note_exists(self, title: str) -> bool:
-        if self._notes.get(title):
-            return True
-        return False
+        return title in self._notes
 
-    def add_note(self, title, content: str) -> None:
-        note = Note(title=title, content=content)
+    def add_note(self, title, content: str, created_at: datetime = None) -> None:
+        if title in self._notes:
+            self._unindex_note(self._notes[title])
+
+        note = Note(title=title, content=content, created_at=created_at)
         self._notes[title] = note
+        self._index_note(note)
+        self._log('add_note', title, content, note.created_at)
 
     def add_tag_to_note(self, note_title: str, tag_name: str) -> None:
         note = self._notes[note_title]
-        note.tags.append(self._tags[tag_name])
-
-    def edit_notes_title(self, title: str, new_title: str) -> None:
-        self._notes[new_title] = self._notes.pop(title)
-        self._notes[new_title].title = new_title
-        self._notes[new_title].modified_at = datetime.now()
-
-    def edit_notes_content(self, title: str, new_content: str) -> None:
+        tag = self._tags[tag_name]
+        note.tags.append(tag)
+        if self._indexed:
+            self._tag_postings[tag.id].add(note_title)
+        self._changed(self._notes, note_title)
+        self._log('add_tag_to_note', note_title, tag_name)
+
+    def edit_notes_title(self, title: str, new_title: str, modified_at: datetime = None) -> None:
+        note = self._notes.pop(title)
+        self._unindex_note(note)
+        if new_title in self._notes:
+            self._unindex_note(self._notes[new_title])
+
+        self._notes[new_title] = note
+        note.title = new_title
+        note.modified_at = modified_at or datetime.now()
+        self._index_note(note)
+        self._log('edit_notes_title', title, new_title, note.modified_at)
+
+    def edit_notes_content(self, title: str, new_content: str, modified_at: datetime = None) -> None:
         note = self._notes[title]
+        self._unindex_note(note)
         note.content = note.format_note(new_content)
-        note.modified_at = datetime.now()
+        note.modified_at = modified_at or datetime.now()
+        self._index_note(note)
+        self._changed(self._notes, title)
+        self._log('edit_notes_content', title, new_content, note.modified_at)
 
     def remove_note(self, title: str) -> None:
-        del self._notes[title]
+        self._unindex_note(self._notes.pop(title))
+        self._log('remove_note', title)
 
     def get_note(self, title: str) -> Note:
         return self._notes.get(title)
@@ -120,12 +488,24 @@ class Assistant:
     def get_notes(self) -> List[Note]:
         return self._notes.values()
 
+    def iter_notes(self, offset: int = 0, limit: int = None) -> Generator[Note, None, None]:
+        yield from islice(self._notes.values(), offset, None if limit is None else offset + limit)
+
+    def count_notes(self) -> int:
+        return len(self._notes)
+
     def get_notes_by_period_of_dates(self, start_date: date, end_date: date) -> List[Note]:
-        notes = []
-        for note in self._notes.values():
-            if start_date <= note.created_at.date() <= end_date:
-                notes.append(note)
-        return notes
+        start, end = self._day_bounds(start_date, end_date)
+        return [self._notes[title] for title in self._created_index.range(start, end)]
+
+    def get_notes_modified_between(self, start_date: date, end_date: date) -> List[Note]:
+        start, end = self._day_bounds(start_date, end_date)
+        return [self._notes[title] for title in self._modified_index.range(start, end)]
+
+    @staticmethod
+    def _day_bounds(start_date: date, end_date: date) -> Tuple[datetime, datetime]:
+        """Turn an inclusive range of days into a half-open range of timestamps."""
+        return datetime.combine(start_date, time.min), datetime.combine(end_date + timedelta(days=1), time.min)
 
     def get_notes_by_word_in_title(self, word: str) -> List[Note]:
         notes = []
@@ -134,31 +514,50 @@ class Assistant:
                 notes.append(note)
         return notes
 
+    def search_notes(self, query: str) -> List[Note]:
+        return [self._notes[title] for title in sorted(self._text_index.search(query))]
+
     def get_notes_by_tag(self, tag: str) -> List[Note]:
-        notes = []
-        for note in self._notes.values():
-            if tag in note.tags:
-                notes.append(note)
-        return notes
+        return [self._notes[title] for title in self._tag_titles(tag)]
+
+    def find_notes_by_tags(self, query: str) -> List[Note]:
+        """
+        :param query: tag names combined with AND, OR and NOT, e.g. 'work AND urgent NOT done'.
+        """
+        titles = evaluate_boolean_query(query, self._tag_titles, self._notes.keys)
+        return [self._notes[title] for title in sorted(titles)]
+
+    def _tag_titles(self, tag_name: str) -> SortedKeys:
+        tag = self._tags.get(tag_name)
+        return self._tag_postings[tag.id] if tag else SortedKeys()
+
+    def count_notes_by_tag(self, tag_name: str) -> int:
+        return len(self._tag_titles(tag_name))
 
     def link_note_to_record(self, name: str, note: str) -> None:
         note = self.get_note(note)
         rec = self.get_record(name)
 
         cpy_note = copy.copy(note)
+        # The copy's tags change on their own, as they do once stored in another segment than the note.
+        cpy_note.tags = list(note.tags)
         rec.notes.append(cpy_note)
+        self._index_record_note(name, cpy_note)
+        self._changed(self._records, name)
+        self._log('link_note_to_record', name, note.title)
 
     def get_record_notes(self, name: str) -> List[Note]:
         rec = self.get_record(name)
         return rec.notes
     
-    def get_sorted_notes_by_tag(self, tag_name: str) -> List[Note]:
-        notes = self.get_notes_by_tag(tag_name)
-        sorted_notes = sorted(notes, key=lambda note: note.title)
-        return sorted_notes
+    def get_sorted_notes_by_tag(self, tag_name: str, offset: int = 0, limit: int = None) -> List[Note]:
+        # Posting lists are kept ordered by title, a page is just a slice.
+        return [self._notes[title] for title in self._tag_titles(tag_name).slice(offset, limit)]
 
     @staticmethod
-    def create_table_with_notes(notes_list: List[Note]) -> PrettyTable:
+    def create_table_with_notes(notes_list: List[Note]) -> 'PrettyTable':
+        from prettytable import PrettyTable
+
         table = PrettyTable()
         table.field_names = ["Title", "Content", "Tags", "Created", "Last edit"]
 
@@ -176,8 +575,11 @@ class Assistant:
             ])
         return table
 
-    def create_table_with_note_titles(self) -> PrettyTable | None:
-        titles = [note.title for note in self._notes.values()]
+    def create_table_with_note_titles(self) -> 'PrettyTable | None':
+        from prettytable import PrettyTable
+
+        # Titles are the keys, segments of a lazily loaded database stay unread.
+        titles = list(self._notes.keys())
         if titles:
             title_table = PrettyTable()
             title_table.field_names = ["All notes titles"]
@@ -186,16 +588,39 @@ class Assistant:
             return title_table
         return None
 
+    def _new_tag_id(self) -> int:
+        tag_id = self._next_tag_id
+        self._next_tag_id += 1
+        return tag_id
+
     def create_tag(self, name: str) -> None:
-        self._tags[name] = Tag(name)
+        if name in self._tags:
+            return
+
+        tag = Tag(name, self._new_tag_id())
+        self._tags[name] = tag
+        if self._indexed:
+            self._tag_postings[tag.id] = SortedKeys()
+        self._log('create_tag', name)
 
     def delete_tag(self, name: str) -> None:
-        for note in self._notes.values():
-            if self._tags[name] in note.tags:
-                note.tags.remove(self._tags[name])
+        tag = self._tags[name]
+        titles = self._tag_postings.pop(tag.id)
         del self._tags[name]
+        for title in titles:
+            note = self._notes[title]
+            note.tags = [t for t in note.tags if t is not tag]
+            self._changed(self._notes, title)
+        # Copies of notes linked to records lose the tag as well, the same as with the 'sqlite' storage.
+        for rec_name in self._tag_records.pop(tag.id, ()):
+            for note in self._records[rec_name].notes:
+                note.tags = [t for t in note.tags if t.id != tag.id]
+            self._changed(self._records, rec_name)
+        self._log('delete_tag', name)
+
+    def show_tags(self) -> 'PrettyTable | None':
+        from prettytable import PrettyTable
 
-    def show_tags(self) -> PrettyTable | None:
         if not self._tags:
             return None
 
@@ -207,4 +632,11 @@ class Assistant:
             return tag_table
 
     def edit_tag(self, name: str, new_name: str) -> None:
-        self._tags[name].name = new_name
+        # Notes reference the tag object and postings its id, so only the name lookup changes.
+        if new_name != name and new_name in self._tags:
+            raise ValueError(f"Tag '{new_name}' already exists.")
+
+        tag = self._tags.pop(name)
+        tag.name = new_name
+        self._tags[new_name] = tag
+        self._log('edit_tag', name, new_name)
@@ -0,0 +1,45 @@
+from typing import Iterable, TextIO
+
+from src.assistant import Assistant
+from src.cmd_handlers import HandlerResponse, UnknownRecordCommandHandler
+from src.cmd_parser import CommandParser
+
+
+class BatchResult:
+    def __init__(self) -> None:
+        self.executed = 0
+        self.failed = 0
+
+
+def run_batch(lines: Iterable[str], data: Assistant, out: TextIO = None) -> BatchResult:
+    """
+    Execute commands read one per line, e.g. 'add-record --name John --phone 0123456789'.
+    Commands don't prompt the user: every value comes from their arguments. A failed command is reported
+    with its line number and the batch goes on. Empty lines and lines starting with '#' are skipped.
+    All commands run inside a single data batch, so the changes are written out once instead of per command.
+    :param lines: lines of a batch file, a list or any other iterable of strings.
+    :param out: stream for command output and messages, stdout by default.
+    """
+    result = BatchResult()
+
+    with data.batch():
+        for line_no, line in enumerate(lines, start=1):
+            cmd = line.strip()
+            if not cmd or cmd.startswith('#'):
+                continue
+
+            handler = CommandParser.parse(cmd, data, interactive=False, out=out)
+            response = handler.handle_input()
+            result.executed += 1
+
+            # Handlers report errors as the exception object instead of raising it.
+            if isinstance(response.msg, Exception) or isinstance(handler, UnknownRecordCommandHandler):
+                result.failed += 1
+                print(f"Line {line_no}: {response.msg}", file=out)
+            elif response.msg:
+                print(response.msg, file=out)
+
+            if response.status == HandlerResponse.Status.FINISH:
+                break
+
+    return result
@@ -3,11 +3,15 @@ import textwrap
 from abc import ABC, abstractmethod
 from datetime import datetime
 from enum import Enum
-
-from prettytable import PrettyTable
+from typing import TYPE_CHECKING, List, TextIO, Tuple
 
 from src.assistant import Assistant
+from src.commands import command, commands
 from src.fields import Name, Phone, Address, Email, Birthday
+from src.table_stream import StreamingTable
+
+if TYPE_CHECKING:
+    from prettytable import PrettyTable
 
 
 class HandlerResponse:
@@ -29,79 +33,105 @@ class HandlerResponse:
 
 
 class BaseCommandHandler(ABC):
-    def __init__(self, data: Assistant = None) -> None:
+    def __init__(self, data: Assistant = None, args: List[str] = None, interactive: bool = True,
+                 out: TextIO = None) -> None:
+        """
+        :param args: command arguments, e.g. ['--name', 'John', '--phone', '0123456789'].
+        :param interactive: ask the user for values missing in args. Batch commands are not interactive.
+        :param out: stream the command prints to, stdout by default. The server gives every request its own.
+        """
         super().__init__()
         self._data = data
+        self._args = args or []
+        self._interactive = interactive
+        self._out = out
+
+    def _ask(self, name: str, prompt: str, default: str = None) -> str:
+        """
+        Value of the '--name' argument, otherwise the user is asked for it.
+        When not interactive a missing argument falls back to the default or is an error.
+        """
+        value = self._option(name)
+        if value is not None:
+            return value
+        if self._interactive:
+            return input(prompt)
+        if default is not None:
+            return default
+        raise ValueError(f"Missing --{name} argument.")
+
+    def _options(self, name: str) -> List[str]:
+        """All values of a repeatable '--name value' argument."""
+        flag = f'--{name}'
+        values = []
+        for idx, arg in enumerate(self._args):
+            if arg == flag and idx + 1 < len(self._args):
+                values.append(self._args[idx + 1])
+            elif arg.startswith(flag + '='):
+                values.append(arg[len(flag) + 1:])
+        return values
+
+    def _option(self, name: str, default=None):
+        """
+        Value of a '--name value' or '--name=value' command argument.
+        :return: the value or default if the argument wasn't passed.
+        """
+        flag = f'--{name}'
+        for idx, arg in enumerate(self._args):
+            if arg == flag and idx + 1 < len(self._args):
+                return self._args[idx + 1]
+            if arg.startswith(flag + '='):
+                return arg[len(flag) + 1:]
+        return default
 
     @abstractmethod
     def handle_input(self) -> HandlerResponse:
         return HandlerResponse(HandlerResponse.Status.CONTINUE, f"'{self.handle_input.__qualname__}' not implemented.")
 
 
+@command('help', query=True)
 class HelpCommandHandler(BaseCommandHandler):
-    __commands = {
-        'add-record': 'Adds new record. The name and phone are necessary parameters.',
-        'remove-record': 'Remove contact from the address book.',
-        'edit-record': 'Edit record properties. User should enter the name of the field for editing: name, address, phone, birthday, note',
-        'show-record': 'Search record by a specific criteria: name/phone/email.',
-        'show-all-records': 'Display all existing records.',
-        'add-phone': 'Adds additional phone number for the specified user.',
-        'remove-phone': "Remove input phone for the contact from list.",
-        'show-upcoming-bdays': 'Output upcoming birthday for the next week.',
-        'show-record-notes': 'Displays list of notes of a specified contact.',
-        'create-tag': 'Create new tag.',
-        'delete-tag': 'Remove tag.',
-        'edit-tag': 'Edits the title of a tag.',
-        'show-tags': 'Displays the list of all tags.',
-        'link-tag': 'Links tag to the specified notes.',
-        'add-note': 'Adds new note.',
-        'edit-note': 'Edit notes title or content.',
-        'remove-note': 'Remove note.',
-        'show-note': 'Show single note.',
-        'show-notes': 'Show all notes.',
-        'find-notes-by-date': 'Find notes by period of dates',
-        'find-notes-by-word-in-title': 'Find notes by title',
-        'find-notes-by-tag': 'Find notes by tag',
-        'link-note': 'Links note to the specified record.',
-        'sort-notes-by-tag': 'Sorts notes by input tag.'
-    }
-
     def handle_input(self) -> HandlerResponse:
         self.__display_commands()
         return HandlerResponse(HandlerResponse.Status.CONTINUE)
 
     def __display_commands(self) -> None:
-        for cmd, description in self.__commands.items():
-            print(f"{cmd:<20} - {textwrap.fill(description, width=60, subsequent_indent=' ' * 23)}")
+        for spec in commands():
+            if spec.help:
+                print(f"{spec.name:<20} - {textwrap.fill(spec.help, width=60, subsequent_indent=' ' * 23)}",
+                      file=self._out)
 
 
+@command('exit', aliases=('close',), query=True)
 class ExitCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         return HandlerResponse(HandlerResponse.Status.FINISH)
 
 
+@command('add-record', args=('name', 'phone', 'email', 'address', 'birthday'),
+         help='Adds new record. The name and phone are necessary parameters.')
 class AddRecordCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            name = Name(input('Enter the name: '))
+            name = Name(self._ask('name', 'Enter the name: '))
 
             if self._data.record_exists(str(name)):
                 warn_msg = "Contact already exists."
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, warn_msg)
 
-            phone = Phone(input('Enter the phone: '))
+            phone = Phone(self._ask('phone', 'Enter the phone: '))
 
             if self._data.phone_exists(str(phone)):
                 warn_msg = f"{phone} already exists in book."
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, warn_msg)
 
-            email = input('Enter the email: ').strip().lower()
+            email = self._ask('email', 'Enter the email: ', '').strip().lower()
             email = Email(email) if email else None
 
-            address = input('Enter the address: ').strip().lower()
+            address = self._ask('address', 'Enter the address: ', '').strip().lower()
             address = Address(address) if address else None
 
-            birthday = input('Enter the birthday (DD.MM.YYYY): ').strip()
+            birthday = self._ask('birthday', 'Enter the birthday (DD.MM.YYYY): ', '').strip()
             birthday = Birthday(birthday) if birthday else None
 
             self._data.add_record(name, phone, email, address, birthday)
@@ -112,21 +142,24 @@ class AddRecordCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('edit-record', args=('name', 'field', 'old-phone', 'new-phone', 'value'),
+         help='Edit record properties. User should enter the name of the field for editing: name, address, '
+              'phone, birthday, note')
 class EditRecordCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            name = input('Enter contact name to edit: ')
+            name = self._ask('name', 'Enter contact name to edit: ')
 
             if not self._data.record_exists(name):
                 warn_msg = f"{name} contact does not exist."
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, warn_msg)
 
-            edit_field = input(
-                'What field would you like to edit? (Name, Phone, Address, Email, Birthday): ').strip().lower()
+            edit_field = self._ask(
+                'field', 'What field would you like to edit? (Name, Phone, Address, Email, Birthday): ').strip().lower()
 
             if edit_field == 'phone':
-                old_phone = input('Enter phone to edit: ')
-                new_phone = input('Enter new phone value: ')
+                old_phone = self._ask('old-phone', 'Enter phone to edit: ')
+                new_phone = self._ask('new-phone', 'Enter new phone value: ')
 
                 if self._data.phone_exists(old_phone):
                     self._data.edit_record_phone(name, old_phone, new_phone)
@@ -135,7 +168,7 @@ class EditRecordCommandHandler(BaseCommandHandler):
                 else:
                     return HandlerResponse(HandlerResponse.Status.CONTINUE, f"'{old_phone}' wasn't found.")
             else:
-                new_val = input(f"Enter value for the '{edit_field}' field: ").strip()
+                new_val = self._ask('value', f"Enter value for the '{edit_field}' field: ").strip()
 
                 match edit_field:
                     case 'name':
@@ -155,10 +188,11 @@ class EditRecordCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('remove-record', args=('name',), help='Remove contact from the address book.')
 class RemoveRecordCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            remove_name = input('Enter the name of a contact to be removed: ')
+            remove_name = self._ask('name', 'Enter the name of a contact to be removed: ')
 
             if self._data.record_exists(remove_name):
                 self._data.remove_record(remove_name)
@@ -169,33 +203,52 @@ class RemoveRecordCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
-class ShowAllRecordsCommandHandler(BaseCommandHandler):
-    def handle_input(self) -> HandlerResponse:
-        try:
-            table = PrettyTable()
-            table.field_names = ["Name", "Phones", "Email", "Address", "Birtday"]
+class PagedOutputMixin:
+    """Arguments: --page N (show only this page), --limit M (rows per page, 20 by default), --pager (ask between pages)."""
+
+    def _page_options(self) -> Tuple[int | None, int, bool]:
+        page = self._option('page')
+        page = int(page) if page is not None else None
+        limit = int(self._option('limit', 20))
+        if limit < 1 or (page is not None and page < 1):
+            raise ValueError("Page and limit must be positive numbers.")
+        return page, limit, '--pager' in self._args and self._interactive
 
-            for rec in self._data.get_records():
-                table.add_row([
-                    rec.name,
-                    "\n".join(str(phone) if phone else '-' for phone in rec.phones),
-                    rec.email or '-',
-                    rec.address or '-',
-                    str(rec.birthday) or '-'
-                ])
 
-            print(table)
+@command('show-all-records', args=('page', 'limit'), flags=('pager',), query=True,
+         help='Display all existing records page by page. Accepts --page N, --limit M and --pager.')
+class ShowAllRecordsCommandHandler(PagedOutputMixin, BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            page, limit, pager = self._page_options()
+            offset = (page - 1) * limit if page else 0
+
+            table = StreamingTable([("Name", 20), ("Phones", 10), ("Email", 25), ("Address", 25), ("Birthday", 10)],
+                                   self._out)
+            rows = ([
+                rec.name,
+                "\n".join(str(phone) if phone else '-' for phone in rec.phones),
+                rec.email or '-',
+                rec.address or '-',
+                str(rec.birthday) if rec.birthday else '-'
+            ] for rec in self._data.iter_records(offset, limit if page else None))
+
+            if not table.render(rows, page=page, limit=limit, pager=pager, total=self._data.count_records()):
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "There are no records to show.")
             return HandlerResponse(HandlerResponse.Status.CONTINUE)
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('show-record', args=('name',), help='Search record by a specific criteria: name/phone/email.', query=True)
 class SearchRecordCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            search = input('Enter name to search for: ')
+            search = self._ask('name', 'Enter name to search for: ')
             record = self._data.get_record(search)
 
+            from prettytable import PrettyTable
+
             table = PrettyTable()
             table.field_names = ["Name", "Phones", "Email", "Address", "Birthday"]
 
@@ -208,16 +261,175 @@ class SearchRecordCommandHandler(BaseCommandHandler):
                     str(record.birthday) or '-'
                 ])
 
-            print(table)
+            print(table, file=self._out)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+def records_table(records: List) -> 'PrettyTable':
+    from prettytable import PrettyTable
+
+    table = PrettyTable()
+    table.field_names = ["Name", "Phones", "Email", "Address", "Birthday"]
+    for record in records:
+        table.add_row([
+            record.name,
+            "\n".join(str(phone) for phone in record.phones),
+            record.email or '-',
+            record.address or '-',
+            str(record.birthday) if record.birthday else '-'
+        ])
+    return table
+
+
+@command('search-records', args=('query', 'limit'), query=True,
+         help='Search contacts by the beginning of the name or a misspelled name. Accepts --limit N.')
+class SearchRecordsCommandHandler(BaseCommandHandler):
+    """Arguments: --limit N (10 by default)."""
+
+    def handle_input(self) -> HandlerResponse:
+        try:
+            query = self._ask('query', 'Enter the beginning of the name or the name as you remember it: ').strip()
+            records = self._data.search_records(query, int(self._option('limit', 10)))
+
+            if not records:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, f"No contacts similar to '{query}'.")
+
+            print(records_table(records), file=self._out)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('find-by-phone', args=('phone',), help='Search contacts that have the specified phone.', query=True)
+class FindRecordsByPhoneCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            phone = self._ask('phone', 'Enter phone to search for: ').strip()
+            records = self._data.find_records_by_phone(phone)
+
+            if not records:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, f"No contacts with '{phone}' phone.")
+
+            print(records_table(records), file=self._out)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('find-records-by-domain', args=('domain',), query=True,
+         help='Search contacts whose email is at the domain, e.g. --domain gmail.com.')
+class FindRecordsByDomainCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            domain = self._ask('domain', 'Enter email domain, e.g. gmail.com: ').strip()
+            records = self._data.find_records_by_email_domain(domain)
+            if not records:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, f"No contacts with emails at '{domain}'.")
+
+            print(records_table(records), file=self._out)
             return HandlerResponse(HandlerResponse.Status.CONTINUE)
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('find-records-born-between', args=('start', 'end'), query=True,
+         help='Search contacts born in a period of dates (YYYY-MM-DD), oldest first.')
+class FindRecordsBornBetweenCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            start_date_str = self._ask('start', "Enter start date in format YYYY-MM-DD: ")
+            start_date_obj = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            end_date_str = self._ask('end', "Enter end date in format YYYY-MM-DD: ")
+            end_date_obj = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+            records = self._data.find_records_born_between(start_date_obj, end_date_obj)
+            if not records:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "No contacts born in such date period.")
+
+            print(records_table(records), file=self._out)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('show-duplicate-phones', help='Show phones shared by several contacts.', query=True)
+class ShowDuplicatePhonesCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            duplicates = self._data.get_duplicate_phones()
+            if not duplicates:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "No phones are shared by several contacts.")
+
+            from prettytable import PrettyTable
+
+            table = PrettyTable()
+            table.field_names = ["Phone", "Contacts"]
+            for phone, names in duplicates:
+                table.add_row([phone, "\n".join(names)])
+            print(table, file=self._out)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('import', args=('file', 'format', 'rejects', 'workers'), local=True,
+         help='Import contacts from a CSV, JSON Lines or vCard file. Accepts --file PATH, --format, --rejects '
+              'PATH and --workers N.')
+class ImportContactsCommandHandler(BaseCommandHandler):
+    """
+    Arguments: --file PATH, --format csv|jsonl|vcard (by the file extension by default), --rejects PATH,
+    --workers N (processes validating the file in parallel, 1 by default).
+    """
+
+    def handle_input(self) -> HandlerResponse:
+        try:
+            # Imported with the first import, it brings in the process pool machinery.
+            from src.importer import import_contacts
+
+            filename = self._ask('file', 'Enter the file to import (.csv, .jsonl or .vcf): ').strip()
+            workers = int(self._option('workers', 1))
+            result = import_contacts(self._data, filename, self._option('format'), self._option('rejects'),
+                                     workers=workers)
+
+            msg = f"Imported {result.imported} contacts."
+            if result.rejected:
+                msg += f" {result.rejected} rejected, see '{result.rejects_filename}'."
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, msg)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('export', args=('file', 'type', 'format', 'tag', 'start', 'end'), local=True, query=True,
+         help='Export records or notes (--type notes) to a CSV, JSON Lines or vCard file. Accepts --file PATH, '
+              '--format, --tag NAME, --start and --end dates (YYYY-MM-DD).')
+class ExportCommandHandler(BaseCommandHandler):
+    """
+    Arguments: --file PATH, --type records|notes (records by default), --format csv|jsonl|vcard,
+    --tag NAME, --start YYYY-MM-DD, --end YYYY-MM-DD.
+    """
+
+    def handle_input(self) -> HandlerResponse:
+        try:
+            from src.exporter import export_data
+
+            filename = self._ask('file', 'Enter the file to export to (.csv, .jsonl or .vcf): ').strip()
+            start, end = self._option('start'), self._option('end')
+            start = datetime.strptime(start, "%Y-%m-%d").date() if start else None
+            end = datetime.strptime(end, "%Y-%m-%d").date() if end else None
+            kind = self._option('type', 'records')
+
+            count = export_data(self._data, filename, kind, self._option('format'), self._option('tag'), start, end)
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, f"Exported {count} {kind} to '{filename}'.")
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('create-tag', args=('tag',), help='Create new tag.')
 class CreateTagCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            tag = input('Enter the tag name: ')
+            tag = self._ask('tag', 'Enter the tag name: ')
 
             if self._data.tag_exists(tag):
                 warn_msg = "Tag already exists."
@@ -229,10 +441,11 @@ class CreateTagCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('delete-tag', args=('tag',), help='Remove tag.')
 class DeleteTagCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            tag = input('Enter the tag name that should be removed: ')
+            tag = self._ask('tag', 'Enter the tag name that should be removed: ')
 
             if not self._data.tag_exists(tag):
                 warn_msg = "Tag does not exists."
@@ -244,25 +457,27 @@ class DeleteTagCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('show-tags', help='Displays the list of all tags.', query=True)
 class ShowAllTagsCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
             tag_table = self._data.show_tags()
             if tag_table:
-                print(tag_table)
+                print(tag_table, file=self._out)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE)
             return HandlerResponse(HandlerResponse.Status.CONTINUE, "No tags found.")
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('edit-tag', args=('tag', 'new-name'), help='Edits the title of a tag.')
 class EditTagCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            tag = input('Enter tag for editing: ')
+            tag = self._ask('tag', 'Enter tag for editing: ')
 
             if self._data.tag_exists(tag):
-                new_tag_title = input('Enter new title for tag:')
+                new_tag_title = self._ask('new-name', 'Enter new title for tag:')
                 self._data.edit_tag(tag, new_tag_title)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE,
                                        f"Tag '{tag}' name was changed to '{new_tag_title}'.")
@@ -283,13 +498,25 @@ class UnknownRecordCommandHandler(BaseCommandHandler):
         return HandlerResponse(HandlerResponse.Status.CONTINUE, f"Unknown '{self.__cmd}' input command.")
 
 
+class InvalidArgumentsCommandHandler(BaseCommandHandler):
+    """Handler for a known command with arguments it doesn't accept, or that the user isn't allowed to run."""
+
+    def __init__(self, error: Exception) -> None:
+        super().__init__()
+        self.__error = error
+
+    def handle_input(self) -> HandlerResponse:
+        return HandlerResponse(HandlerResponse.Status.CONTINUE, self.__error)
+
+
+@command('add-phone', args=('name', 'phone'), help='Adds additional phone number for the specified user.')
 class AddPhoneCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            name = input('Enter contact name: ')
+            name = self._ask('name', 'Enter contact name: ')
 
             if self._data.record_exists(name):
-                phone = input('Enter phone: ')
+                phone = self._ask('phone', 'Enter phone: ')
 
                 self._data.add_phone(name, phone)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE,
@@ -300,15 +527,16 @@ class AddPhoneCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('remove-phone', args=('name', 'phone'), help='Remove input phone for the contact from list.')
 class RemovePhoneCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            name = input('Enter the contact name: ')
+            name = self._ask('name', 'Enter the contact name: ')
 
             if not self._data.record_exists(name):
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, f"{name} does not exist.")
 
-            phone = input('Enter the phone to be removed: ')
+            phone = self._ask('phone', 'Enter the phone to be removed: ')
 
             if not self._data.phone_exists(phone):
                 return HandlerResponse(HandlerResponse.Status.CONTINUE,
@@ -320,45 +548,63 @@ class RemovePhoneCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('show-upcoming-bdays', args=('days',), query=True,
+         help='Output upcoming birthdays for the next week or any number of days.')
 class ShowUpcomingBirthdayRecordsCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
+            days = self._ask('days', 'Enter the number of days to look ahead (default 7): ', '').strip()
+            days = int(days) if days else 7
+            if days < 0:
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "Number of days can't be negative.")
+
+            from prettytable import PrettyTable
+
             table = PrettyTable()
             table.field_names = ["Name", "Congratulation date"]
 
-            for name, bday in self._data.get_records_with_upcoming_birthday():
+            for name, bday in self._data.get_records_with_upcoming_birthday(days):
                 table.add_row([name, str(bday)])
 
-            print(table)
+            print(table, file=self._out)
             return HandlerResponse(HandlerResponse.Status.CONTINUE)
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('add-note', args=('title', 'content', 'add-tag', 'tag', 'create-tag'), help='Adds new note.')
 class CreateNoteCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            title = input("Enter the title: ")
+            title = self._ask('title', "Enter the title: ")
             if self._data.note_exists(str(title)):
                 warn_msg = f"Note with {title} already exists."
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, warn_msg)
 
-            print("Enter/Paste your content. Press Ctrl-D (or Ctrl-Z in Windows) to save it.")
-            body = sys.stdin.readlines()
-            body = "".join(body).rstrip()
+            body = self._option('content')
+            if body is None:
+                if not self._interactive:
+                    raise ValueError("Missing --content argument.")
+                print("Enter/Paste your content. Press Ctrl-D (or Ctrl-Z in Windows) to save it.", file=self._out)
+                body = sys.stdin.readlines()
+                body = "".join(body).rstrip()
 
             self._data.add_note(title, body)
 
-            choice = input("Would you like to add any tag? (y/n): ").strip().lower()
+            if self._option('tag') is not None:
+                choice = 'y'
+            else:
+                choice = self._ask('add-tag', "Would you like to add any tag? (y/n): ", 'n').strip().lower()
 
             if choice == 'y':
-                tag = input('Enter the tag: ')
+                tag = self._ask('tag', 'Enter the tag: ')
 
                 if tag:
                     if self._data.tag_exists(tag):
                         self._data.add_tag_to_note(title, tag)
                     else:
-                        create_tag = input(f"Tag '{tag}' does not exist. Would you like to create one? (y/n): ")
+                        create_tag = self._ask(
+                            'create-tag', f"Tag '{tag}' does not exist. Would you like to create one? (y/n): ", 'n')
                         if create_tag == 'y':
                             self._data.create_tag(tag)
                             self._data.add_tag_to_note(title, tag)
@@ -367,17 +613,18 @@ class CreateNoteCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('find-notes-by-date', args=('start', 'end'), help='Find notes by period of dates', query=True)
 class FindNotesByDateCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            start_date_str = input("Enter start date to search for notes in format YYYY-MM-DD: ")
+            start_date_str = self._ask('start', "Enter start date to search for notes in format YYYY-MM-DD: ")
             start_date_obj = datetime.strptime(start_date_str, "%Y-%m-%d").date()
-            end_date_str = input("Enter end date to search for notes in format YYYY-MM-DD: ")
+            end_date_str = self._ask('end', "Enter end date to search for notes in format YYYY-MM-DD: ")
             end_date_object = datetime.strptime(end_date_str, "%Y-%m-%d").date()
             notes_list = self._data.get_notes_by_period_of_dates(start_date_obj, end_date_object)
             if notes_list:
                 table = self._data.create_table_with_notes(notes_list)
-                print(table)
+                print(table, file=self._out)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE)
             return HandlerResponse(
                 HandlerResponse.Status.CONTINUE,
@@ -386,14 +633,36 @@ class FindNotesByDateCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('find-notes-modified-between', args=('start', 'end'), query=True,
+         help='Find notes last edited in a period of dates')
+class FindNotesModifiedBetweenCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            start_date_str = self._ask('start', "Enter start date to search for edited notes in format YYYY-MM-DD: ")
+            start_date_obj = datetime.strptime(start_date_str, "%Y-%m-%d").date()
+            end_date_str = self._ask('end', "Enter end date to search for edited notes in format YYYY-MM-DD: ")
+            end_date_object = datetime.strptime(end_date_str, "%Y-%m-%d").date()
+            notes_list = self._data.get_notes_modified_between(start_date_obj, end_date_object)
+            if notes_list:
+                table = self._data.create_table_with_notes(notes_list)
+                print(table, file=self._out)
+                return HandlerResponse(HandlerResponse.Status.CONTINUE)
+            return HandlerResponse(
+                HandlerResponse.Status.CONTINUE,
+                "There are no notes edited in such date period. Try again with another period.")
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('find-notes-by-word-in-title', args=('word',), help='Find notes by title', query=True)
 class FindNotesByTitleCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            word = input("Enter word to search for notes that include it in title: ")
+            word = self._ask('word', "Enter word to search for notes that include it in title: ")
             notes_list = self._data.get_notes_by_word_in_title(word.lower().strip())
             if notes_list:
                 table = self._data.create_table_with_notes(notes_list)
-                print(table)
+                print(table, file=self._out)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE)
             return HandlerResponse(
                 HandlerResponse.Status.CONTINUE,
@@ -402,74 +671,139 @@ class FindNotesByTitleCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('search-notes', args=('query',), query=True,
+         help='Full-text search in notes titles and content. Words are combined with AND, also supports OR, '
+              'prefix* and "exact phrase".')
+class SearchNotesCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            query = self._ask('query', 'Enter words to search in notes (use OR, prefix* and "exact phrase"): ').strip()
+            notes_list = self._data.search_notes(query)
+            if notes_list:
+                table = self._data.create_table_with_notes(notes_list)
+                print(table, file=self._out)
+                return HandlerResponse(HandlerResponse.Status.CONTINUE)
+            return HandlerResponse(
+                HandlerResponse.Status.CONTINUE,
+                "There are no notes matching the query. Try again with other words.")
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('find-notes-by-tag', args=('tag',), help='Find notes by tag', query=True)
 class FindNotesByTagCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            tag = input("Enter tag to search for notes that have it: ")
+            tag = self._ask('tag', "Enter tag to search for notes that have it: ")
             notes_list = self._data.get_notes_by_tag(tag.lower().strip())
             if notes_list:
                 table = self._data.create_table_with_notes(notes_list)
-                print(table)
+                print(table, file=self._out)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE)
             return HandlerResponse(
                 HandlerResponse.Status.CONTINUE,
                 "There are no notes with this tag. Try again with another tag.")
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
-        
+
+
+@command('find-notes-by-tags', args=('query',), query=True,
+         help='Find notes by several tags combined with AND, OR, NOT')
+class FindNotesByTagsCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        try:
+            query = self._ask('query', "Enter tags combined with AND, OR, NOT (e.g. 'work AND urgent NOT done'): ")
+            notes_list = self._data.find_notes_by_tags(query.strip())
+            if notes_list:
+                table = self._data.create_table_with_notes(notes_list)
+                print(table, file=self._out)
+                return HandlerResponse(HandlerResponse.Status.CONTINUE)
+            return HandlerResponse(
+                HandlerResponse.Status.CONTINUE,
+                "There are no notes matching these tags. Try again with other tags.")
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+@command('sort-notes-by-tag', args=('tag', 'page', 'size'), query=True,
+         help='Sorts notes by input tag. Accepts --tag NAME, --page N and --size M arguments.')
 class SortNotesByTagCommandHandler(BaseCommandHandler):
+    """
+    Arguments: --tag NAME, --page N (show only this page), --size M (notes per page, 20 by default).
+    Without --page the pages are shown one by one.
+    """
+
     def handle_input(self) -> HandlerResponse:
         try:
-            tag_name = input('Enter tag name to sort related notes: ')
+            tag_name = self._ask('tag', 'Enter tag name to sort related notes: ')
 
-            if self._data.tag_exists(tag_name):
-                sorted_notes = self._data.get_sorted_notes_by_tag(tag_name)
-                print(self._data.create_table_with_notes(sorted_notes))
-                return HandlerResponse(HandlerResponse.Status.CONTINUE, )
+            if not self._data.tag_exists(tag_name):
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, f"Tag '{tag_name}' does not exist.")
 
-            return HandlerResponse(HandlerResponse.Status.CONTINUE, f"Tag '{tag_name}' does not exist.")
+            size = int(self._option('size', 20))
+            page = self._option('page')
+            if size < 1 or (page is not None and int(page) < 1):
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "Page and size must be positive numbers.")
+
+            total = self._data.count_notes_by_tag(tag_name)
+            pages = max(1, -(-total // size))
+
+            for num in ([int(page)] if page is not None else range(1, pages + 1)):
+                notes = self._data.get_sorted_notes_by_tag(tag_name, offset=(num - 1) * size, limit=size)
+                print(self._data.create_table_with_notes(notes), file=self._out)
+                print(f"Page {num} of {pages} ({total} notes)", file=self._out)
+
+                if page is None and num < pages and self._interactive:
+                    if input("Press Enter for the next page or 'q' to stop: ").strip().lower() == 'q':
+                        break
+
+            return HandlerResponse(HandlerResponse.Status.CONTINUE)
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('link-note', args=('title', 'name'), help='Links note to the specified record.')
 class LinkNoteToRecordCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            if self._data.get_notes():
-                print(self._data.create_table_with_note_titles())
-
-                note_title = input('Enter note to be linked: ')
+            if self._data.count_notes():
+                if self._interactive and self._option('title') is None:
+                    print(self._data.create_table_with_note_titles(), file=self._out)
 
                 # Take into account user's mistakes
-                for _ in range(3):
+                for _ in range(3 if self._interactive else 1):
+                    note_title = self._ask('title', 'Enter note to be linked: ')
+
                     if self._data.note_exists(note_title):
-                        rec_name = input("Enter contact you wish to link the note: ")
+                        rec_name = self._ask('name', "Enter contact you wish to link the note: ")
 
                         if self._data.record_exists(rec_name):
                             # Create new object but keeps tags to be 'movable' for dynamic changes.
                             self._data.link_note_to_record(rec_name, note_title)
-                            return HandlerResponse(HandlerResponse.Status,
+                            return HandlerResponse(HandlerResponse.Status.CONTINUE,
                                                    f"Note '{note_title}' was successfull added to the '{rec_name}' contact.")
                         else:
-                            print(f'Skip contanct: {rec_name}. Try again ...')
+                            print(f'Skip contanct: {rec_name}. Try again ...', file=self._out)
                     else:
-                        print(f'Skip note: {note_title}. Try again ...')
+                        print(f'Skip note: {note_title}. Try again ...', file=self._out)
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "Note wasn't linked.")
             else:
-                return HandlerResponse(HandlerResponse.Status, "Note list is empty.")
+                return HandlerResponse(HandlerResponse.Status.CONTINUE, "Note list is empty.")
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('show-record-notes', args=('name',), help='Displays list of notes of a specified contact.', query=True)
 class ShowRecordNotesCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            name = input('Enter contact name: ')
+            name = self._ask('name', 'Enter contact name: ')
 
             if self._data.record_exists(name):
                 notes = self._data.get_record_notes(name)
 
                 if notes:
-                    print(self._data.create_table_with_notes(notes))
+                    print(self._data.create_table_with_notes(notes), file=self._out)
                     return HandlerResponse(HandlerResponse.Status.CONTINUE)
                 else:
                     return HandlerResponse(HandlerResponse.Status.CONTINUE, f"Contact '{name}' has no any note.")
@@ -478,10 +812,11 @@ class ShowRecordNotesCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('edit-note', args=('title', 'field', 'value'), help='Edit notes title or content.')
 class EditNoteCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            title = input('Choose title to edit: ')
+            title = self._ask('title', 'Choose title to edit: ')
 
             if not self._data.note_exists(title):
                 warn_msg = (f"{title} note does not exist. "
@@ -489,10 +824,9 @@ class EditNoteCommandHandler(BaseCommandHandler):
                             f"like find-notes-by-date or find-notes-by-word-in-title.")
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, warn_msg)
 
-            edit_field = input(
-                'What field would you like to edit? (Title, Content): ').strip().lower()
+            edit_field = self._ask('field', 'What field would you like to edit? (Title, Content): ').strip().lower()
 
-            new_val = input(f"Enter value for the '{edit_field}' field: ").strip()
+            new_val = self._ask('value', f"Enter value for the '{edit_field}' field: ").strip()
 
             match edit_field:
                 case 'title':
@@ -508,10 +842,11 @@ class EditNoteCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('remove-note', args=('title',), help='Remove note.')
 class RemoveNoteCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            remove_title = input('Enter the title of a note to be removed: ')
+            remove_title = self._ask('title', 'Enter the title of a note to be removed: ')
 
             if self._data.note_exists(remove_title):
                 self._data.remove_note(remove_title)
@@ -522,24 +857,30 @@ class RemoveNoteCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('link-tag', args=('tag', 'note'), help='Links tag to the specified notes.')
 class LinkTagToNotesCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            tag = input('Enter tag name: ')
+            tag = self._ask('tag', 'Enter tag name: ')
 
             if self._data.tag_exists(tag):
-                print("Enter notes you'd like tag to be linked. Press Ctrl-D (or Ctrl-Z in Windows) to save it.")
-                notes = [line.strip() for line in sys.stdin]
+                notes = self._options('note')
+                if not notes:
+                    if not self._interactive:
+                        raise ValueError("Missing --note argument.")
+                    print("Enter notes you'd like tag to be linked. Press Ctrl-D (or Ctrl-Z in Windows) to save it.",
+                          file=self._out)
+                    notes = [line.strip() for line in sys.stdin]
 
                 for note_title in notes:
                     note = self._data.get_note(note_title)
                     if note:
                         if tag in note.tags:
-                            print(f"'{tag}' already linked.")
+                            print(f"'{tag}' already linked.", file=self._out)
                         else:
                             self._data.add_tag_to_note(note_title, tag)
                     else:
-                        print(f"'{note}' skipped.")
+                        print(f"'{note}' skipped.", file=self._out)
                 return HandlerResponse(HandlerResponse.Status.CONTINUE,
                                        f"Tag '{tag}' was successfully linked to the specified notes.")
             else:
@@ -548,15 +889,16 @@ class LinkTagToNotesCommandHandler(BaseCommandHandler):
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
+@command('show-note', args=('title',), help='Show single note.', query=True)
 class DisplayNoteCommandHandler(BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            if not self._data.get_notes():
+            if not self._data.count_notes():
                 return HandlerResponse(HandlerResponse.Status.CONTINUE, "There are no notes in notebook.")
-            else:
-                print(self._data.create_table_with_note_titles())
+            elif self._interactive and self._option('title') is None:
+                print(self._data.create_table_with_note_titles(), file=self._out)
 
-            title = input('Choose title from the table above: ')
+            title = self._ask('title', 'Choose title from the table above: ')
 
             if not self._data.note_exists(title):
                 warn_msg = f"{title} note does not exist. "
@@ -564,20 +906,32 @@ class DisplayNoteCommandHandler(BaseCommandHandler):
 
             note = self._data.get_note(title)
             table = self._data.create_table_with_notes([note])
-            print(table)
+            print(table, file=self._out)
             return HandlerResponse(HandlerResponse.Status.CONTINUE)
 
         except Exception as e:
             return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
 
 
-class DisplayAllNotesCommandHandler(BaseCommandHandler):
+@command('show-notes', args=('page', 'limit'), flags=('pager',), query=True,
+         help='Show all notes page by page. Accepts --page N, --limit M and --pager.')
+class DisplayAllNotesCommandHandler(PagedOutputMixin, BaseCommandHandler):
     def handle_input(self) -> HandlerResponse:
         try:
-            notes = self._data.get_notes()
-            if notes:
-                table = self._data.create_table_with_notes(notes)
-                print(table)
+            page, limit, pager = self._page_options()
+            offset = (page - 1) * limit if page else 0
+
+            table = StreamingTable([("Title", 20), ("Content", 50), ("Tags", 15), ("Created", 16), ("Last edit", 16)],
+                                   self._out)
+            rows = ([
+                note.title,
+                note.content,
+                ",".join([str(n) for n in note.tags]),
+                note.created_at.strftime('%Y-%m-%d %H:%M'),
+                note.modified_at.strftime('%Y-%m-%d %H:%M') if note.modified_at else '-',
+            ] for note in self._data.iter_notes(offset, limit if page else None))
+
+            if table.render(rows, page=page, limit=limit, pager=pager, total=self._data.count_notes()):
                 return HandlerResponse(HandlerResponse.Status.CONTINUE)
             return HandlerResponse(HandlerResponse.Status.CONTINUE, "There are no notes in the notebook.")
 
@@ -1,63 +1,41 @@
-import src.cmd_handlers as handlers
-from src.assistant import Assistant
+import shlex
+from typing import TYPE_CHECKING, TextIO
+
+from src import commands
+
+if TYPE_CHECKING:
+    from src.assistant import Assistant
+    from src.cmd_handlers import BaseCommandHandler
+
 
 class CommandParser:
-    """Factory method for input commands."""
+    """Factory method for input commands, see src.commands for the commands it knows."""
 
     @staticmethod
-    def parse(cmd: str, data: Assistant) -> handlers.BaseCommandHandler:
-        match cmd:
-            case 'help':
-                return handlers.HelpCommandHandler(data)
-            case 'add-record':
-                return handlers.AddRecordCommandHandler(data)
-            case 'edit-record':
-                return handlers.EditRecordCommandHandler(data)
-            case 'remove-record':
-                return handlers.RemoveRecordCommandHandler(data)
-            case 'show-record':
-                return handlers.SearchRecordCommandHandler(data)
-            case 'show-all-records':
-                return handlers.ShowAllRecordsCommandHandler(data)
-            case 'add-phone':
-                return handlers.AddPhoneCommandHandler(data)
-            case 'remove-phone':
-                return handlers.RemovePhoneCommandHandler(data)
-            case 'show-upcoming-bdays':
-                return handlers.ShowUpcomingBirthdayRecordsCommandHandler(data)
-            case 'show-record-notes':
-                return handlers.ShowRecordNotesCommandHandler(data)
-            case 'create-tag':
-                return handlers.CreateTagCommandHandler(data)
-            case 'delete-tag':
-                return handlers.DeleteTagCommandHandler(data)
-            case 'edit-tag':
-                return handlers.EditTagCommandHandler(data)
-            case 'show-tags':
-                return handlers.ShowAllTagsCommandHandler(data)
-            case 'link-tag':
-                return handlers.LinkTagToNotesCommandHandler(data)
-            case 'add-note':
-                return handlers.CreateNoteCommandHandler(data)
-            case 'edit-note':
-                return handlers.EditNoteCommandHandler(data)
-            case 'remove-note':
-                return handlers.RemoveNoteCommandHandler(data)
-            case 'show-note':
-                return handlers.DisplayNoteCommandHandler(data)
-            case 'show-notes':
-                return handlers.DisplayAllNotesCommandHandler(data)
-            case 'find-notes-by-date':
-                return handlers.FindNotesByDateCommandHandler(data)
-            case 'find-notes-by-word-in-title':
-                return handlers.FindNotesByTitleCommandHandler(data)
-            case 'find-notes-by-tag':
-                return handlers.FindNotesByTagCommandHandler(data)
-            case 'sort-notes-by-tag':
-                return handlers.SortNotesByTagCommandHandler(data)
-            case 'link-note':
-                return handlers.LinkNoteToRecordCommandHandler(data)
-            case 'exit' | 'close':
-                return handlers.ExitCommandHandler(data)
-            case _:
-                return handlers.UnknownRecordCommandHandler(cmd)
\ No newline at end of file
+    def parse(cmd: str, data: 'Assistant', interactive: bool = True, out: TextIO = None,
+              remote: bool = False) -> 'BaseCommandHandler':
+        """
+        :param cmd: command name optionally followed by arguments, e.g. 'sort-notes-by-tag --page 2 --size 20'.
+        :param interactive: False when commands come from a batch file and must not prompt the user.
+        :param out: stream the command prints to, stdout by default.
+        :param remote: the command comes from a network client, commands working with local files are refused.
+        """
+        try:
+            name, *args = shlex.split(cmd) or ['']
+        except ValueError:  # unbalanced quotes
+            name, *args = cmd.split() or ['']
+
+        spec = commands.lookup(name)
+        if spec is None:
+            from src.cmd_handlers import UnknownRecordCommandHandler
+            return UnknownRecordCommandHandler(cmd)
+
+        try:
+            spec.check_args(args)
+            if remote and spec.local:
+                raise PermissionError(f"'{spec.name}' works with files of the server, network clients can't run it.")
+        except (ValueError, PermissionError) as e:
+            from src.cmd_handlers import InvalidArgumentsCommandHandler
+            return InvalidArgumentsCommandHandler(e)
+
+        return spec.handler(data, args, interactive, out)
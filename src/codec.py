@@ -0,0 +1,163 @@
+"""
+Encoding of data file blocks: optional compression followed by optional authenticated encryption.
+
+Encryption uses hashlib primitives only, so no extra dependency is needed: the key is derived from
+the user's password with scrypt, a block is XORed with a SHAKE-256 keystream of the key and a random
+nonce and authenticated with HMAC-SHA256 over the nonce and the ciphertext (encrypt-then-MAC).
+An encoded block is ``nonce | ciphertext | tag``.
+
+The tag can also cover associated data that isn't stored in the block, e.g. its position in the file, so a block
+moved to another place or copied from another file is rejected. Unencrypted parts of a file, such as the
+descriptor needed to derive the key, are authenticated with sign() and verify().
+"""
+import hashlib
+import hmac
+import json
+import lzma
+import os
+import zlib
+from typing import Any, Callable, Dict, Tuple
+
+from src.exceptions import DataFileError
+
+CIPHER = 'shake256-hmac-sha256'
+KDF = {'name': 'scrypt', 'n': 2 ** 14, 'r': 8, 'p': 1}
+
+_NONCE_SIZE = 16
+_TAG_SIZE = 32
+
+# name -> (compress, decompress)
+COMPRESSIONS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    'none': (bytes, bytes),
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, format=lzma.FORMAT_XZ, check=lzma.CHECK_NONE), lzma.decompress),
+}
+
+
+def derive_key(password: str, salt: bytes, kdf: Dict[str, Any] = None) -> bytes:
+    """:return: 64 bytes, the encryption key followed by the authentication key."""
+    kdf = kdf or KDF
+    if kdf['name'] != 'scrypt':
+        raise DataFileError(f"Unknown key derivation '{kdf['name']}'.")
+    return hashlib.scrypt(password.encode(), salt=salt, n=kdf['n'], r=kdf['r'], p=kdf['p'], dklen=64,
+                          maxmem=256 * kdf['n'] * kdf['r'] * kdf['p'])
+
+
+def dump_descriptor(descriptor: Dict[str, Any]) -> bytes:
+    """Descriptor as JSON: it is read before the key is known, so before it can be authenticated."""
+    if descriptor.get('salt') is not None:
+        descriptor = dict(descriptor, salt=descriptor['salt'].hex())
+    return json.dumps(descriptor).encode()
+
+
+def load_descriptor(data: bytes) -> Dict[str, Any]:
+    try:
+        descriptor = json.loads(data)
+        if descriptor.get('salt') is not None:
+            descriptor['salt'] = bytes.fromhex(descriptor['salt'])
+        return descriptor
+    except (ValueError, TypeError, AttributeError) as e:
+        raise DataFileError(f"Data file is damaged: {e}") from e
+
+
+class Codec:
+    def __init__(self, compression: str = 'none', key: bytes = None, salt: bytes = None, kdf: Dict[str, Any] = None):
+        """
+        :param compression: one of COMPRESSIONS.
+        :param key: result of derive_key, None stores blocks unencrypted.
+        :param salt: salt and kdf the key was derived with, written to the file to derive it again.
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}'. Use one of: {', '.join(COMPRESSIONS)}")
+        self.compression = compression
+        self._compress, self._decompress = COMPRESSIONS[compression]
+        self._key = key
+        self._salt = salt
+        self._kdf = kdf or KDF
+        # Separate from the key of block tags, a signature is never a valid block tag.
+        self._sign_key = hmac.digest(key[32:], b'sign', 'sha256') if key is not None else None
+
+    @classmethod
+    def from_password(cls, password: str | None, compression: str = 'none') -> 'Codec':
+        """New codec with a fresh salt, unencrypted if there is no password."""
+        if not password:
+            return cls(compression)
+        salt = os.urandom(16)
+        return cls(compression, derive_key(password, salt), salt)
+
+    @classmethod
+    def from_descriptor(cls, descriptor: Dict[str, Any], password: str | None) -> 'Codec':
+        """Codec a file was written with, see descriptor."""
+        if descriptor.get('cipher') is None:
+            return cls(descriptor['compression'])
+        if descriptor['cipher'] != CIPHER:
+            raise DataFileError(f"Unknown cipher '{descriptor['cipher']}'.")
+        if not password:
+            raise DataFileError("The data file is encrypted, a password is required.")
+        return cls(descriptor['compression'], derive_key(password, descriptor['salt'], descriptor['kdf']),
+                   descriptor['salt'], descriptor['kdf'])
+
+    @property
+    def descriptor(self) -> Dict[str, Any]:
+        """Everything but the password needed to decode, stored unencrypted in the file."""
+        if self._key is None:
+            return {'compression': self.compression, 'cipher': None}
+        return {'compression': self.compression, 'cipher': CIPHER, 'salt': self._salt, 'kdf': self._kdf}
+
+    @property
+    def encrypted(self) -> bool:
+        return self._key is not None
+
+    @property
+    def identity(self) -> bool:
+        return self._key is None and self.compression == 'none'
+
+    def with_compression(self, compression: str) -> 'Codec':
+        """The same key with another compression, e.g. none for small journal entries."""
+        return Codec(compression, self._key, self._salt, self._kdf)
+
+    def encode(self, data: bytes, associated: bytes = b'') -> bytes:
+        """
+        :param associated: data authenticated with the block but not stored in it, decode must be given the same.
+        """
+        data = self._compress(data)
+        if self._key is None:
+            return data
+
+        nonce = os.urandom(_NONCE_SIZE)
+        ciphertext = self._xor_keystream(data, nonce)
+        return nonce + ciphertext + self._tag(nonce, ciphertext, associated)
+
+    def decode(self, block: bytes, associated: bytes = b'') -> bytes:
+        if self._key is not None:
+            if len(block) < _NONCE_SIZE + _TAG_SIZE:
+                raise DataFileError("Encrypted block is truncated.")
+            nonce, ciphertext, tag = block[:_NONCE_SIZE], block[_NONCE_SIZE:-_TAG_SIZE], block[-_TAG_SIZE:]
+            if not hmac.compare_digest(tag, self._tag(nonce, ciphertext, associated)):
+                raise DataFileError("Data file is damaged or the password is wrong.")
+            block = self._xor_keystream(ciphertext, nonce)
+
+        try:
+            return self._decompress(block)
+        except (zlib.error, lzma.LZMAError) as e:
+            raise DataFileError(f"Data file is damaged: {e}") from e
+
+    def sign(self, data: bytes) -> bytes:
+        """:return: tag of data stored unencrypted, empty without a key."""
+        if self._key is None:
+            return b''
+        return hmac.digest(self._sign_key, data, 'sha256')
+
+    def verify(self, data: bytes, tag: bytes) -> None:
+        if not hmac.compare_digest(tag, self.sign(data)):
+            raise DataFileError("Data file is damaged or the password is wrong.")
+
+    def _tag(self, nonce: bytes, ciphertext: bytes, associated: bytes) -> bytes:
+        # Without associated data the tag is the one of blocks written before it was supported.
+        prefix = len(associated).to_bytes(8, 'little') + associated if associated else b''
+        return hmac.digest(self._key[32:], prefix + nonce + ciphertext, 'sha256')
+
+    def _xor_keystream(self, data: bytes, nonce: bytes) -> bytes:
+        keystream = hashlib.shake_256(self._key[:32] + nonce).digest(len(data))
+        # XOR of two big integers runs in C, byte by byte in Python would be ~100x slower.
+        return (int.from_bytes(data, 'little') ^ int.from_bytes(keystream, 'little')).to_bytes(len(data), 'little')
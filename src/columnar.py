@@ -0,0 +1,135 @@
+from array import array
+from collections import Counter
+from datetime import date
+from itertools import compress
+from typing import Dict, List
+
+from src.record import Record
+
+
+class ContactColumns:
+    """
+    Column-oriented copy of the contact book for queries that scan every contact.
+
+    Each contact is a row: its name, birthday as a date ordinal and email domain as a code are
+    kept in parallel arrays, phones in a flat array with the row offsets. Filters are evaluated
+    by C-level iterators (map, compress, Counter) over whole columns instead of a Python loop
+    touching every Record object.
+
+    Rows are only appended. A removed contact leaves a dead row that is skipped by all filters
+    until dead rows outnumber live ones and the columns are compacted.
+    """
+
+    # Phone number stored for phones of dead rows, no phone has 20 digits.
+    _dead_phone = 2 ** 64 - 1
+
+    def __init__(self) -> None:
+        self._names: List[str | None] = []
+        self._rows: Dict[str, int] = {}
+        self._birthdays = array('l')
+        self._domains = array('l')
+        self._domain_codes: Dict[str, int] = {}
+        self._phones = array('Q')
+        self._phone_rows = array('l')
+        self._phone_offsets = array('l')
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def add(self, rec: Record) -> None:
+        if rec.name in self._rows:
+            self.remove(rec.name)
+
+        row = len(self._names)
+        self._rows[rec.name] = row
+        self._names.append(rec.name)
+        self._birthdays.append(rec.birthday.toordinal() if rec.birthday else 0)
+        self._domains.append(self._domain_code(rec.email))
+
+        numbers = rec.phones.numbers
+        self._phone_offsets.append(len(self._phones))
+        self._phones.extend(numbers)
+        self._phone_rows.extend([row] * len(numbers))
+
+    def extend(self, records) -> None:
+        """Add many records, e.g. the whole book when the columns are built. Names must be new."""
+        records = list(records)
+        first = len(self._names)
+        names = [rec.name for rec in records]
+        self._rows.update(zip(names, range(first, first + len(names))))
+        self._names.extend(names)
+        self._birthdays.extend([bday.toordinal() if bday else 0 for bday in (rec.birthday for rec in records)])
+        self._domains.extend(map(self._domain_code, [rec.email for rec in records]))
+
+        offsets, phones, phone_rows = self._phone_offsets, self._phones, self._phone_rows
+        for row, rec in enumerate(records, first):
+            numbers = rec.phones.numbers
+            offsets.append(len(phones))
+            phones.extend(numbers)
+            phone_rows.extend([row] * len(numbers))
+
+    def remove(self, name: str) -> None:
+        row = self._rows.pop(name, None)
+        if row is None:
+            return
+
+        self._names[row] = None
+        self._birthdays[row] = 0
+        self._domains[row] = -1
+        end = self._phone_offsets[row + 1] if row + 1 < len(self._phone_offsets) else len(self._phones)
+        for idx in range(self._phone_offsets[row], end):
+            self._phones[idx] = self._dead_phone
+
+        self._dead += 1
+        if self._dead > 1024 and self._dead > len(self._rows):
+            self._compact()
+
+    def with_email_domain(self, domain: str) -> List[str]:
+        """Names of contacts whose email is at the domain, e.g. 'gmail.com'."""
+        code = self._domain_codes.get(domain.strip().lower().lstrip('@'))
+        if code is None:
+            return []
+        return list(compress(self._names, map(code.__eq__, self._domains)))
+
+    def born_between(self, start: date, end: date) -> List[str]:
+        """Names of contacts born from start to end inclusive."""
+        born = range(start.toordinal(), end.toordinal() + 1)
+        return list(compress(self._names, map(born.__contains__, self._birthdays)))
+
+    def duplicate_phones(self) -> Dict[str, List[str]]:
+        """:return: phone -> names of all contacts having it, for phones shared by several contacts."""
+        counts = Counter(self._phones)
+        counts.pop(self._dead_phone, None)
+        duplicates = {number for number, count in counts.items() if count > 1}
+        if not duplicates:
+            return {}
+
+        owners: Dict[int, List[str]] = {}
+        for idx in compress(range(len(self._phones)), map(duplicates.__contains__, self._phones)):
+            owners.setdefault(self._phones[idx], []).append(self._names[self._phone_rows[idx]])
+        # A contact may list the same phone twice, that alone doesn't make it shared.
+        return {str(number).zfill(10): names for number, names in sorted(owners.items())
+                if len(set(names)) > 1}
+
+    def _domain_code(self, email: str) -> int:
+        if not email or '@' not in email:
+            return -1
+        domain = email.rpartition('@')[2].lower()
+        return self._domain_codes.setdefault(domain, len(self._domain_codes))
+
+    def _compact(self) -> None:
+        live = [row for row in range(len(self._names)) if self._names[row] is not None]
+        phones, phone_rows, offsets = array('Q'), array('l'), array('l')
+        for new_row, row in enumerate(live):
+            offsets.append(len(phones))
+            end = self._phone_offsets[row + 1] if row + 1 < len(self._phone_offsets) else len(self._phones)
+            phones.extend(self._phones[self._phone_offsets[row]:end])
+            phone_rows.extend([new_row] * (end - self._phone_offsets[row]))
+
+        self._names = [self._names[row] for row in live]
+        self._rows = {name: row for row, name in enumerate(self._names)}
+        self._birthdays = array('l', [self._birthdays[row] for row in live])
+        self._domains = array('l', [self._domains[row] for row in live])
+        self._phones, self._phone_rows, self._phone_offsets = phones, phone_rows, offsets
+        self._dead = 0
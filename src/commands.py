@@ -0,0 +1,100 @@
+"""
+Registry of the commands understood by the CLI, batch files and the server.
+
+A handler registers itself with the command decorator: the command name, its aliases, the arguments it accepts
+and a help text::
+
+    @command('add-phone', args=('name', 'phone'), help='Adds additional phone number for the specified user.')
+    class AddPhoneCommandHandler(BaseCommandHandler):
+        ...
+
+Modules holding handlers are imported when a command is first looked up, not when the program starts.
+Plugins add their own modules with register_module() or the ASSISTANT_PLUGINS environment variable
+(comma-separated module names), their handlers register the same way.
+"""
+import importlib
+import os
+from typing import Callable, Dict, Iterable, List
+
+_modules: List[str] = ['src.cmd_handlers']
+_imported = 0
+_commands: Dict[str, 'Command'] = {}
+
+
+class Command:
+    def __init__(self, name: str, handler: type, aliases: Iterable[str] = (), args: Iterable[str] = (),
+                 flags: Iterable[str] = (), help: str = '', local: bool = False, query: bool = False) -> None:
+        """
+        :param args: names of the '--name value' arguments the handler reads.
+        :param flags: names of the '--name' arguments without a value.
+        :param local: the command reads or writes files of the machine it runs on, so network clients can't run it.
+        :param query: the command only reads the data, the server runs queries side by side.
+        """
+        self.name = name
+        self.handler = handler
+        self.aliases = tuple(aliases)
+        self.args = tuple(args)
+        self.flags = tuple(flags)
+        self.help = help
+        self.local = local
+        self.query = query
+
+    def check_args(self, args: List[str]) -> None:
+        """Raise ValueError for an argument the command doesn't accept, e.g. a misspelled one."""
+        idx = 0
+        while idx < len(args):
+            arg = args[idx]
+            name, sep, _ = arg[2:].partition('=')
+            if not arg.startswith('--'):
+                raise ValueError(f"Unexpected '{arg}' argument of '{self.name}'.")
+            if name in self.flags and not sep:
+                idx += 1
+            elif name in self.args:
+                idx += 1 if sep else 2
+            else:
+                accepted = ', '.join(f'--{name}' for name in self.args + self.flags) or 'none'
+                raise ValueError(f"Unknown argument '--{name}' of '{self.name}'. Accepted arguments: {accepted}.")
+
+
+def command(name: str, aliases: Iterable[str] = (), args: Iterable[str] = (), flags: Iterable[str] = (),
+            help: str = '', local: bool = False, query: bool = False) -> Callable[[type], type]:
+    """Class decorator registering a command handler, see Command."""
+
+    def register(handler: type) -> type:
+        spec = Command(name, handler, aliases, args, flags, help, local, query)
+        for key in (name, *spec.aliases):
+            _commands[key] = spec
+        return handler
+
+    return register
+
+
+def register_module(module: str) -> None:
+    """Import the module with command handlers when commands are first looked up."""
+    if module not in _modules:
+        _modules.append(module)
+
+
+def _import_modules() -> None:
+    global _imported
+    if not _imported:
+        for module in os.environ.get('ASSISTANT_PLUGINS', '').split(','):
+            if module.strip():
+                register_module(module.strip())
+
+    # Modules registered later, e.g. by a plugin, are imported on the next lookup.
+    while _imported < len(_modules):
+        importlib.import_module(_modules[_imported])
+        _imported += 1
+
+
+def lookup(name: str) -> Command | None:
+    """:return: the command with that name or alias."""
+    _import_modules()
+    return _commands.get(name)
+
+
+def commands() -> List[Command]:
+    """:return: all commands in the order they were registered."""
+    _import_modules()
+    return list({id(spec): spec for spec in _commands.values()}.values())
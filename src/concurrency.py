@@ -0,0 +1,189 @@
+"""
+Sharing one Assistant between threads.
+
+SharedAssistant takes the place of the Assistant: queries run side by side under a shared lock, mutations one
+at a time under an exclusive one. A compound operation, e.g. a check and the change it guards, runs in a
+read() or write() block::
+
+    shared = SharedAssistant(data)
+    shared.find_records_by_phone('0123456789')
+    with shared.write() as data:
+        if data.note_exists(title) and data.record_exists(name):
+            data.link_note_to_record(name, title)
+
+Long reads such as an export take a snapshot() instead and don't hold writers up at all.
+The server runs every command of a client in a read() or write() block, see src.server.
+"""
+import pickle
+import threading
+import time
+from collections.abc import Iterator, MappingView
+from contextlib import contextmanager
+from typing import Tuple
+
+from src.assistant import Assistant
+
+
+class RWLock:
+    """
+    Readers-writer lock. Readers share it, a writer has it alone. A waiting writer stops new readers
+    from coming in, so a steady flow of queries can't starve it.
+    A thread holding the lock may take it again in the same or a weaker mode.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = None
+        self._waiting_writers = 0
+        self._held = threading.local()
+
+    @contextmanager
+    def read_locked(self):
+        if getattr(self._held, 'depth', 0):
+            yield
+            return
+
+        with self._cond:
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        self._held.depth = 1
+        try:
+            yield
+        finally:
+            self._held.depth = 0
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write_locked(self):
+        me = threading.get_ident()
+        if self._writer == me:
+            yield
+            return
+        if getattr(self._held, 'depth', 0):
+            raise RuntimeError("A read lock can't be upgraded to a write lock.")
+
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer is not None or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = me
+        self._held.depth = 1
+        try:
+            yield
+        finally:
+            self._held.depth = 0
+            with self._cond:
+                self._writer = None
+                self._cond.notify_all()
+
+
+class SharedAssistant:
+    """
+    Thread-safe proxy of an Assistant. Methods listed in Assistant.mutations take the write lock, all others the
+    read lock, or the write lock too if the storage can't run queries side by side (Assistant.concurrent_reads).
+    Generators and dict views are turned into lists before the lock is released. Records and notes returned are
+    the live objects, a later change is visible through them.
+    """
+
+    def __init__(self, data: Assistant) -> None:
+        self._data = data
+        self._lock = RWLock()
+        # Number of write blocks so far, snapshots taken at the same version are current.
+        self._version = 0
+        # Queries may do deferred index work, it is done by a writer before the next reads.
+        self._settled = False
+        self._snapshot: Tuple[int, float, Assistant] | None = None
+        self._snapshot_lock = threading.Lock()
+
+    @contextmanager
+    def read(self):
+        """Shared access, the data doesn't change inside the block."""
+        if not self._data.concurrent_reads:
+            with self._lock.write_locked():
+                yield self._data
+            return
+
+        while True:
+            if not self._settled:
+                with self._lock.write_locked():
+                    if not self._settled:
+                        self._data.settle()
+                        self._settled = True
+            with self._lock.read_locked():
+                # A writer may have come in between the locks.
+                if self._settled:
+                    yield self._data
+                    return
+
+    @contextmanager
+    def write(self):
+        """Exclusive access."""
+        with self._lock.write_locked():
+            try:
+                yield self._data
+            finally:
+                self._version += 1
+                self._settled = False
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def snapshot(self, max_age: float = 0) -> Assistant:
+        """
+        Copy of the data that no writer touches, so it is read without locks. Readers share the copy until
+        the data changes: the next one copies it again.
+        Treat the copy as read-only, its changes are not saved.
+        :param max_age: seconds a copy may stay in use after the data changed, so frequent writes don't cause
+                        a copy of the whole database for every reader.
+        """
+        if self._fresh(max_age):
+            return self._snapshot[2]
+
+        with self._snapshot_lock:
+            # Another reader may have made a copy while this one waited.
+            if self._fresh(max_age):
+                return self._snapshot[2]
+
+            # Only pickling must see the data unchanged, the copy is unpickled and indexed after the lock is released.
+            with self.read() as data:
+                version, taken = self._version, time.monotonic()
+                payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+            data = pickle.loads(payload)
+            # Built before it is shared, so its readers don't race each other building indexes.
+            data.settle()
+            self._snapshot = version, taken, data
+            return data
+
+    def _fresh(self, max_age: float) -> bool:
+        snapshot = self._snapshot
+        return snapshot is not None and (snapshot[0] == self._version or time.monotonic() - snapshot[1] < max_age)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_') or name == 'batch':
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        if not callable(getattr(type(self._data), name, None)):
+            with self.read() as data:
+                return getattr(data, name)
+
+        if name in Assistant.mutations:
+            def method(*args, **kwargs):
+                with self.write() as data:
+                    return getattr(data, name)(*args, **kwargs)
+        else:
+            def method(*args, **kwargs):
+                with self.read() as data:
+                    result = getattr(data, name)(*args, **kwargs)
+                    if isinstance(result, (Iterator, MappingView)):
+                        result = list(result)
+                    return result
+
+        method.__name__ = name
+        return method
@@ -1,122 +1,267 @@
 import getpass
-import hashlib
 import os
 import pickle
-import re
 import sys
+import time
+from typing import Tuple
 
+from src.accounts import AccountIndex, legacy_filename
 from src.assistant import Assistant
+from src.codec import COMPRESSIONS, Codec
+from src.exceptions import AuthenticationError, DataFileError
+from src.journal import Journal
+from src.segments import is_segment_file
+from src.validators import is_valid_email
 
 
 class DataManager:
-    def __init__(self):
-        """Initiates DataManager object and creates filename parameter"""
-        self.filename = self.auth()
+    snapshot_version = 3
+    storages = ('journal', 'sqlite')
+    sqlite_suffix = '.sqlite3'
 
-    def save_data(self, database):
+    def __init__(self, storage: str = None, filename: str = None, password: str = None, accounts: AccountIndex = None):
         """
-        Save the data in a pickle file.
+        Initiates DataManager object and creates filename parameter
+        :param storage: 'journal' (snapshot + write-ahead journal) or 'sqlite'.
+                        Defaults to the ASSISTANT_STORAGE environment variable or 'journal'.
+        :param filename: data file of an already authenticated user, see AccountIndex. The user is asked to
+                         sign up or log in when it is not given.
+        :param password: password of that user, the key of the data file is derived from it.
+        :param accounts: index of the users' accounts, 'accounts.json' in the working directory by default.
+        """
+        self.storage = storage or os.environ.get('ASSISTANT_STORAGE', 'journal')
+        if self.storage not in self.storages:
+            raise ValueError(f"Unknown storage '{self.storage}'. Use one of: {', '.join(self.storages)}")
+        # Compression of new snapshots: none, zlib or lzma. Files are encrypted with a key derived from the password.
+        self.compression = os.environ.get('ASSISTANT_COMPRESSION', 'zlib')
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{self.compression}'. Use one of: {', '.join(COMPRESSIONS)}")
+        self.codec = None
+        # Kept only until the data file key is derived from it.
+        self._password = password
+        self.accounts = accounts or AccountIndex(legacy_exists=self.data_exists)
+
+        self.filename = filename or self.auth()
+        self.journal = Journal(self.filename + '.journal')
+        # Seconds between saves of a long session, 0 turns autosave off.
+        self.autosave_interval = float(os.environ.get('ASSISTANT_AUTOSAVE', 300))
+        self._last_save = time.monotonic()
+
+    def save_data(self, database: Assistant) -> None:
+        """
+        Persist the session. Every change is already appended to the journal, so saving only syncs it to disk.
+        When the journal grows past its threshold it is compacted into a new snapshot.
+        Nothing is written if nothing changed since the last save.
         :param database: Database object to save.
         """
-        with open(self.filename, "wb") as f:
-            pickle.dump(database, f)
+        if self.storage == 'sqlite':
+            database.commit()
+            return
 
-    def load_data(self) -> Assistant:
+        compact = (database.journal is not self.journal
+                   or self.journal.entries >= self.journal.compact_threshold
+                   or not os.path.exists(self.filename))
+        if not database.dirty and not compact:
+            return
+
+        self.journal.sync()
+        if compact:
+            self.compact(database)
+        database.mark_saved()
+        self._last_save = time.monotonic()
+
+    def autosave(self, database: Assistant) -> None:
+        """Save a long session every autosave_interval seconds, called between commands."""
+        if self.autosave_interval > 0 and time.monotonic() - self._last_save >= self.autosave_interval:
+            self.save_data(database)
+
+    def compact(self, database: Assistant) -> None:
         """
-        Load the data from a pickle file or to create a new AddressBook object.
+        Write a full snapshot of the database and truncate the journal.
+        The snapshot is written to a temporary file first, so an interruption never leaves a broken file behind.
+        Every record and note is a separate segment of the snapshot, so the next start loads them on demand.
+        Segments of records and notes that were not changed are copied from the previous snapshot as they are.
+        :param database: Database object to save.
         """
+        tmp_filename = self.filename + '.tmp'
+        with open(tmp_filename, "wb") as f:
+            database.dump_segments(f, {'version': self.snapshot_version, 'seq': self.journal.seq},
+                                   self.codec.with_compression(self.compression))
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_filename, self.filename)
+        self._sync_dir()
+        self.journal.reset()
+
+    def close(self, database: Assistant) -> None:
+        """Save the database and release its files, the database must not be used afterwards."""
+        self.save_data(database)
+        if self.storage == 'sqlite':
+            database.close()
+        else:
+            database.attach_journal(None)
+            self.journal.close()
+
+    def _sync_dir(self) -> None:
+        """Make the rename of the snapshot durable. Directories can't be opened for syncing on Windows."""
+        if os.name != 'posix':
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.filename)), os.O_RDONLY)
         try:
-            with open(self.filename, "rb") as f:
-                return pickle.load(f)
-        except FileNotFoundError:
-            return Assistant()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def load_data(self) -> Assistant:
+        """
+        Load the last snapshot and replay the journal tail on top of it, or create a new Assistant object.
+        Records and notes of a segmented snapshot are read from the file when they are first needed.
+        With the 'sqlite' storage the database file is only opened, nothing is loaded.
+        """
+        if self.storage == 'sqlite':
+            from src.sqlite_assistant import SQLiteAssistant
+
+            return SQLiteAssistant(self.filename + self.sqlite_suffix)
+
+        seq = 0
+        if is_segment_file(self.filename):
+            header, database = Assistant.load_segments(self.filename, self._open_codec)
+            seq = header['seq']
+        else:
+            try:
+                with open(self.filename, "rb") as f:
+                    header = pickle.load(f)
+                    if isinstance(header, Assistant):
+                        # Plain pickle written before the journal was introduced.
+                        database = header
+                    else:
+                        # Whole-database pickle written before snapshots were segmented.
+                        seq = header['seq']
+                        database = pickle.load(f)
+            except FileNotFoundError:
+                database = Assistant()
+
+        # Only an encrypted snapshot holds the salt of its key, a missing file or an older format gets a new one.
+        new_key = self.codec is None
+        if new_key:
+            self.codec = Codec.from_password(self._password, self.compression)
+        self._password = None
+        # Journal entries are small, compressing them one by one doesn't pay off.
+        journal_codec = self.codec.with_compression('none')
+        # Without an encrypted snapshot the journal can only hold plaintext entries written before encryption.
+        self.journal.codec = None if new_key else journal_codec
+        self.journal.replay(database, after_seq=seq)
+        self.journal.codec = journal_codec
+        database.attach_journal(self.journal)
+        if new_key:
+            # The salt must be on disk before the journal gets entries encrypted with the new key.
+            self.compact(database)
+        # Replayed changes are already on disk.
+        database.mark_saved()
+        return database
+
+    def _open_codec(self, descriptor: dict) -> Codec:
+        # Snapshots of formats that predate encryption are migrated without asking for a codec. A newer one
+        # stored unencrypted although the account has a password has been replaced, e.g. to turn encryption off.
+        if self._password and descriptor.get('cipher') is None:
+            raise DataFileError(f"'{self.filename}' isn't encrypted, it wasn't written by this account.")
+        self.codec = Codec.from_descriptor(descriptor, self._password)
+        return self.codec
+
+    @classmethod
+    def data_exists(cls, file_name: str) -> bool:
+        """Check whether a user's database exists in any storage."""
+        return os.path.exists(file_name) or os.path.exists(file_name + cls.sqlite_suffix)
 
     @staticmethod
     def generate_hash(email: str, password: str) -> str:
         """
-        Generate a filename based on the email and password.
+        Filename of the data of an account created before the account index, see src.accounts.
         :param email: user`s email from input
         :param password: user`s password from input
         :return:
         """
-        hash_obj = hashlib.sha256(email.encode() + password.encode())
-        return hash_obj.hexdigest()
+        return legacy_filename(email, password)
 
-    def validate_secret(self) -> str:
+    def validate_secret(self) -> Tuple[str, str]:
         """
         Taking email from input and check if it is valid.
         Taking 2 passwords from input and check if they are same or longer than 8 symbols.
+        Asks again until they are.
         :return: email(str), Password(str)
         """
-        email = input("Enter email address: ")
-        email_regex = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
-        if not re.match(email_regex, email):
-            print("Incorrect email format")
-            self.validate_secret()
-
-        pwd = getpass.getpass("Enter your password: ")
-        conf_pwd = getpass.getpass("Confirm password: ")
+        while True:
+            email = input("Enter email address: ")
+            if not is_valid_email(email):
+                print("Incorrect email format")
+                continue
 
-        if len(pwd) < 8:
-            print("Password should be longer than 8 characters!")
-            self.validate_secret()
-        elif conf_pwd != pwd:
-            print("Passwords are not identical! Try one more time please.\n")
-            self.validate_secret()
+            pwd = getpass.getpass("Enter your password: ")
+            conf_pwd = getpass.getpass("Confirm password: ")
 
-        return email, pwd
+            if len(pwd) < 8:
+                print("Password should be longer than 8 characters!")
+            elif conf_pwd != pwd:
+                print("Passwords are not identical! Try one more time please.\n")
+            else:
+                return email, pwd
 
-    def signup(self):
+    def signup(self) -> str | None:
         """
         Input of email and password.
-        :return: hashed email + password
+        :return: filename of the new user's data or None if the email is taken.
         """
         email, pwd = self.validate_secret()
-        file_name = self.generate_hash(email, pwd)
+        try:
+            file_name = self.accounts.signup(email, pwd)
+        except ValueError as e:
+            print(e)
+            return None
+        self._password = pwd
         print("You have registered successfully!")
         return file_name
 
-    def login(self):
+    def login(self) -> str | None:
         """
-        Input of email and password. If such pair already exists - create and return filename.
-        Through to main menu if it does not exist.
-        :return: hashed email + password
+        Input of email and password.
+        :return: filename of the user's data or None if the email and password don't match an account.
         """
         email = input("Enter email address: ")
         pwd = getpass.getpass("Enter password: ")
-        secret_hash = self.generate_hash(email, pwd)
-
-        if not os.path.exists(secret_hash):
-            print("User with such email or password does not exist!")
-            secret_hash = self.auth()
-        else:
-            print("Logged in Successfully!")
-        return secret_hash
+        try:
+            file_name = self.accounts.authenticate(email, pwd)
+        except AuthenticationError as e:
+            print(e)
+            return None
+        self._password = pwd
+        print("Logged in Successfully!")
+        return file_name
 
-    def auth(self) -> bool:
+    def auth(self) -> str:
         """
-        Filename handling function
+        Filename handling function, asks until the user signs up or logs in.
         :return: filename or exit the program
         """
-        print(
-            """What would you like to do?
+        while True:
+            print(
+                """What would you like to do?
                     1.Signup
                     2.Login
                     3.Exit
             """
-        )
-        choice = int(input("Enter your choice: "))
-        if choice == 1:
-            file_name = self.signup()
-        elif choice == 2:
-            file_name = self.login()
-            if not file_name:
-                self.auth()
-        elif choice == 3:
-            print("Exiting...")
-            sys.exit()
-        else:
-            print("Wrong Choice!")
-            file_name = self.auth()
+            )
+            choice = input("Enter your choice: ").strip()
+            if choice == '1':
+                file_name = self.signup()
+            elif choice == '2':
+                file_name = self.login()
+            elif choice == '3':
+                print("Exiting...")
+                sys.exit()
+            else:
+                print("Wrong Choice!")
+                continue
 
-        return file_name
+            if file_name:
+                return file_name
@@ -4,3 +4,11 @@ class UnknownInputCommand(Exception):
 
 class RecordPropertyNotFound(Exception):
     pass
+
+
+class DataFileError(Exception):
+    """A data file can't be decoded: it is damaged or was encrypted with another password."""
+
+
+class AuthenticationError(Exception):
+    """No data belongs to the given email and password."""
@@ -0,0 +1,188 @@
+import csv
+import json
+import os
+from datetime import date
+from typing import Callable, Dict, Generator, Iterable, TextIO
+
+from src.assistant import Assistant
+from src.note import Note
+from src.record import Record
+
+
+_extensions = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'jsonl',
+    '.vcf': 'vcard',
+    '.vcard': 'vcard',
+}
+
+# Notes filtered by tag are read from the tag's posting list a page at a time.
+_page_size = 1000
+
+
+def detect_format(filename: str) -> str:
+    file_format = _extensions.get(os.path.splitext(filename)[1].lower())
+    if file_format is None:
+        raise ValueError(f"Can't detect the format of '{filename}'. Use --format csv, jsonl or vcard.")
+    return file_format
+
+
+def _in_period(day: date, start: date = None, end: date = None) -> bool:
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+def iter_records(data: Assistant, tag: str = None, start: date = None, end: date = None
+                 ) -> Generator[Record, None, None]:
+    """
+    Records one at a time in the order they were added.
+    :param tag: only records that have a note with this tag.
+    :param start: only records with the birthday on this date or later.
+    :param end: only records with the birthday on this date or earlier.
+    """
+    for rec in data.iter_records():
+        if tag is not None and not any(tag in note.tags for note in rec.notes):
+            continue
+        if (start or end) and not (rec.birthday and _in_period(rec.birthday, start, end)):
+            continue
+        yield rec
+
+
+def iter_notes(data: Assistant, tag: str = None, start: date = None, end: date = None) -> Generator[Note, None, None]:
+    """
+    Notes one at a time, ordered by title when filtered by tag and in the order they were added otherwise.
+    :param start: only notes created on this date or later.
+    :param end: only notes created on this date or earlier.
+    """
+    if tag is None:
+        notes = data.iter_notes()
+    else:
+        notes = _iter_notes_by_tag(data, tag)
+
+    for note in notes:
+        if _in_period(note.created_at.date(), start, end):
+            yield note
+
+
+def _iter_notes_by_tag(data: Assistant, tag: str) -> Generator[Note, None, None]:
+    offset = 0
+    while True:
+        page = data.get_sorted_notes_by_tag(tag, offset, _page_size)
+        yield from page
+        if len(page) < _page_size:
+            return
+        offset += _page_size
+
+
+def record_to_dict(rec: Record) -> Dict[str, object]:
+    return {
+        'name': rec.name,
+        'phones': [str(phone) for phone in rec.phones],
+        'email': rec.email or None,
+        'address': rec.address or None,
+        'birthday': rec.birthday.isoformat() if rec.birthday else None,
+    }
+
+
+def note_to_dict(note: Note) -> Dict[str, object]:
+    return {
+        'title': note.title,
+        'content': Note.unformat_note(note.content),
+        'tags': [str(tag) for tag in note.tags],
+        'created_at': note.created_at.isoformat(),
+        'modified_at': note.modified_at.isoformat() if note.modified_at else None,
+    }
+
+
+def _write_csv(items: Iterable[Dict[str, object]], f: TextIO) -> int:
+    writer = None
+    count = 0
+    for item in items:
+        if writer is None:
+            writer = csv.writer(f)
+            writer.writerow(item.keys())
+        # Lists (phones, tags) are joined with ';' the way import reads them back.
+        writer.writerow([';'.join(value) if isinstance(value, list) else '' if value is None else value
+                         for value in item.values()])
+        count += 1
+    return count
+
+
+def _write_jsonl(items: Iterable[Dict[str, object]], f: TextIO) -> int:
+    count = 0
+    for item in items:
+        f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def _vcard_text(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace(',', '\\,').replace(';', '\\;')
+
+
+def _vcard_line(line: str) -> str:
+    # Lines longer than 75 characters are folded: continuation lines start with a space.
+    return '\r\n '.join(line[i:i + 74] for i in range(0, len(line), 74)) + '\r\n'
+
+
+def _write_vcard(items: Iterable[Dict[str, object]], f: TextIO) -> int:
+    count = 0
+    for item in items:
+        lines = ['BEGIN:VCARD', 'VERSION:3.0', f"FN:{_vcard_text(item['name'])}", f"N:{_vcard_text(item['name'])};;;;"]
+        lines.extend(f"TEL:{phone}" for phone in item['phones'])
+        if item['email']:
+            lines.append(f"EMAIL:{item['email']}")
+        if item['address']:
+            lines.append(f"ADR:;;{_vcard_text(item['address'])};;;;")
+        if item['birthday']:
+            lines.append(f"BDAY:{item['birthday']}")
+        lines.append('END:VCARD')
+        f.write(''.join(_vcard_line(line) for line in lines))
+        count += 1
+    return count
+
+
+writers: Dict[str, Callable[[Iterable[Dict[str, object]], TextIO], int]] = {
+    'csv': _write_csv,
+    'jsonl': _write_jsonl,
+    'vcard': _write_vcard,
+}
+
+
+def export_data(data: Assistant, filename: str, kind: str = 'records', file_format: str = None, tag: str = None,
+                start: date = None, end: date = None) -> int:
+    """
+    Write records or notes to a file one at a time, without building the whole export in memory.
+    :param kind: 'records' or 'notes'. Notes can't be exported to vCard.
+    :param file_format: 'csv', 'jsonl' or 'vcard', detected from the file extension by default.
+    :param tag: export only notes with this tag, or records having a note with it.
+    :param start: date filter start, applied to birthdays of records and creation dates of notes.
+    :param end: date filter end, inclusive.
+    :return: number of exported items.
+    """
+    file_format = file_format or detect_format(filename)
+    write = writers.get(file_format)
+    if write is None:
+        raise ValueError(f"Unknown format '{file_format}'. Use one of: {', '.join(writers)}")
+
+    match kind:
+        case 'records':
+            items = map(record_to_dict, iter_records(data, tag, start, end))
+        case 'notes':
+            if file_format == 'vcard':
+                raise ValueError("Notes can't be exported to vCard, use csv or jsonl.")
+            items = map(note_to_dict, iter_notes(data, tag, start, end))
+        case _:
+            raise ValueError(f"Unknown export '{kind}'. Use records or notes.")
+
+    # Written to a temporary file first, so a failed export doesn't leave a truncated file behind.
+    tmp_filename = filename + '.tmp'
+    try:
+        with open(tmp_filename, 'w', encoding='utf-8', newline='') as f:
+            count = write(items, f)
+        os.replace(tmp_filename, filename)
+    finally:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+    return count
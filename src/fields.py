@@ -1,11 +1,22 @@
-import re
-from datetime import datetime
+import sys
 
+from src import validators
+from src.slotted import Slotted
+
+
+class Field(Slotted):
+    __slots__ = ('_value',)
 
-class Field:
     def __init__(self, value) -> None:
         self._value = self._validate(value)
 
+    @classmethod
+    def trusted(cls, value):
+        """Wrap a value that was already validated, e.g. by the importer, without validating it again."""
+        field = cls.__new__(cls)
+        field._value = value
+        return field
+
     def __str__(self) -> str:
         return str(self._value)
 
@@ -21,6 +32,8 @@ class Field:
 
 
 class Name(Field):
+    __slots__ = ()
+
     def _validate(self, value: str):
         return value
 
@@ -30,36 +43,38 @@ class Name(Field):
 
 
 class Phone(Field):
-    required_num_of_digits = 10
+    __slots__ = ()
+    required_num_of_digits = validators.PHONE_DIGITS
 
     def _validate(self, value: str):
-        if not value.isdigit():
-            raise ValueError("All characters are not digits")
-        if len(value) != self.required_num_of_digits:
-            raise ValueError(f"Phone number must be {self.required_num_of_digits} digits long")
-        return value
+        return validators.validate_phone(value)
 
 
 class Address(Field):
+    __slots__ = ()
+
+    # Many contacts share an address (or just a city), interned strings are stored once.
     def _validate(self, value: str):
-        return value
+        return sys.intern(value)
+
+    @classmethod
+    def trusted(cls, value):
+        return super().trusted(sys.intern(value))
+
+    def __setstate__(self, state: dict) -> None:
+        super().__setstate__(state)
+        self._value = sys.intern(self._value)
 
 
 class Email(Field):
+    __slots__ = ()
+
     def _validate(self, value: str):
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(email_pattern, value):
-            raise ValueError(f"{value} - email address format is invalid")
-        return value
+        return validators.validate_email(value)
 
 
 class Birthday(Field):
+    __slots__ = ()
+
     def _validate(self, value: str):
-        try:
-            date = datetime.strptime(value, "%d.%m.%Y").date()
-        except ValueError:
-            raise ValueError("Invalid date format. Use DD.MM.YYYY")
-
-        if date > datetime.today().date():
-            raise ValueError("Birthdate is from the future")
-        return date
+        return validators.parse_birthday(value)
@@ -0,0 +1,403 @@
+import csv
+import gc
+import io
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import date
+from itertools import islice
+from typing import Dict, Generator, Iterable, Iterator, List, TextIO, Tuple
+
+from src.assistant import Assistant
+from src.fields import Name, Phone, Email, Address, Birthday
+from src.validators import parse_birthdays, validate_emails, validate_phones
+
+# Contact as read from a file: name, phones (list), email, address, birthday - all strings.
+RawContact = Dict[str, object]
+# Contact that passed validation: (line, raw contact, name, phones, email, address, birthday).
+ValidContact = Tuple[int, RawContact, str, List[str], str, str, date]
+Reject = Tuple[int, str, object]
+
+
+class ImportResult:
+    def __init__(self, rejects_filename: str) -> None:
+        self.imported = 0
+        self.rejected = 0
+        self.rejects_filename = rejects_filename
+
+
+_extensions = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.json': 'jsonl',
+    '.vcf': 'vcard',
+    '.vcard': 'vcard',
+}
+
+_csv_columns = {
+    'name': 'name',
+    'full name': 'name',
+    'phone': 'phones',
+    'phones': 'phones',
+    'tel': 'phones',
+    'email': 'email',
+    'address': 'address',
+    'birthday': 'birthday',
+    'bday': 'birthday',
+}
+
+_phone_separators = str.maketrans('', '', ' -().')
+
+
+def detect_format(filename: str) -> str:
+    file_format = _extensions.get(os.path.splitext(filename)[1].lower())
+    if file_format is None:
+        raise ValueError(f"Can't detect the format of '{filename}'. Use --format csv, jsonl or vcard.")
+    return file_format
+
+
+def read_csv(f: TextIO) -> Iterator[Tuple[int, RawContact]]:
+    """
+    CSV with a header row. Known columns: name, phone (several phones separated by ';'), email, address, birthday.
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    columns = [(idx, _csv_columns[title.strip().lower()]) for idx, title in enumerate(header)
+               if title.strip().lower() in _csv_columns]
+    if 'name' not in (key for _, key in columns):
+        raise ValueError("CSV file must have a 'name' column.")
+
+    for row in reader:
+        if not row:
+            continue
+        contact = {key: row[idx] for idx, key in columns if idx < len(row)}
+        contact['phones'] = contact.get('phones', '').split(';')
+        yield reader.line_num, contact
+
+
+def read_jsonl(f: TextIO) -> Iterator[Tuple[int, RawContact | ValueError]]:
+    """
+    One JSON object per line with the keys name, phone or phones (a list), email, address, birthday.
+    A line that isn't a JSON object is yielded as ValueError, so it is rejected instead of stopping the import.
+    """
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as e:
+            yield line_no, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(obj, dict):
+            yield line_no, ValueError("Expected a JSON object.")
+            continue
+
+        phones = obj.get('phones', obj.get('phone', []))
+        contact = {key: obj[key] for key in ('name', 'email', 'address', 'birthday') if obj.get(key) is not None}
+        contact['phones'] = phones if isinstance(phones, list) else [phones]
+        yield line_no, contact
+
+
+def _unfold(f: TextIO) -> Iterator[Tuple[int, str]]:
+    """vCard lines continued on the next line starting with a space or a tab, joined back."""
+    start, current = 0, None
+    for line_no, line in enumerate(f, start=1):
+        line = line.rstrip('\r\n')
+        if line[:1] in (' ', '\t') and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield start, current
+        start, current = line_no, line
+    if current is not None:
+        yield start, current
+
+
+def _vcard_text(value: str) -> str:
+    return value.replace('\\n', '\n').replace('\\N', '\n').replace('\\,', ',').replace('\\;', ';').replace('\\\\', '\\')
+
+
+def read_vcard(f: TextIO) -> Iterator[Tuple[int, RawContact]]:
+    """
+    vCard 3.0/4.0 file with any number of cards. FN (or N), TEL, EMAIL, ADR and BDAY properties are imported,
+    only the first EMAIL and ADR of a card are kept.
+    """
+    contact, start = None, 0
+    for line_no, line in _unfold(f):
+        prop, _, value = line.partition(':')
+        # 'item1.TEL;TYPE=cell' -> 'TEL'
+        prop = prop.split(';', 1)[0].rpartition('.')[2].upper()
+
+        if prop == 'BEGIN' and value.strip().upper() == 'VCARD':
+            contact, start = {'phones': []}, line_no
+        elif contact is None:
+            continue
+        elif prop == 'END':
+            yield start, contact
+            contact = None
+        elif prop == 'FN':
+            contact['name'] = _vcard_text(value).strip()
+        elif prop == 'N' and not contact.get('name'):
+            family, _, rest = value.partition(';')
+            given = rest.split(';', 1)[0]
+            contact['name'] = ' '.join(_vcard_text(part) for part in (given, family) if part)
+        elif prop == 'TEL':
+            contact['phones'].append(value.removeprefix('tel:'))
+        elif prop == 'EMAIL':
+            contact.setdefault('email', value)
+        elif prop == 'ADR':
+            contact.setdefault('address', ', '.join(_vcard_text(part) for part in value.split(';') if part))
+        elif prop == 'BDAY':
+            contact['birthday'] = value
+
+
+readers = {
+    'csv': read_csv,
+    'jsonl': read_jsonl,
+    'vcard': read_vcard,
+}
+
+
+def validate_contacts(contacts: Iterable[Tuple[int, RawContact | ValueError]], chunk_size: int = 1000
+                      ) -> Generator[Tuple[List[ValidContact], List[Reject]], None, None]:
+    """
+    Validate contacts a chunk at a time with the same rules the fields apply in add-record.
+    :return: (valid contacts, rejects) per chunk.
+    """
+    contacts = iter(contacts)
+
+    while True:
+        chunk = list(islice(contacts, chunk_size))
+        if not chunk:
+            return
+
+        rows, rejects = [], []
+        for line_no, contact in chunk:
+            if isinstance(contact, ValueError):
+                rejects.append((line_no, str(contact), None))
+            else:
+                rows.append((line_no, contact))
+
+        # Columns of the chunk are validated at once, phones of all contacts flattened into one column.
+        contacts_phones = [[str(phone).translate(_phone_separators) for phone in contact.get('phones') or ()]
+                           for _, contact in rows]
+        phones = iter(validate_phones([phone for phone_list in contacts_phones for phone in phone_list if phone]))
+        emails = validate_emails([str(contact.get('email') or '').strip().lower() for _, contact in rows],
+                                 allow_empty=True)
+        birthdays = parse_birthdays([str(contact.get('birthday') or '').strip() for _, contact in rows],
+                                    allow_iso=True, allow_empty=True)
+
+        valid = []
+        for (line_no, contact), phone_list, email, birthday in zip(rows, contacts_phones, emails, birthdays):
+            name = str(contact.get('name') or '').strip()
+            # Consume the phones of this contact even if it is rejected for another reason.
+            checked = [next(phones) for phone in phone_list if phone]
+            phone_errors = [phone for phone in checked if isinstance(phone, ValueError)]
+
+            error = None
+            if not name:
+                error = "Name is missing"
+            elif phone_errors:
+                error = str(phone_errors[0])
+            elif not checked:
+                error = "Phone is missing"
+            elif isinstance(email, ValueError):
+                error = str(email)
+            elif isinstance(birthday, ValueError):
+                error = str(birthday)
+
+            if error:
+                rejects.append((line_no, error, contact))
+            else:
+                address = str(contact.get('address') or '').strip().lower()
+                valid.append((line_no, contact, name, list(dict.fromkeys(checked)), email, address, birthday))
+
+        yield valid, rejects
+
+
+def split_chunks(f: TextIO, file_format: str, chunk_size: int) -> Generator[Tuple[int, List[str]], None, None]:
+    """
+    Cut the file into chunks of about chunk_size lines that can be parsed independently:
+    never inside a quoted CSV value spanning lines, and only after the end of a vCard.
+    The CSV header must have been read from f before.
+    :return: (number of the first line, lines) per chunk.
+    """
+    line_no = 1 if file_format != 'csv' else 2
+    chunk, first_line, in_quotes = [], line_no, False
+
+    for line in f:
+        chunk.append(line)
+        if file_format == 'csv':
+            # An odd number of quotes opens or closes a value that continues on the next line.
+            in_quotes ^= line.count('"') % 2 == 1
+            can_cut = not in_quotes
+        elif file_format == 'vcard':
+            can_cut = line.strip().upper() == 'END:VCARD'
+        else:
+            can_cut = True
+
+        if can_cut and len(chunk) >= chunk_size:
+            yield first_line, chunk
+            first_line += len(chunk)
+            chunk = []
+
+    if chunk:
+        yield first_line, chunk
+
+
+def read_chunk(file_format: str, header: str, first_line: int, lines: List[str]
+               ) -> Iterator[Tuple[int, RawContact | ValueError]]:
+    """Parse one chunk of split_chunks(), lines are numbered as in the file."""
+    # Line numbers in the chunk are counted from the header (if any), shift them to the numbers in the file.
+    shift = first_line - (2 if header else 1)
+    reader = readers[file_format](io.StringIO(header + ''.join(lines)))
+    return ((line_no + shift, contact) for line_no, contact in reader)
+
+
+class ChunkContacts:
+    """
+    Raw contacts of a chunk validated in a worker process, by line number. Workers don't send them back,
+    the chunk is parsed again only when one of its contacts is rejected as a duplicate.
+    """
+
+    def __init__(self, file_format: str, header: str, first_line: int, lines: List[str]) -> None:
+        self._chunk = file_format, header, first_line, lines
+        self._contacts: Dict[int, RawContact | ValueError] | None = None
+
+    def __getitem__(self, line_no: int) -> RawContact:
+        if self._contacts is None:
+            self._contacts = dict(read_chunk(*self._chunk))
+        return self._contacts[line_no]
+
+
+def validate_chunk(file_format: str, header: str, first_line: int, lines: List[str]
+                   ) -> Tuple[List[ValidContact], List[Reject]]:
+    """
+    Parse and validate one chunk of split_chunks(), run in a worker process of a parallel import.
+    Valid contacts are returned without the raw contact to keep the results small to send back.
+    """
+    contacts = read_chunk(file_format, header, first_line, lines)
+
+    valid, rejects = [], []
+    for chunk_valid, chunk_rejects in validate_contacts(contacts, len(lines)):
+        valid.extend((line_no, None, *values) for line_no, _, *values in chunk_valid)
+        rejects.extend(chunk_rejects)
+    return valid, rejects
+
+
+def validate_parallel(f: TextIO, file_format: str, chunk_size: int, workers: int
+                      ) -> Generator[Tuple[List[ValidContact], List[Reject]], None, None]:
+    """
+    Validate chunks of the file in worker processes and yield their results in the order of the file,
+    so duplicates are resolved exactly as in a sequential import. At most two chunks per worker are read
+    ahead of the one being merged.
+    The raw contact of a valid contact is a ChunkContacts of its chunk.
+    """
+    header = ''
+    if file_format == 'csv':
+        header = f.readline()
+        # Reject a file without the name column before starting any worker.
+        next(read_csv(io.StringIO(header)), None)
+
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for first_line, lines in split_chunks(f, file_format, chunk_size):
+            chunk = file_format, header, first_line, lines
+            pending.append((executor.submit(validate_chunk, *chunk), ChunkContacts(*chunk)))
+            if len(pending) >= workers * 2:
+                yield _chunk_result(*pending.popleft())
+
+        while pending:
+            yield _chunk_result(*pending.popleft())
+
+
+def _chunk_result(future: Future, contacts: ChunkContacts) -> Tuple[List[ValidContact], List[Reject]]:
+    valid, rejects = future.result()
+    return [(line_no, contacts, *values) for line_no, _, *values in valid], rejects
+
+
+def import_contacts(data: Assistant, filename: str, file_format: str = None, rejects_filename: str = None,
+                    chunk_size: int = 1000, workers: int = 1) -> ImportResult:
+    """
+    Stream contacts from a file into the address book.
+    Contacts that are invalid, already exist or have a phone that is already in the book are not imported:
+    they are written with the reason to the rejects file as JSON lines.
+    The contacts are added all at once after the whole file is read, a single journal entry or transaction.
+    A file that can't be read to the end, e.g. with invalid UTF-8 or a broken CSV quote, raises and leaves
+    the book unchanged. Only the rejects file holds the rejects found until then.
+    :param file_format: 'csv', 'jsonl' or 'vcard', detected from the file extension by default.
+    :param rejects_filename: defaults to the imported file name + '.rejects.jsonl'.
+    :param chunk_size: contacts (lines for a parallel import) validated at a time.
+    :param workers: processes that parse and validate the file. With more than one, only checking
+                    for duplicates and inserting into the book is left to this process.
+    """
+    file_format = file_format or detect_format(filename)
+    reader = readers.get(file_format)
+    if reader is None:
+        raise ValueError(f"Unknown format '{file_format}'. Use one of: {', '.join(readers)}")
+    if workers < 1:
+        raise ValueError("Number of workers must be a positive number.")
+
+    result = ImportResult(rejects_filename or filename + '.rejects.jsonl')
+    seen_names, seen_phones = set(), set()
+    records = []
+    rejects_file = None
+
+    # Every imported contact is a handful of long-living objects: the cyclic garbage collector would
+    # rescan the whole growing heap again and again without finding anything to free.
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(filename, encoding='utf-8-sig', newline='') as f, data.batch():
+            if workers > 1:
+                chunks = validate_parallel(f, file_format, chunk_size, workers)
+            else:
+                chunks = validate_contacts(reader(f), chunk_size)
+
+            for valid, rejects in chunks:
+                for line_no, contact, name, phones, email, address, birthday in valid:
+                    if name in seen_names or data.record_exists(name):
+                        error = f"Contact '{name}' already exists."
+                    else:
+                        duplicate = next((p for p in phones if p in seen_phones or data.phone_exists(p)), None)
+                        error = f"{duplicate} already exists in book." if duplicate else None
+
+                    if error:
+                        if isinstance(contact, ChunkContacts):
+                            contact = contact[line_no]
+                        rejects.append((line_no, error, contact))
+                        continue
+
+                    seen_names.add(name)
+                    seen_phones.update(phones)
+                    records.append((
+                        Name.trusted(name),
+                        [Phone.trusted(phone) for phone in phones],
+                        Email.trusted(email) if email else None,
+                        Address.trusted(address) if address else None,
+                        Birthday.trusted(birthday) if birthday else None,
+                    ))
+
+                if rejects:
+                    if rejects_file is None:
+                        rejects_file = open(result.rejects_filename, 'w', encoding='utf-8')
+                    for line_no, error, contact in sorted(rejects, key=lambda reject: reject[0]):
+                        rejects_file.write(json.dumps({'line': line_no, 'error': error, 'contact': contact},
+                                                      ensure_ascii=False, default=str) + '\n')
+                    result.rejected += len(rejects)
+
+            if records:
+                data.add_records(records)
+                result.imported = len(records)
+    finally:
+        if gc_enabled:
+            gc.enable()
+        if rejects_file is not None:
+            rejects_file.close()
+
+    return result
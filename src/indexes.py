@@ -0,0 +1,432 @@
+import bisect
+import calendar
+import re
+import sys
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, Generator, List, Set, Tuple
+
+
+class BirthdayIndex:
+    """
+    Calendar of birthdays bucketed by day of year (month, day).
+    Looking up a window touches only the buckets of the days inside it.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: Dict[Tuple[int, int], Set[str]] = {}
+
+    def add(self, name: str, birthday: date) -> None:
+        self._buckets.setdefault((birthday.month, birthday.day), set()).add(name)
+
+    def remove(self, name: str, birthday: date) -> None:
+        key = (birthday.month, birthday.day)
+        names = self._buckets.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._buckets[key]
+
+    def upcoming(self, start: date, days: int) -> Generator[Tuple[str, date], None, None]:
+        """
+        Iterate birthdays from start to start + days inclusive in calendar order.
+        People born on the 29th of February are celebrated on the 1st of March in non-leap years.
+        :return: (name, birthday date in the window)
+        """
+        # A window longer than a year would list the same birthday twice: it ends the day before the start's
+        # anniversary, the length of the year depends on the leap day.
+        next_year = date(start.year + 1, 3, 1) if (start.month, start.day) == (2, 29) else start.replace(
+            year=start.year + 1)
+        leap_day_listed = False
+        for offset in range(min(days, (next_year - start).days - 1) + 1):
+            day = start + timedelta(days=offset)
+
+            if (day.month, day.day) != (2, 29):
+                for name in sorted(self._buckets.get((day.month, day.day), ())):
+                    yield name, day
+
+            # A window from the 1st of March of a non-leap year may reach the 29th of February as well.
+            if (day.month, day.day) == (2, 29) or (day.month, day.day) == (3, 1) and not calendar.isleap(day.year):
+                if not leap_day_listed:
+                    leap_day_listed = True
+                    for name in sorted(self._buckets.get((2, 29), ())):
+                        yield name, day
+
+
+class SortedIndex:
+    """
+    Document keys ordered by a sortable value (e.g. a timestamp).
+    Range queries are a binary search for the bounds and a slice in between.
+    """
+
+    def __init__(self) -> None:
+        self._entries: List[Tuple[Any, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, value, key: str) -> None:
+        entry = (value, key)
+        # Values usually grow with time, so appending is the common case.
+        if not self._entries or self._entries[-1] <= entry:
+            self._entries.append(entry)
+        else:
+            bisect.insort(self._entries, entry)
+
+    def remove(self, value, key: str) -> None:
+        idx = bisect.bisect_left(self._entries, (value, key))
+        if idx < len(self._entries) and self._entries[idx] == (value, key):
+            del self._entries[idx]
+
+    def range(self, start, end) -> List[str]:
+        """
+        :return: keys with start <= value < end in ascending order of the value.
+        """
+        lo = bisect.bisect_left(self._entries, (start,))
+        hi = bisect.bisect_left(self._entries, (end,), lo)
+        return [key for _, key in self._entries[lo:hi]]
+
+
+class SortedKeys:
+    """
+    Set of string keys kept in sorted order, so any page of it is a slice.
+    New keys are buffered and merged on the next read, which keeps bulk loads O(n log n) instead of
+    paying a list insert per key.
+    """
+
+    _merge_threshold = 32
+
+    def __init__(self, keys=()) -> None:
+        self._keys: List[str] = sorted(set(keys))
+        self._pending: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys) + len(self._pending)
+
+    def __iter__(self):
+        self._merge()
+        return iter(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._pending:
+            return True
+        idx = bisect.bisect_left(self._keys, key)
+        return idx < len(self._keys) and self._keys[idx] == key
+
+    def add(self, key: str) -> None:
+        if key not in self:
+            self._pending.add(key)
+
+    def discard(self, key: str) -> None:
+        if key in self._pending:
+            self._pending.discard(key)
+            return
+        idx = bisect.bisect_left(self._keys, key)
+        if idx < len(self._keys) and self._keys[idx] == key:
+            del self._keys[idx]
+
+    def slice(self, offset: int = 0, limit: int = None) -> List[str]:
+        self._merge()
+        return self._keys[offset:] if limit is None else self._keys[offset:offset + limit]
+
+    def from_key(self, key: str):
+        """Iterate keys starting from the first one that is not less than the given key."""
+        self._merge()
+        for idx in range(bisect.bisect_left(self._keys, key), len(self._keys)):
+            yield self._keys[idx]
+
+    def settle(self) -> None:
+        """Merge buffered keys now instead of on the next read."""
+        self._merge()
+
+    def _merge(self) -> None:
+        if not self._pending:
+            return
+        if len(self._pending) < self._merge_threshold:
+            for key in self._pending:
+                bisect.insort(self._keys, key)
+        else:
+            # Timsort merges the already sorted run with the new keys in linear time plus sorting the new ones.
+            self._keys.extend(self._pending)
+            self._keys.sort()
+        self._pending.clear()
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Levenshtein distance between two strings, computed only up to max_distance.
+    :return: the distance or max_distance + 1 if it is larger.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return min(previous[-1], max_distance + 1)
+
+
+class NameIndex:
+    """
+    Case-insensitive index of names for search-as-you-type.
+
+    Prefix lookups binary search a sorted array of lower-cased names: the same queries a trie answers,
+    at a fraction of the memory a node per character costs for millions of names.
+    Misspelled names are found through trigrams: candidates sharing the most trigrams with the query
+    are ranked by bounded edit distance.
+    """
+
+    def __init__(self) -> None:
+        self._keys = SortedKeys()
+        # Lower-cased name -> names with that spelling, a tuple because there is usually just one.
+        self._names: Dict[str, Tuple[str, ...]] = {}
+        self._grams: Dict[str, Set[str]] = {}
+        # Keys added since the last fuzzy lookup. Their trigrams are indexed by the next one,
+        # so bulk loads that never search for misspelled names don't pay for them.
+        self._ungrammed: Set[str] = set()
+
+    @staticmethod
+    def grams(key: str) -> Set[str]:
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, name: str) -> None:
+        key = name.lower()
+        names = self._names.get(key)
+        if names is None:
+            self._names[key] = (name,)
+            self._keys.add(key)
+            self._ungrammed.add(key)
+        elif name not in names:
+            self._names[key] = names + (name,)
+
+    def remove(self, name: str) -> None:
+        key = name.lower()
+        names = self._names.get(key)
+        if names is None or name not in names:
+            return
+
+        names = tuple(other for other in names if other != name)
+        if names:
+            self._names[key] = names
+        else:
+            del self._names[key]
+            self._keys.discard(key)
+            if key in self._ungrammed:
+                self._ungrammed.discard(key)
+                return
+            for gram in self.grams(key):
+                keys = self._grams[gram]
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def prefix(self, prefix: str, limit: int) -> List[str]:
+        names = []
+        for key in self._keys.from_key(prefix.lower()):
+            if not key.startswith(prefix.lower()) or len(names) >= limit:
+                break
+            names.extend(sorted(self._names[key]))
+        return names[:limit]
+
+    def fuzzy(self, query: str, limit: int, max_distance: int = 2, candidates: int = 200) -> List[Tuple[int, str]]:
+        """
+        :return: up to limit (distance, name) pairs with distance <= max_distance, closest first.
+        """
+        self._index_grams()
+        key = query.lower()
+        query_grams = self.grams(key)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+
+        # Every edit changes at most three trigrams, closer names can't share fewer.
+        min_shared = len(query_grams) - 3 * max_distance
+        scored = []
+        for candidate, count in shared.most_common(candidates):
+            if count < min_shared:
+                break
+            distance = edit_distance(key, candidate, max_distance)
+            if distance <= max_distance:
+                scored.extend((distance, name) for name in self._names[candidate])
+        return sorted(scored)[:limit]
+
+    def settle(self) -> None:
+        """Do the work deferred to the next lookup now: merge new keys and index their trigrams."""
+        self._keys.settle()
+        self._index_grams()
+
+    def _index_grams(self) -> None:
+        grams = self._grams
+        for key in self._ungrammed:
+            for gram in self.grams(key):
+                keys = grams.get(gram)
+                if keys is None:
+                    grams[gram] = {key}
+                else:
+                    keys.add(key)
+        self._ungrammed.clear()
+
+
+class TextIndex:
+    """
+    Inverted index: term -> {document key -> positions of the term in the document}.
+
+    Query syntax understood by ``search``:
+        ``a b``          documents containing both terms (``AND`` between them may be written explicitly)
+        ``a OR b``       documents containing any of the terms; binds weaker than AND
+        ``pre*``         any term starting with the prefix
+        ``"a b"``        the terms as a phrase, one right after another
+    """
+
+    _token_re = re.compile(r'\w+')
+    _query_re = re.compile(r'"[^"]*"|\S+')
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[str, Tuple[int, ...]]] = {}
+        # Sorted vocabulary, lets prefix queries binary search for their first term.
+        self._terms: List[str] = []
+        self._documents: Dict[str, Tuple[str, ...]] = {}
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return cls._token_re.findall(text.lower())
+
+    def add(self, key: str, text: str) -> None:
+        if key in self._documents:
+            self.remove(key)
+
+        positions: Dict[str, List[int]] = {}
+        for position, term in enumerate(self.tokenize(text)):
+            positions.setdefault(term, []).append(position)
+
+        # Tuples and interned terms: every note keeps a few of these for as long as it exists,
+        # so they are stored without the spare capacity of lists and sets and without a string per occurrence.
+        terms = []
+        for term, term_positions in positions.items():
+            term = sys.intern(term)
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[key] = tuple(term_positions)
+            terms.append(term)
+
+        self._documents[key] = tuple(terms)
+
+    def remove(self, key: str) -> None:
+        for term in self._documents.pop(key, ()):
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def lookup(self, term: str) -> Set[str]:
+        return set(self._postings.get(term, ()))
+
+    def lookup_prefix(self, prefix: str) -> Set[str]:
+        keys = set()
+        for idx in range(bisect.bisect_left(self._terms, prefix), len(self._terms)):
+            term = self._terms[idx]
+            if not term.startswith(prefix):
+                break
+            keys.update(self._postings[term])
+        return keys
+
+    def lookup_phrase(self, terms: List[str]) -> Set[str]:
+        if not terms:
+            return set()
+
+        keys = self._intersect([self.lookup(term) for term in terms])
+        return {key for key in keys if self._has_phrase(key, terms)}
+
+    def search(self, query: str) -> Set[str]:
+        """
+        :param query: query in the syntax described in the class docstring.
+        :return: keys of matching documents.
+        """
+        result = set()
+        group = []
+
+        for token in self._query_re.findall(query) + ['OR']:
+            if token == 'OR':
+                if group:
+                    result |= self._intersect(group)
+                group = []
+            elif token == 'AND':
+                continue
+            elif token.startswith('"'):
+                group.append(self.lookup_phrase(self.tokenize(token)))
+            elif token.endswith('*'):
+                prefix = ''.join(self.tokenize(token))
+                group.append(self.lookup_prefix(prefix) if prefix else set())
+            else:
+                terms = self.tokenize(token)
+                group.append(self.lookup_phrase(terms) if len(terms) > 1 else self.lookup(''.join(terms)))
+
+        return result
+
+    @staticmethod
+    def _intersect(sets: List[Set[str]]) -> Set[str]:
+        # Start from the rarest term to keep the intermediate sets small.
+        sets = sorted(sets, key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    def _has_phrase(self, key: str, terms: List[str]) -> bool:
+        positions = set(self._postings[terms[0]][key])
+        for offset, term in enumerate(terms[1:], start=1):
+            positions &= {pos - offset for pos in self._postings[term][key]}
+            if not positions:
+                return False
+        return True
+
+
+def evaluate_boolean_query(query: str, lookup: Callable[[str], Set], universe: Callable[[], Set]) -> Set:
+    """
+    Evaluate a query like ``a AND b NOT c OR d`` with set operations.
+    NOT binds tighter than AND, AND (also implied between plain terms) tighter than OR.
+    :param lookup: returns the set of keys for a single term.
+    :param universe: returns all keys, used when a group consists of NOT terms only.
+    """
+    result = set()
+
+    for group in re.split(r'\s+OR\s+', query.strip()):
+        include, exclude = [], []
+        negate = False
+
+        for token in group.split():
+            if token == 'AND':
+                continue
+            if token == 'NOT':
+                negate = True
+                continue
+            (exclude if negate else include).append(lookup(token))
+            negate = False
+
+        if not include and not exclude:
+            continue
+
+        if include:
+            include.sort(key=len)
+            matches = set(include[0])
+            for keys in include[1:]:
+                matches.intersection_update(keys)
+        else:
+            matches = set(universe())
+
+        for keys in exclude:
+            matches.difference_update(keys)
+        result |= matches
+
+    return result
@@ -0,0 +1,131 @@
+import os
+import pickle
+import struct
+import zlib
+from typing import Any, Iterator, Tuple
+
+from src.codec import Codec
+from src.exceptions import DataFileError
+
+
+class Journal:
+    """
+    Append-only write-ahead log of Assistant mutations.
+
+    Every entry is a ``(seq, operation, args)`` tuple stored as a length + crc32 prefixed pickle frame,
+    so a frame torn by a crash is detected on replay and cut off instead of corrupting the session.
+    With a codec the pickle is encrypted and the payload is marked with a leading zero byte,
+    which a pickle never starts with. Unmarked entries are rejected by an encrypting codec: journals written
+    before encryption are replayed without one, once, by the migration to an encrypted snapshot.
+    The sequence number is encrypted with the entry, replay rejects entries out of order.
+    """
+
+    _frame_header = struct.Struct('<II')
+    _encoded = b'\x00'
+
+    def __init__(self, filename: str, compact_threshold: int = 1000, codec: Codec = None) -> None:
+        self.filename = filename
+        self.compact_threshold = compact_threshold
+        self.codec = codec
+        self.seq = 0
+        self.entries = 0
+        # Batches turn this off and flush once at the end instead of after every entry.
+        self.autoflush = True
+        self._file = None
+
+    def append(self, operation: str, args: Tuple[Any, ...]) -> None:
+        """
+        Append a single mutation to the end of the journal.
+        :param operation: name of the Assistant method that was called.
+        :param args: positional arguments the method was called with.
+        """
+        if self._file is None:
+            self._file = open(self.filename, 'ab')
+
+        self.seq += 1
+        payload = pickle.dumps((self.seq, operation, args), protocol=pickle.HIGHEST_PROTOCOL)
+        if self.codec is not None and not self.codec.identity:
+            payload = self._encoded + self.codec.encode(payload)
+        self._file.write(self._frame_header.pack(len(payload), zlib.crc32(payload)) + payload)
+        if self.autoflush:
+            self._file.flush()
+        self.entries += 1
+
+    def replay(self, target, after_seq: int = 0) -> int:
+        """
+        Re-apply logged mutations on the target.
+        :param target: Assistant object the operations are applied to.
+        :param after_seq: entries with sequence number up to this one are already in the snapshot.
+        :return: number of applied entries.
+        """
+        self.seq = after_seq
+        applied = 0
+        valid_size = 0
+
+        for seq, operation, args, end_offset in self._read():
+            valid_size = end_offset
+            # Entries are numbered one by one, which tells entries that were moved or dropped.
+            if seq <= after_seq and not applied:
+                continue
+            if seq != self.seq + 1:
+                raise DataFileError(f"'{self.filename}' is damaged, entry {self.seq + 1} is missing.")
+            getattr(target, operation)(*args)
+            self.seq = seq
+            applied += 1
+
+        # Cut off a frame that was torn by a crash so new entries are appended after valid data.
+        if os.path.exists(self.filename) and os.path.getsize(self.filename) > valid_size:
+            with open(self.filename, 'r+b') as f:
+                f.truncate(valid_size)
+
+        self.entries = applied
+        return applied
+
+    def flush(self) -> None:
+        """Hand buffered entries to the OS."""
+        if self._file is not None:
+            self._file.flush()
+
+    def sync(self) -> None:
+        """Force written entries to disk."""
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def reset(self) -> None:
+        """Drop all entries. Must be called only after they were compacted into a snapshot."""
+        self.close()
+        with open(self.filename, 'wb') as f:
+            os.fsync(f.fileno())
+        self.entries = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _read(self) -> Iterator[Tuple[int, str, tuple, int]]:
+        try:
+            f = open(self.filename, 'rb')
+        except FileNotFoundError:
+            return
+
+        with f:
+            while True:
+                header = f.read(self._frame_header.size)
+                if len(header) < self._frame_header.size:
+                    return
+
+                size, crc = self._frame_header.unpack(header)
+                payload = f.read(size)
+                if len(payload) < size or zlib.crc32(payload) != crc:
+                    return
+
+                if payload[:1] == self._encoded:
+                    if self.codec is None:
+                        raise DataFileError(f"'{self.filename}' is encrypted, a password is required.")
+                    payload = self.codec.decode(payload[1:])
+                elif self.codec is not None and self.codec.encrypted:
+                    raise DataFileError(f"'{self.filename}' is damaged, an entry isn't encrypted.")
+                seq, operation, args = pickle.loads(payload)
+                yield seq, operation, args, f.tell()
@@ -1,12 +1,16 @@
 import copy
 from datetime import datetime
 
+from src.slotted import Slotted
 
-class Note:
-    def __init__(self, title, content):
+
+class Note(Slotted):
+    __slots__ = ('title', 'content', 'created_at', 'modified_at', 'tags')
+
+    def __init__(self, title, content, created_at: datetime = None):
         self.title = title
         self.content = self.format_note(content)
-        self.created_at = datetime.now()
+        self.created_at = created_at or datetime.now()
         self.modified_at = None
         self.tags = []
 
@@ -16,7 +20,7 @@ class Note:
     def __copy__(self):
         cls = self.__class__
         cpy = cls.__new__(cls)
-        cpy.__dict__.update(self.__dict__)
+        cpy.__setstate__(self.__getstate__())
         # Let just move tags without creating new copy
         cpy.tags = copy.copy(self.tags)
         return cpy
@@ -25,3 +29,8 @@ class Note:
     def format_note(note, line_length=50):
         """Format the note to have new lines every `line_length` characters."""
         return '\n'.join([note[i:i + line_length] for i in range(0, len(note), line_length)])
+
+    @staticmethod
+    def unformat_note(note, line_length=50):
+        """Revert `format_note` to get the text as it was entered."""
+        return ''.join([note[i:i + line_length] for i in range(0, len(note), line_length + 1)])
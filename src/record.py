@@ -1,63 +1,126 @@
-from datetime import date
-from typing import List
-
-from src.fields import Name, Address, Phone, Email, Birthday
-from src.note import Note
-
-
-class Record:
-    def __init__(self, name: Name, phone: Phone, email: Email = None, address: Address = None,
-                 bday: Birthday = None) -> None:
-        self._name = name
-        self._address = address
-        self._email = email
-        self._birthday = bday
-        self._phones = [phone]
-        self._notes = []
-
-    @property
-    def phones(self):
-        return self._phones
-
-    @phones.setter
-    def phones(self, value: List[Phone]):
-        self._phones = value
-
-    @property
-    def name(self) -> str:
-        return self._name.value if self._name else ''
-
-    @name.setter
-    def name(self, value: str) -> None:
-        self._name = Name(value) if value else None
-
-    @property
-    def address(self) -> str:
-        return self._address.value if self._address else ''
-
-    @address.setter
-    def address(self, value: str):
-        self._address = Address(value) if value else None
-
-    @property
-    def email(self) -> str:
-        return self._email.value if self._email else ''
-
-    @email.setter
-    def email(self, value: str) -> None:
-        self._email = Email(value) if value else None
-
-    @property
-    def birthday(self) -> date:
-        return self._birthday.value if self._birthday else None
-
-    @birthday.setter
-    def birthday(self, value: str) -> None:
-        self._birthday = Birthday(value) if value else None
-
-    @property
-    def notes(self) -> List[Note]:
-        return self._notes
-
-    def __str__(self) -> str:
-        return f"{self._name}:{self._email}"
+from array import array
+from collections.abc import MutableSequence
+from datetime import date
+from typing import List
+
+from src.fields import Field, Name, Address, Phone, Email, Birthday
+from src.note import Note
+from src.slotted import Slotted
+
+
+class PhoneList(MutableSequence):
+    """
+    Phones of a record as a list of Phone fields, stored as integers in the record's array:
+    8 bytes per phone instead of a field object and a string. Phones have a fixed number
+    of digits, so leading zeros are restored by padding.
+    """
+
+    __slots__ = ('_numbers',)
+
+    def __init__(self, numbers: array) -> None:
+        self._numbers = numbers
+
+    @staticmethod
+    def encode(phone: Phone) -> int:
+        return int(phone.value)
+
+    @staticmethod
+    def decode(number: int) -> Phone:
+        return Phone.trusted(str(number).zfill(Phone.required_num_of_digits))
+
+    @property
+    def numbers(self) -> array:
+        """The phones as stored, e.g. to copy them without decoding."""
+        return self._numbers
+
+    def __len__(self) -> int:
+        return len(self._numbers)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self.decode(number) for number in self._numbers[idx]]
+        return self.decode(self._numbers[idx])
+
+    def __setitem__(self, idx: int, phone: Phone) -> None:
+        self._numbers[idx] = self.encode(phone)
+
+    def __delitem__(self, idx) -> None:
+        del self._numbers[idx]
+
+    def insert(self, idx: int, phone: Phone) -> None:
+        self._numbers.insert(idx, self.encode(phone))
+
+    def __iter__(self):
+        return map(self.decode, self._numbers)
+
+
+class Record(Slotted):
+    # Field values are kept as plain values, the Field objects only validate them on the way in.
+    __slots__ = ('_name', '_address', '_email', '_birthday', '_phones', '_notes')
+
+    def __init__(self, name: Name, phone: Phone, email: Email = None, address: Address = None,
+                 bday: Birthday = None) -> None:
+        self._name = name.value if name else None
+        self._address = address.value if address else None
+        self._email = email.value if email else None
+        self._birthday = bday.value if bday else None
+        self._phones = array('Q', [PhoneList.encode(phone)] if phone else [])
+        # Most records have no notes, the list is created with the first one.
+        self._notes = None
+
+    def __setstate__(self, state: dict) -> None:
+        # Records pickled before slots hold Field objects and a list of phones.
+        state = {attr: value.value if isinstance(value, Field) else value for attr, value in state.items()}
+        if isinstance(state.get('_phones'), list):
+            state['_phones'] = array('Q', [PhoneList.encode(phone) for phone in state['_phones'] if phone])
+        state.setdefault('_notes', None)
+        super().__setstate__(state)
+
+    @property
+    def phones(self) -> PhoneList:
+        return PhoneList(self._phones)
+
+    @phones.setter
+    def phones(self, value: List[Phone]):
+        self._phones = array('Q', [PhoneList.encode(phone) for phone in value if phone])
+
+    @property
+    def name(self) -> str:
+        return self._name or ''
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._name = Name(value).value if value else None
+
+    @property
+    def address(self) -> str:
+        return self._address or ''
+
+    @address.setter
+    def address(self, value: str):
+        self._address = Address(value).value if value else None
+
+    @property
+    def email(self) -> str:
+        return self._email or ''
+
+    @email.setter
+    def email(self, value: str) -> None:
+        self._email = Email(value).value if value else None
+
+    @property
+    def birthday(self) -> date:
+        return self._birthday
+
+    @birthday.setter
+    def birthday(self, value: str) -> None:
+        self._birthday = Birthday(value).value if value else None
+
+    @property
+    def notes(self) -> List[Note]:
+        if self._notes is None:
+            self._notes = []
+        return self._notes
+
+    def __str__(self) -> str:
+        return f"{self._name}:{self._email}"
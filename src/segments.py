@@ -0,0 +1,362 @@
+"""
+Segmented snapshot file read through mmap.
+
+Every record and note is pickled into its own segment. Segments are written one after another
+into a stream::
+
+    meta segment | record segments | note segments | key indexes | top index
+
+The top index holds the snapshot header and the location of the meta segment (tags and other small state)
+and of the key index of records and of notes. A key index is the list of keys in insertion order,
+the offsets of their segments in the stream and the keys' sorted order, so a key is found by binary search
+without building a dict.
+
+The stream is cut into blocks of BLOCK_SIZE bytes, every block is encoded by a Codec (compressed and
+encrypted) on its own. A file looks like::
+
+    MAGIC | blocks | trailer | tag | footer
+
+The footer at the very end points to the unencrypted trailer: the codec descriptor as JSON followed by the file
+offsets of the blocks, the location of the top index in the stream and a random id of the file. The key is
+derived from the descriptor, then the tag authenticates the trailer and the footer. Every block is authenticated
+together with the file id and its number, so blocks can't be moved, dropped or copied from another file.
+Version 2 files have no tag and their blocks are authenticated on their own. Version 1 files have no blocks,
+the stream is the file itself.
+
+Loading reads only the footer, the trailer, the top index and the meta segment. Records and notes are unpickled
+when they are first accessed, key indexes when a key is first looked up. Only the blocks holding them are decoded.
+"""
+import io
+import mmap
+import os
+import pickle
+import struct
+from array import array, _array_reconstructor
+from bisect import bisect_left
+from functools import lru_cache
+from collections.abc import Mapping, MutableMapping
+from datetime import date, datetime
+from itertools import repeat
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from src.codec import Codec, dump_descriptor, load_descriptor
+from src.exceptions import DataFileError
+from src.note import Note
+from src.record import Record
+from src.tag import Tag
+
+MAGIC_V1 = b'ASSTSEG\x01'
+MAGIC_V2 = b'ASSTSEG\x02'
+MAGIC = b'ASSTSEG\x03'
+BLOCK_SIZE = 64 * 1024
+_footer = struct.Struct('<QQ8s')
+_descriptor_size = struct.Struct('<I')
+
+# Classes and functions segments refer to by number instead of by module and name, which would be
+# repeated in every segment. Numbers are stored in files: only append to the tuple.
+_globals = (Record, Note, date, datetime, array, _array_reconstructor)
+_global_ids = {id(obj): num for num, obj in enumerate(_globals)}
+
+
+class _SegmentPickler(pickle.Pickler):
+    # Notes share Tag objects with the tags dict. A segment keeps only a reference to the tag,
+    # which is resolved to the live tag when the segment is loaded.
+    def persistent_id(self, obj):
+        if type(obj) is Tag and obj.id is not None:
+            return obj.id, obj.name
+        return _global_ids.get(id(obj))
+
+
+class _SegmentUnpickler(pickle.Unpickler):
+    def __init__(self, data: bytes, tags: Callable[[int], Tag | None]) -> None:
+        super().__init__(io.BytesIO(data))
+        self._tags = tags
+
+    def persistent_load(self, pid):
+        if isinstance(pid, int):
+            return _globals[pid]
+        tag_id, name = pid
+        return self._tags(tag_id) or Tag(name, tag_id)
+
+
+class SegmentMap(MutableMapping):
+    """
+    Dict of records or notes backed by segments of a snapshot file.
+    Values are unpickled on first access and kept, keys added or removed later are tracked in memory.
+    Iteration order is the order of the snapshot followed by the keys added since, like a dict's.
+
+    Values changed in place must be reported with changed(), segments of all other values are copied
+    to the next snapshot as they are.
+    """
+
+    def __init__(self, source: 'SegmentFile', index_span: Tuple[int, int]) -> None:
+        self._source = source
+        self._index_span = index_span
+        self._keys = None
+        self._offsets = None
+        self._order = None
+        # Values of snapshot keys that were loaded or replaced.
+        self._cache = {}
+        # Snapshot keys whose segment is out of date.
+        self._changed = set()
+        # Snapshot keys that were removed, or removed and added again at the end.
+        self._dropped = set()
+        self._extra = {}
+
+    def _load_index(self) -> None:
+        if self._keys is None:
+            keys, self._offsets, self._order = self._source.load_pickle(*self._index_span)
+            # Set last, it marks the index as loaded for concurrent readers.
+            self._keys = keys
+
+    def _position(self, key) -> int | None:
+        self._load_index()
+        idx = bisect_left(self._order, key, key=self._keys.__getitem__)
+        if idx < len(self._order) and self._keys[self._order[idx]] == key:
+            return self._order[idx]
+        return None
+
+    def __getitem__(self, key):
+        if key in self._extra:
+            return self._extra[key]
+        if key in self._cache:
+            return self._cache[key]
+        if key in self._dropped:
+            raise KeyError(key)
+
+        pos = self._position(key)
+        if pos is None:
+            raise KeyError(key)
+        # Readers loading the same value at once all get the one that is kept.
+        return self._cache.setdefault(key, self._source.load_segment(self._offsets[pos], self._offsets[pos + 1]))
+
+    def __setitem__(self, key, value) -> None:
+        if key in self._extra or key in self._dropped or (key not in self._cache and self._position(key) is None):
+            self._extra[key] = value
+        else:
+            self._cache[key] = value
+            self._changed.add(key)
+
+    def changed(self, key) -> None:
+        """Report that the value of the key was modified in place."""
+        self._changed.add(key)
+
+    def segments(self) -> Iterator[Tuple[Any, bytes | None]]:
+        """:return: (key, pickled segment or None if the value must be pickled again) in iteration order."""
+        self._load_index()
+        offsets, skip = self._offsets, self._dropped | self._changed
+        for pos, key in enumerate(self._keys):
+            if key not in skip:
+                yield key, self._source.read(offsets[pos], offsets[pos + 1])
+            elif key not in self._dropped:
+                yield key, None
+        for key in self._extra:
+            yield key, None
+
+    def __delitem__(self, key) -> None:
+        if key in self._extra:
+            del self._extra[key]
+        elif key not in self._dropped and (key in self._cache or self._position(key) is not None):
+            self._dropped.add(key)
+            self._cache.pop(key, None)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self._extra or key in self._cache:
+            return True
+        return key not in self._dropped and self._position(key) is not None
+
+    def __iter__(self) -> Iterator:
+        self._load_index()
+        if self._dropped:
+            yield from (key for key in self._keys if key not in self._dropped)
+        else:
+            yield from self._keys
+        yield from self._extra
+
+    def __len__(self) -> int:
+        self._load_index()
+        return len(self._keys) - len(self._dropped) + len(self._extra)
+
+    def __reduce__(self):
+        # Pickled, e.g. with the whole Assistant, as a plain dict.
+        return dict, (list(self.items()),)
+
+
+class SegmentFile:
+    """Read-only view of a snapshot file. The mapping stays valid after the file is replaced by a newer one."""
+
+    def __init__(self, filename: str, codec: Callable[[Dict[str, Any]], Codec] = None) -> None:
+        """
+        :param codec: returns the codec for the descriptor stored in the file, e.g. deriving the key from a password.
+                      By default only unencrypted files can be read.
+        """
+        with open(filename, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic = self._mm[:len(MAGIC)]
+        if magic not in (MAGIC, MAGIC_V2, MAGIC_V1) or len(self._mm) < len(MAGIC) + _footer.size:
+            raise DataFileError(f"'{filename}' is not a segmented snapshot.")
+        footer = self._mm[-_footer.size:]
+        trailer_offset, trailer_size, footer_magic = _footer.unpack(footer)
+        trailer_end = trailer_offset + trailer_size
+        if footer_magic != magic or trailer_end > len(self._mm) - _footer.size:
+            raise DataFileError(f"'{filename}' is truncated.")
+
+        codec = codec or (lambda descriptor: Codec.from_descriptor(descriptor, None))
+        # Blocks of version 2 files are authenticated without their position.
+        self._file_id = b''
+        if magic == MAGIC_V1:
+            self.codec = Codec()
+            self._blocks = None
+            index_span = (trailer_offset, trailer_end)
+        elif magic == MAGIC_V2:
+            trailer = pickle.loads(self._mm[trailer_offset:trailer_end])
+            self.codec = codec(trailer['codec'])
+            self._blocks = trailer['blocks']
+            index_span = trailer['index']
+        else:
+            trailer = self._mm[trailer_offset:trailer_end]
+            (size,) = _descriptor_size.unpack_from(trailer)
+            self.codec = codec(load_descriptor(trailer[_descriptor_size.size:_descriptor_size.size + size]))
+            self.codec.verify(trailer + footer, self._mm[trailer_end:-_footer.size])
+            trailer = pickle.loads(trailer[_descriptor_size.size + size:])
+            self._blocks = trailer['blocks']
+            self._file_id = trailer['file_id']
+            index_span = trailer['index']
+        # Segments are small and read in file order, a few decoded blocks serve many of them.
+        self._block = lru_cache(maxsize=16)(self._decode_block)
+
+        self.index = self.load_pickle(*index_span)
+        # Set by the owner of the data, the resolver of tag references in segments.
+        self.tags: Callable[[int], Tag | None] = lambda tag_id: None
+
+    def _decode_block(self, num: int) -> bytes:
+        return self.codec.decode(self._mm[self._blocks[num]:self._blocks[num + 1]], _block_id(self._file_id, num))
+
+    def read(self, start: int, end: int) -> bytes:
+        """Bytes of the stream from start to end."""
+        if self._blocks is None:
+            return self._mm[start:end]
+        if self.codec.identity:
+            return self._mm[self._blocks[0] + start:self._blocks[0] + end]
+        if end <= start:
+            return b''
+
+        first, last = start // BLOCK_SIZE, (end - 1) // BLOCK_SIZE
+        start, end = start - first * BLOCK_SIZE, end - first * BLOCK_SIZE
+        if first == last:
+            return self._block(first)[start:end]
+        return b''.join(map(self._block, range(first, last + 1)))[start:end]
+
+    def load_pickle(self, start: int, end: int) -> Any:
+        return pickle.loads(self.read(start, end))
+
+    def load_segment(self, start: int, end: int) -> Any:
+        return _SegmentUnpickler(self.read(start, end), self.tags).load()
+
+    def segment_map(self, section: str) -> SegmentMap:
+        return SegmentMap(self, self.index[section])
+
+
+def _block_id(file_id: bytes, num: int) -> bytes:
+    """Data a block is authenticated with, empty for blocks of version 2 files."""
+    return file_id + num.to_bytes(8, 'little') if file_id else b''
+
+
+class _BlockWriter:
+    """File-like stream cut into blocks of BLOCK_SIZE bytes, every block is encoded on its own."""
+
+    def __init__(self, f, codec: Codec, file_id: bytes) -> None:
+        self._f = f
+        self._codec = codec
+        self._file_id = file_id
+        self._buffer = bytearray()
+        self._written = 0
+        # File offsets of the blocks followed by the end of the last one.
+        self.blocks = array('Q', [f.tell()])
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= BLOCK_SIZE:
+            full = len(self._buffer) // BLOCK_SIZE * BLOCK_SIZE
+            with memoryview(self._buffer) as view:
+                for start in range(0, full, BLOCK_SIZE):
+                    self._write_block(view[start:start + BLOCK_SIZE])
+            del self._buffer[:full]
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written + len(self._buffer)
+
+    def close(self) -> None:
+        if self._buffer:
+            self._write_block(self._buffer)
+            self._buffer = bytearray()
+
+    def _write_block(self, block) -> None:
+        self._f.write(self._codec.encode(bytes(block), _block_id(self._file_id, len(self.blocks) - 1)))
+        self._written += len(block)
+        self.blocks.append(self._f.tell())
+
+
+def is_segment_file(filename: str) -> bool:
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(MAGIC)) in (MAGIC, MAGIC_V2, MAGIC_V1)
+    except FileNotFoundError:
+        return False
+
+
+def dump(f, header: Dict[str, Any], meta: Dict[str, Any], sections: Dict[str, Mapping], codec: Codec = None) -> None:
+    """
+    Write a snapshot to a binary file opened for writing.
+    :param header: small dict read back as SegmentFile.index['header'], e.g. the format version.
+    :param meta: state loaded eagerly.
+    :param sections: name -> dict, each value gets its own segment. Unchanged segments of a SegmentMap
+                     are copied without unpickling them.
+    :param codec: compression and encryption of the blocks, none by default.
+    """
+    codec = codec or Codec()
+    f.write(MAGIC)
+    file_id = os.urandom(16)
+    out = _BlockWriter(f, codec, file_id)
+    index = {'header': header}
+
+    start = out.tell()
+    pickle.dump(meta, out, protocol=pickle.HIGHEST_PROTOCOL)
+    index['meta'] = (start, out.tell())
+
+    pickler = _SegmentPickler(out, protocol=pickle.HIGHEST_PROTOCOL)
+    key_indexes = {}
+    for section, mapping in sections.items():
+        keys: List = []
+        offsets = array('Q')
+        items = mapping.segments() if isinstance(mapping, SegmentMap) else zip(mapping, repeat(None))
+        for key, segment in items:
+            keys.append(key)
+            offsets.append(out.tell())
+            if segment is not None:
+                out.write(segment)
+                continue
+            pickler.dump(mapping[key])
+            # Every segment must unpickle on its own.
+            pickler.clear_memo()
+        offsets.append(out.tell())
+        key_indexes[section] = (keys, offsets, array('L', sorted(range(len(keys)), key=keys.__getitem__)))
+
+    for section, key_index in key_indexes.items():
+        start = out.tell()
+        pickle.dump(key_index, out, protocol=pickle.HIGHEST_PROTOCOL)
+        index[section] = (start, out.tell())
+
+    start = out.tell()
+    pickle.dump(index, out, protocol=pickle.HIGHEST_PROTOCOL)
+    index_span = (start, out.tell())
+    out.close()
+    descriptor = dump_descriptor(codec.descriptor)
+    trailer = _descriptor_size.pack(len(descriptor)) + descriptor + pickle.dumps(
+        {'blocks': out.blocks, 'index': index_span, 'file_id': file_id}, protocol=pickle.HIGHEST_PROTOCOL)
+    footer = _footer.pack(f.tell(), len(trailer), MAGIC)
+    f.write(trailer + codec.sign(trailer + footer) + footer)
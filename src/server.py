@@ -0,0 +1,207 @@
+"""
+Network access to one Assistant for many clients at once.
+
+The protocol is line based: a client sends a command line, the same as a line of a batch file, e.g.
+'find-by-phone --phone 0123456789', and gets back one line of JSON::
+
+    {"ok": true, "output": "<what the command printed>", "message": "<its status message>"}
+
+'exit' or 'close' ends the connection, not the server. Commands reading or writing files, 'import' and 'export',
+are refused: they would work with the server's files, with the permissions of the server's user.
+
+A multi-user server holds the data of many users, see src.tenancy. A connection starts with
+'login --email <email> --password <password>' or 'signup ...' and its commands then work with that user's data.
+'server-stats' returns the cache metrics as JSON output.
+
+The event loop only transfers requests and replies. Commands, logins (a slow password hash, loading the data)
+and saves run in worker threads, the data's locks keep them consistent, see src.concurrency.
+"""
+import asyncio
+import functools
+import io
+import json
+import shlex
+import time
+from typing import Callable, Dict, List, Tuple
+
+from src import commands
+from src.assistant import Assistant
+from src.cmd_handlers import BaseCommandHandler, HandlerResponse, UnknownRecordCommandHandler
+from src.cmd_parser import CommandParser
+from src.concurrency import SharedAssistant
+from src.tenancy import Tenant, TenantCache
+from src.validators import is_valid_email
+
+
+class LoginCommandHandler(BaseCommandHandler):
+    """'login' or 'signup' with --email and --password arguments on a multi-user server."""
+
+    def __init__(self, tenants: TenantCache, args: List[str], signup: bool = False) -> None:
+        super().__init__(None, args, interactive=False)
+        self._tenants = tenants
+        self._signup = signup
+        self.tenant: Tenant | None = None
+
+    def handle_input(self) -> HandlerResponse:
+        try:
+            email = self._ask('email', 'Enter email address: ')
+            password = self._ask('password', 'Enter password: ')
+            if self._signup:
+                if not is_valid_email(email):
+                    return HandlerResponse(HandlerResponse.Status.CONTINUE, ValueError("Incorrect email format"))
+                if len(password) < 8:
+                    return HandlerResponse(HandlerResponse.Status.CONTINUE,
+                                           ValueError("Password should be longer than 8 characters!"))
+
+            self.tenant = self._tenants.acquire(email, password, create=self._signup)
+            msg = "You have registered successfully!" if self._signup else "Logged in Successfully!"
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, msg)
+        except Exception as e:
+            return HandlerResponse(HandlerResponse.Status.CONTINUE, e)
+
+
+class CommandServer:
+    def __init__(self, data: Assistant = None, after_command: Callable[[], None] = None,
+                 tenants: TenantCache = None) -> None:
+        """
+        :param data: data of the only user, or None for a multi-user server.
+        :param after_command: called after every command that may change the data, still holding the write lock,
+                              e.g. to autosave a long running server.
+        :param tenants: data of the users of a multi-user server, autosaved after their commands.
+        """
+        self._data = data
+        self._shared = SharedAssistant(data) if data is not None else None
+        self._after_command = after_command
+        self._tenants = tenants
+        self.requests = 0
+        self.clients = 0
+
+    def execute(self, cmd: str, shared: SharedAssistant = None, after_command: Callable[[], None] = None) -> Dict:
+        """
+        Run a single command without prompting. Blocks while another thread holds the data, the server calls it
+        from worker threads.
+        Queries (see commands.Command) run under the read lock of the data, side by side, any other command
+        under the write lock, so it sees no changes made by another one half-way through.
+        :param shared: data of the user, the only user's by default.
+        :param after_command: replaces the server's after_command.
+        """
+        shared = shared or self._shared
+        after_command = after_command or self._after_command
+        spec = commands.lookup(cmd.split(maxsplit=1)[0])
+        query = spec is not None and spec.query
+
+        out = io.StringIO()
+        with shared.read() if query else shared.write() as data:
+            handler = CommandParser.parse(cmd, data, interactive=False, out=out, remote=True)
+            response = handler.handle_input()
+            if not query and after_command is not None:
+                after_command()
+
+        return self._result(handler, response, out.getvalue())
+
+    @staticmethod
+    def _result(handler: BaseCommandHandler, response: HandlerResponse, output: str = '') -> Dict:
+        # Handlers report errors as the exception object instead of raising it.
+        failed = isinstance(response.msg, Exception) or isinstance(handler, UnknownRecordCommandHandler)
+        return {
+            'ok': not failed,
+            'output': output,
+            'message': str(response.msg) if response.msg else '',
+            'finish': response.status == HandlerResponse.Status.FINISH,
+        }
+
+    def _session_command(self, cmd: str, tenant: Tenant | None) -> Tuple[Dict, Tenant | None]:
+        """
+        Commands of a multi-user server run before the user's own commands.
+        :return: result and the tenant of the connection from now on.
+        """
+        name, *args = shlex.split(cmd) or ['']
+        if name == 'server-stats':
+            stats = dict(self._tenants.stats(), requests=self.requests, clients=self.clients)
+            return {'ok': True, 'output': json.dumps(stats), 'message': '', 'finish': False}, tenant
+        if name not in ('login', 'signup'):
+            if name in ('exit', 'close'):
+                return {'ok': True, 'output': '', 'message': '', 'finish': True}, tenant
+            return {'ok': False, 'output': '', 'message': "Log in or sign up first.", 'finish': False}, tenant
+
+        handler = LoginCommandHandler(self._tenants, args, signup=name == 'signup')
+        response = handler.handle_input()
+        if handler.tenant is not None:
+            if tenant is not None:
+                self._tenants.release(tenant)
+            tenant = handler.tenant
+        return self._result(handler, response), tenant
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        self.clients += 1
+        tenant = None
+        try:
+            while line := await reader.readline():
+                cmd = line.decode('utf-8', errors='replace').strip()
+                if not cmd:
+                    continue
+
+                if self._tenants is None:
+                    result = await loop.run_in_executor(None, self.execute, cmd)
+                    self.requests += 1
+                elif tenant is None or cmd.split(maxsplit=1)[0] in ('login', 'signup', 'server-stats'):
+                    try:
+                        result, tenant = await loop.run_in_executor(None, self._session_command, cmd, tenant)
+                    except ValueError as e:  # unbalanced quotes
+                        result = {'ok': False, 'output': '', 'message': str(e), 'finish': False}
+                else:
+                    result = await loop.run_in_executor(None, self.execute, cmd, tenant.shared,
+                                                        functools.partial(tenant.manager.autosave, tenant.data))
+                    self.requests += 1
+                finish = result.pop('finish')
+                writer.write(json.dumps(result).encode() + b'\n')
+                await writer.drain()
+                if finish:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.clients -= 1
+            if tenant is not None:
+                # Unloading the least recently used data saves it.
+                await loop.run_in_executor(None, self._tenants.release, tenant)
+            writer.close()
+
+    async def serve(self, address: str, ready: Callable[[str], None] = None) -> None:
+        """
+        Serve until cancelled.
+        :param address: 'host:port' or ':port' for TCP on localhost, anything else is a Unix socket path.
+        :param ready: called with the address once the server accepts connections.
+        """
+        host, sep, port = address.rpartition(':')
+        if sep and port.isdigit():
+            server = await asyncio.start_server(self.handle_client, host or '127.0.0.1', int(port))
+        else:
+            server = await asyncio.start_unix_server(self.handle_client, address)
+
+        async with server:
+            if ready is not None:
+                ready(address)
+            await server.serve_forever()
+
+
+def run_server(data: Assistant | None, address: str, after_command: Callable[[], None] = None,
+               tenants: TenantCache = None) -> int:
+    """
+    Serve commands until interrupted with Ctrl-C. The data of a multi-user server is saved on the way out.
+    :return: number of executed requests.
+    """
+    server = CommandServer(data, after_command, tenants)
+    started = time.monotonic()
+    try:
+        asyncio.run(server.serve(address, lambda addr: print(f"Serving on {addr}, press Ctrl-C to stop.")))
+    except KeyboardInterrupt:
+        pass
+    print(f"Served {server.requests} requests in {time.monotonic() - started:.0f} s.")
+    if tenants is not None:
+        stats = tenants.stats()
+        print(f"Users' data loaded {stats['misses']} times, reused {stats['hits']} times "
+              f"({stats['hit_ratio']:.0%}), unloaded {stats['evictions']} times.")
+        tenants.close()
+    return server.requests
@@ -0,0 +1,26 @@
+from typing import Tuple
+
+
+class Slotted:
+    """
+    Base of classes keeping their attributes in __slots__ instead of a per-instance __dict__.
+    Objects are pickled as a dict of attributes, the same state objects pickled before
+    the classes had slots carry, so both load the same way.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def _slot_names(cls) -> Tuple[str, ...]:
+        names = cls.__dict__.get('_all_slots')
+        if names is None:
+            names = tuple(name for klass in reversed(cls.__mro__) for name in klass.__dict__.get('__slots__', ()))
+            cls._all_slots = names
+        return names
+
+    def __getstate__(self) -> dict:
+        return {name: getattr(self, name) for name in self._slot_names() if hasattr(self, name)}
+
+    def __setstate__(self, state: dict) -> None:
+        for name, value in state.items():
+            setattr(self, name, value)
@@ -0,0 +1,612 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
+from typing import TYPE_CHECKING, List, Generator, Tuple
+
+from src.assistant import Assistant
+from src.fields import Name, Phone, Address, Email, Birthday
+from src.indexes import NameIndex, TextIndex, edit_distance, evaluate_boolean_query
+from src.note import Note
+from src.record import Record
+from src.tag import Tag
+
+if TYPE_CHECKING:
+    from prettytable import PrettyTable
+
+
+class SQLiteAssistant(Assistant):
+    """
+    Assistant that keeps records, notes and tags in a local SQLite file instead of in-memory dicts.
+    Nothing is loaded up front: every call is answered by an (indexed) query and changes are committed immediately.
+    """
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS records (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            email TEXT,
+            address TEXT,
+            birthday TEXT
+        );
+        CREATE INDEX IF NOT EXISTS records_bday_idx ON records (substr(birthday, 6)) WHERE birthday IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS records_name_key_idx ON records (name_key(name));
+        CREATE INDEX IF NOT EXISTS records_birthday_idx ON records (birthday) WHERE birthday IS NOT NULL;
+        CREATE INDEX IF NOT EXISTS records_domain_idx ON records (email_domain(email)) WHERE email IS NOT NULL;
+
+        CREATE TABLE IF NOT EXISTS record_grams (
+            gram TEXT NOT NULL,
+            record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS record_grams_gram_idx ON record_grams (gram, record_id);
+        CREATE INDEX IF NOT EXISTS record_grams_record_idx ON record_grams (record_id);
+
+        CREATE TABLE IF NOT EXISTS phones (
+            record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            phone TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS phones_phone_idx ON phones (phone);
+        CREATE INDEX IF NOT EXISTS phones_record_idx ON phones (record_id, position);
+
+        CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL UNIQUE,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            modified_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS notes_created_idx ON notes (created_at);
+        CREATE INDEX IF NOT EXISTS notes_modified_idx ON notes (modified_at) WHERE modified_at IS NOT NULL;
+        CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5 (title, body);
+
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+
+        CREATE TABLE IF NOT EXISTS note_tags (
+            note_id INTEGER NOT NULL REFERENCES notes (id) ON DELETE CASCADE,
+            tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+            PRIMARY KEY (note_id, tag_id)
+        );
+        CREATE INDEX IF NOT EXISTS note_tags_tag_idx ON note_tags (tag_id, note_id);
+
+        CREATE TABLE IF NOT EXISTS record_notes (
+            id INTEGER PRIMARY KEY,
+            record_id INTEGER NOT NULL REFERENCES records (id) ON DELETE CASCADE,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            modified_at TEXT
+        );
+        CREATE INDEX IF NOT EXISTS record_notes_record_idx ON record_notes (record_id);
+
+        CREATE TABLE IF NOT EXISTS record_note_tags (
+            record_note_id INTEGER NOT NULL REFERENCES record_notes (id) ON DELETE CASCADE,
+            tag_id INTEGER NOT NULL REFERENCES tags (id) ON DELETE CASCADE,
+            PRIMARY KEY (record_note_id, tag_id)
+        );
+    """
+
+    # Stored in the file's user_version once the tables of an older database are indexed,
+    # so the backfill scans run on the first open only.
+    _schema_version = 1
+
+    # Statements of one connection run one at a time.
+    concurrent_reads = False
+
+    def __init__(self, filename: str) -> None:
+        super().__init__()
+        self.filename = filename
+        # The server runs commands in worker threads, one at a time for this storage, see concurrent_reads.
+        self._conn = sqlite3.connect(filename, check_same_thread=False)
+        self._batch_depth = 0
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.create_function('unformat_note', 1, Note.unformat_note, deterministic=True)
+        self._conn.create_function('name_key', 1, str.lower, deterministic=True)
+        self._conn.create_function('email_domain', 1, self._email_domain, deterministic=True)
+        with self._conn:
+            self._conn.executescript(self._schema)
+            if self._scalar('PRAGMA user_version') < self._schema_version:
+                self._migrate()
+
+    def _migrate(self) -> None:
+        """Index the rows of a database created before the full-text and name trigram tables existed."""
+        self._conn.execute(
+            'INSERT INTO notes_fts (rowid, title, body) SELECT id, title, unformat_note(content) FROM notes '
+            'WHERE id NOT IN (SELECT rowid FROM notes_fts)')
+        for rec_id, name in self._conn.execute(
+                'SELECT id, name FROM records WHERE id NOT IN (SELECT record_id FROM record_grams)').fetchall():
+            self._index_name(rec_id, name)
+        self._conn.execute(f'PRAGMA user_version = {self._schema_version}')
+
+    def __getstate__(self) -> dict:
+        raise TypeError(f"'{type(self).__name__}' is stored in '{self.filename}' and can't be pickled.")
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @contextmanager
+    def batch(self):
+        """
+        Run all mutations inside one transaction committed when the batch ends,
+        instead of a commit (and a WAL sync) per mutation.
+        """
+        if self._batch_depth:
+            self._batch_depth += 1
+        else:
+            self._conn.commit()
+            self._conn.execute('BEGIN')
+            self._batch_depth = 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                self._conn.commit()
+
+    @contextmanager
+    def _write(self):
+        """
+        Scope of a single mutation: its own transaction, or a savepoint inside a batch
+        so a failed mutation is undone without losing the rest of the batch.
+        """
+        if not self._batch_depth:
+            with self._conn:
+                yield
+            return
+
+        self._conn.execute('SAVEPOINT mutation')
+        try:
+            yield
+        except BaseException:
+            self._conn.execute('ROLLBACK TO mutation')
+            self._conn.execute('RELEASE mutation')
+            raise
+        self._conn.execute('RELEASE mutation')
+
+    def _scalar(self, query: str, *params):
+        row = self._conn.execute(query, params).fetchone()
+        return row[0] if row else None
+
+    def _record_id(self, name: str) -> int:
+        rec_id = self._scalar('SELECT id FROM records WHERE name = ?', name)
+        if rec_id is None:
+            raise KeyError(name)
+        return rec_id
+
+    def _note_id(self, title: str) -> int:
+        note_id = self._scalar('SELECT id FROM notes WHERE title = ?', title)
+        if note_id is None:
+            raise KeyError(title)
+        return note_id
+
+    def _tag_id(self, name: str) -> int:
+        tag_id = self._scalar('SELECT id FROM tags WHERE name = ?', name)
+        if tag_id is None:
+            raise KeyError(name)
+        return tag_id
+
+    @staticmethod
+    def _email_domain(email: str | None) -> str | None:
+        return email.rpartition('@')[2].lower() if email and '@' in email else None
+
+    @staticmethod
+    def _format_birthday(value: str | None) -> str | None:
+        return Birthday(value).value.isoformat() if value else None
+
+    def _build_record(self, rec_id: int, name: str, email: str, address: str, birthday: str) -> Record:
+        phones = [Phone(p) for (p,) in self._conn.execute(
+            'SELECT phone FROM phones WHERE record_id = ? ORDER BY position', (rec_id,))]
+
+        rec = Record(Name(name), phones[0] if phones else None)
+        rec.phones = phones
+        rec.email = email
+        rec.address = address
+        rec.birthday = date.fromisoformat(birthday).strftime('%d.%m.%Y') if birthday else None
+
+        for note_id, *note_row in self._conn.execute(
+                'SELECT id, title, content, created_at, modified_at FROM record_notes WHERE record_id = ? ORDER BY id',
+                (rec_id,)).fetchall():
+            rec.notes.append(self._build_note(*note_row, tags=self._conn.execute(
+                'SELECT t.name FROM record_note_tags rt JOIN tags t ON t.id = rt.tag_id WHERE rt.record_note_id = ?',
+                (note_id,))))
+        return rec
+
+    @staticmethod
+    def _build_note(title: str, content: str, created_at: str, modified_at: str | None, tags) -> Note:
+        note = Note(title, '', created_at=datetime.fromisoformat(created_at))
+        # Content is stored already formatted.
+        note.content = content
+        note.modified_at = datetime.fromisoformat(modified_at) if modified_at else None
+        note.tags = [Tag(name) for (name,) in tags]
+        return note
+
+    def _select_notes(self, where: str = '', params: tuple = (), order_by: str = 'n.id',
+                      offset: int = 0, limit: int = None) -> List[Note]:
+        rows = self._conn.execute(
+            f'SELECT n.id, n.title, n.content, n.created_at, n.modified_at FROM notes n {where} ORDER BY {order_by} '
+            'LIMIT ? OFFSET ?', (*params, -1 if limit is None else limit, offset)).fetchall()
+        return [self._build_note(*row, tags=self._conn.execute(
+            'SELECT t.name FROM note_tags nt JOIN tags t ON t.id = nt.tag_id WHERE nt.note_id = ? ORDER BY nt.rowid',
+            (note_id,))) for note_id, *row in rows]
+
+    def _index_name(self, rec_id: int, name: str) -> None:
+        self._conn.execute('DELETE FROM record_grams WHERE record_id = ?', (rec_id,))
+        self._conn.executemany('INSERT INTO record_grams (gram, record_id) VALUES (?, ?)',
+                               ((gram, rec_id) for gram in NameIndex.grams(name.lower())))
+
+    def record_exists(self, name: str) -> bool:
+        return self._scalar('SELECT 1 FROM records WHERE name = ?', name) is not None
+
+    def phone_exists(self, phone: str) -> bool:
+        return self._scalar('SELECT 1 FROM phones WHERE phone = ? LIMIT 1', phone) is not None
+
+    def find_records_by_phone(self, phone: str) -> List[Record]:
+        rows = self._conn.execute(
+            'SELECT DISTINCT r.id, r.name, r.email, r.address, r.birthday FROM phones p '
+            'JOIN records r ON r.id = p.record_id WHERE p.phone = ? ORDER BY r.name', (phone,)).fetchall()
+        return [self._build_record(*row) for row in rows]
+
+    def tag_exists(self, name: str) -> bool:
+        return self._scalar('SELECT 1 FROM tags WHERE name = ?', name) is not None
+
+    def add_record(self, name: Name, phone: Phone, email: Email = None, address: Address = None,
+                   birthday: Birthday = None) -> None:
+        with self._write():
+            self._conn.execute('DELETE FROM records WHERE name = ?', (str(name),))
+            cur = self._conn.execute(
+                'INSERT INTO records (name, email, address, birthday) VALUES (?, ?, ?, ?)',
+                (str(name), email.value if email else None, address.value if address else None,
+                 birthday.value.isoformat() if birthday else None))
+            self._conn.execute('INSERT INTO phones (record_id, position, phone) VALUES (?, 0, ?)',
+                               (cur.lastrowid, str(phone)))
+            self._index_name(cur.lastrowid, str(name))
+
+    def add_records(self, records: List[Tuple[Name, List[Phone], Email, Address, Birthday]]) -> None:
+        phone_rows, gram_rows = [], []
+        with self._write():
+            for name, phones, email, address, birthday in records:
+                self._conn.execute('DELETE FROM records WHERE name = ?', (str(name),))
+                rec_id = self._conn.execute(
+                    'INSERT INTO records (name, email, address, birthday) VALUES (?, ?, ?, ?)',
+                    (str(name), email.value if email else None, address.value if address else None,
+                     birthday.value.isoformat() if birthday else None)).lastrowid
+                phone_rows.extend((rec_id, pos, str(phone)) for pos, phone in enumerate(phones))
+                # Grams of a replaced record were deleted with it by the cascade.
+                gram_rows.extend((gram, rec_id) for gram in NameIndex.grams(str(name).lower()))
+
+            self._conn.executemany('INSERT INTO phones (record_id, position, phone) VALUES (?, ?, ?)', phone_rows)
+            self._conn.executemany('INSERT INTO record_grams (gram, record_id) VALUES (?, ?)', gram_rows)
+
+    def edit_record_phone(self, rec_name: str, old_phone: str, new_phone: str) -> None:
+        new_phone = Phone(new_phone).value
+        with self._write():
+            self._conn.execute('UPDATE phones SET phone = ? WHERE record_id = ? AND phone = ?',
+                               (new_phone, self._record_id(rec_name), old_phone))
+
+    def edit_record_email(self, rec_name: str, new_value: str) -> None:
+        new_value = Email(new_value).value if new_value else None
+        with self._write():
+            self._conn.execute('UPDATE records SET email = ? WHERE id = ?', (new_value, self._record_id(rec_name)))
+
+    def edit_record_address(self, rec_name: str, new_value: str) -> None:
+        with self._write():
+            self._conn.execute('UPDATE records SET address = ? WHERE id = ?',
+                               (new_value or None, self._record_id(rec_name)))
+
+    def edit_record_birthday(self, rec_name: str, new_value: str) -> None:
+        new_value = self._format_birthday(new_value)
+        with self._write():
+            self._conn.execute('UPDATE records SET birthday = ? WHERE id = ?', (new_value, self._record_id(rec_name)))
+
+    def edit_record_name(self, rec_name: str, new_value: str) -> None:
+        rec_id = self._record_id(rec_name)
+        with self._write():
+            self._conn.execute('UPDATE records SET name = ? WHERE id = ?', (new_value, rec_id))
+            self._index_name(rec_id, new_value)
+
+    def remove_record(self, rec_name: str) -> None:
+        with self._write():
+            self._conn.execute('DELETE FROM records WHERE id = ?', (self._record_id(rec_name),))
+
+    def get_record(self, name: str) -> Record:
+        row = self._conn.execute(
+            'SELECT id, name, email, address, birthday FROM records WHERE name = ?', (name,)).fetchone()
+        return self._build_record(*row) if row else None
+
+    def search_records(self, query: str, limit: int = 10) -> List[Record]:
+        key = query.lower()
+        names = [name for (name,) in self._conn.execute(
+            'SELECT name FROM records WHERE name_key(name) >= ? AND name_key(name) < ? ORDER BY name_key(name), name '
+            'LIMIT ?', (key, key + '\U0010ffff', limit))]
+
+        if len(names) < limit:
+            grams = list(NameIndex.grams(key))
+            candidates = self._conn.execute(
+                f'SELECT r.name FROM record_grams g JOIN records r ON r.id = g.record_id '
+                f'WHERE g.gram IN ({", ".join("?" * len(grams))}) '
+                f'GROUP BY g.record_id ORDER BY COUNT(*) DESC, r.name LIMIT 200', grams).fetchall()
+
+            scored = sorted((edit_distance(key, name.lower(), 2), name) for (name,) in candidates)
+            found = set(names)
+            names += [name for distance, name in scored if distance <= 2 and name not in found]
+
+        return [self.get_record(name) for name in names[:limit]]
+
+    def get_records(self) -> List[Record]:
+        return list(self.iter_records())
+
+    def iter_records(self, offset: int = 0, limit: int = None) -> Generator[Record, None, None]:
+        # Rows are fetched from the cursor as they are consumed.
+        cursor = self._conn.execute('SELECT id, name, email, address, birthday FROM records ORDER BY id LIMIT ? OFFSET ?',
+                                    (-1 if limit is None else limit, offset))
+        for row in cursor:
+            yield self._build_record(*row)
+
+    def count_records(self) -> int:
+        return self._scalar('SELECT COUNT(*) FROM records')
+
+    def add_phone(self, name: str, phone: str) -> None:
+        phone = Phone(phone).value
+        rec_id = self._record_id(name)
+        with self._write():
+            self._conn.execute(
+                'INSERT INTO phones (record_id, position, phone) '
+                'SELECT ?, COALESCE(MAX(position) + 1, 0), ? FROM phones WHERE record_id = ?',
+                (rec_id, phone, rec_id))
+
+    def remove_phone(self, name: str, phone: str) -> None:
+        with self._write():
+            self._conn.execute('DELETE FROM phones WHERE record_id = ? AND phone = ?', (self._record_id(name), phone))
+
+    def get_records_with_upcoming_birthday(self, days: int = 7) -> Generator[Tuple[str, date], None, None]:
+        today = datetime.now().date()
+        end_date = today + timedelta(days=min(days, 364))
+
+        start_md, end_md = today.strftime('%m-%d'), end_date.strftime('%m-%d')
+        if days >= 364:
+            where, params = '1', ()
+        elif start_md <= end_md:
+            where, params = 'substr(birthday, 6) BETWEEN ? AND ?', (start_md, end_md)
+        else:
+            where, params = '(substr(birthday, 6) >= ? OR substr(birthday, 6) <= ?)', (start_md, end_md)
+        # 29th of February is celebrated on the 1st of March in non-leap years.
+        where = f"({where} OR substr(birthday, 6) = '02-29')"
+
+        rows = self._conn.execute(
+            f'SELECT name, birthday FROM records WHERE birthday IS NOT NULL AND {where}', params).fetchall()
+
+        upcoming = []
+        for name, birthday in rows:
+            user_bday = date.fromisoformat(birthday)
+            for year in (today.year, today.year + 1):
+                try:
+                    bday_this_year = user_bday.replace(year=year)
+                except ValueError:  # 29th of February in a non-leap year
+                    bday_this_year = date(year, 3, 1)
+
+                if today <= bday_this_year <= end_date:
+                    upcoming.append((bday_this_year, name))
+                    break
+
+        for bday_this_year, name in sorted(upcoming):
+            if bday_this_year.weekday() == 5:  # Saturday
+                bday_this_year += timedelta(days=2)
+            elif bday_this_year.weekday() == 6:  # Sunday
+                bday_this_year += timedelta(days=1)
+
+            yield name, bday_this_year
+
+    def find_records_by_email_domain(self, domain: str) -> List[Record]:
+        rows = self._conn.execute(
+            'SELECT id, name, email, address, birthday FROM records '
+            'WHERE email IS NOT NULL AND email_domain(email) = ? ORDER BY name',
+            (domain.strip().lower().lstrip('@'),)).fetchall()
+        return [self._build_record(*row) for row in rows]
+
+    def find_records_born_between(self, start_date: date, end_date: date) -> List[Record]:
+        rows = self._conn.execute(
+            'SELECT id, name, email, address, birthday FROM records '
+            'WHERE birthday IS NOT NULL AND birthday BETWEEN ? AND ? ORDER BY birthday, name',
+            (start_date.isoformat(), end_date.isoformat())).fetchall()
+        return [self._build_record(*row) for row in rows]
+
+    def get_duplicate_phones(self) -> List[Tuple[str, List[str]]]:
+        rows = self._conn.execute(
+            'SELECT p.phone, r.name FROM phones p JOIN records r ON r.id = p.record_id '
+            'WHERE p.phone IN (SELECT phone FROM phones GROUP BY phone HAVING COUNT(DISTINCT record_id) > 1) '
+            'ORDER BY p.phone, r.name').fetchall()
+        duplicates = {}
+        for phone, name in rows:
+            names = duplicates.setdefault(phone, [])
+            if not names or names[-1] != name:
+                names.append(name)
+        return list(duplicates.items())
+
+    def note_exists(self, title: str) -> bool:
+        return self._scalar('SELECT 1 FROM notes WHERE title = ?', title) is not None
+
+    def add_note(self, title, content: str, created_at: datetime = None) -> None:
+        note = Note(title=title, content=content, created_at=created_at)
+        with self._write():
+            self._conn.execute('DELETE FROM notes_fts WHERE rowid IN (SELECT id FROM notes WHERE title = ?)', (title,))
+            self._conn.execute('DELETE FROM notes WHERE title = ?', (title,))
+            cur = self._conn.execute(
+                'INSERT INTO notes (title, content, created_at, modified_at) VALUES (?, ?, ?, NULL)',
+                (title, note.content, note.created_at.isoformat()))
+            self._conn.execute('INSERT INTO notes_fts (rowid, title, body) VALUES (?, ?, ?)',
+                               (cur.lastrowid, title, content))
+
+    def add_tag_to_note(self, note_title: str, tag_name: str) -> None:
+        with self._write():
+            self._conn.execute('INSERT OR IGNORE INTO note_tags (note_id, tag_id) VALUES (?, ?)',
+                               (self._note_id(note_title), self._tag_id(tag_name)))
+
+    def edit_notes_title(self, title: str, new_title: str, modified_at: datetime = None) -> None:
+        modified_at = modified_at or datetime.now()
+        note_id = self._note_id(title)
+        with self._write():
+            self._conn.execute('UPDATE notes SET title = ?, modified_at = ? WHERE id = ?',
+                               (new_title, modified_at.isoformat(), note_id))
+            self._conn.execute('UPDATE notes_fts SET title = ? WHERE rowid = ?', (new_title, note_id))
+
+    def edit_notes_content(self, title: str, new_content: str, modified_at: datetime = None) -> None:
+        modified_at = modified_at or datetime.now()
+        note_id = self._note_id(title)
+        with self._write():
+            self._conn.execute('UPDATE notes SET content = ?, modified_at = ? WHERE id = ?',
+                               (Note.format_note(new_content), modified_at.isoformat(), note_id))
+            self._conn.execute('UPDATE notes_fts SET body = ? WHERE rowid = ?', (new_content, note_id))
+
+    def remove_note(self, title: str) -> None:
+        note_id = self._note_id(title)
+        with self._write():
+            self._conn.execute('DELETE FROM notes WHERE id = ?', (note_id,))
+            self._conn.execute('DELETE FROM notes_fts WHERE rowid = ?', (note_id,))
+
+    def get_note(self, title: str) -> Note:
+        notes = self._select_notes('WHERE n.title = ?', (title,))
+        return notes[0] if notes else None
+
+    def get_notes(self) -> List[Note]:
+        return self._select_notes()
+
+    def iter_notes(self, offset: int = 0, limit: int = None) -> Generator[Note, None, None]:
+        cursor = self._conn.execute(
+            'SELECT id, title, content, created_at, modified_at FROM notes ORDER BY id LIMIT ? OFFSET ?',
+            (-1 if limit is None else limit, offset))
+        for note_id, *row in cursor:
+            yield self._build_note(*row, tags=self._conn.execute(
+                'SELECT t.name FROM note_tags nt JOIN tags t ON t.id = nt.tag_id WHERE nt.note_id = ? ORDER BY nt.rowid',
+                (note_id,)))
+
+    def count_notes(self) -> int:
+        return self._scalar('SELECT COUNT(*) FROM notes')
+
+    def get_notes_by_period_of_dates(self, start_date: date, end_date: date) -> List[Note]:
+        return self._select_notes('WHERE n.created_at >= ? AND n.created_at < ?',
+                                  (start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()),
+                                  order_by='n.created_at')
+
+    def get_notes_modified_between(self, start_date: date, end_date: date) -> List[Note]:
+        return self._select_notes('WHERE n.modified_at IS NOT NULL AND n.modified_at >= ? AND n.modified_at < ?',
+                                  (start_date.isoformat(), (end_date + timedelta(days=1)).isoformat()),
+                                  order_by='n.modified_at')
+
+    def get_notes_by_word_in_title(self, word: str) -> List[Note]:
+        return self._select_notes('WHERE instr(n.title, ?) > 0', (word,))
+
+    def search_notes(self, query: str) -> List[Note]:
+        match = self._fts_query(query)
+        if not match:
+            return []
+        return self._select_notes('WHERE n.id IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)', (match,),
+                                  order_by='n.title')
+
+    @staticmethod
+    def _fts_query(query: str) -> str:
+        """Translate TextIndex query syntax to FTS5, quoting terms so that punctuation is not parsed as operators."""
+        parts = []
+        for token in TextIndex._query_re.findall(query):
+            if token in ('AND', 'OR'):
+                if parts and parts[-1] not in ('AND', 'OR'):
+                    parts.append(token)
+                continue
+
+            terms = TextIndex.tokenize(token)
+            if not terms:
+                continue
+            if token.endswith('*') and not token.startswith('"'):
+                parts.append(f'"{"".join(terms)}"*')
+            else:
+                parts.append('"' + ' '.join(terms) + '"')
+
+        while parts and parts[-1] in ('AND', 'OR'):
+            parts.pop()
+        return ' '.join(parts)
+
+    def get_notes_by_tag(self, tag: str) -> List[Note]:
+        return self._select_notes(
+            'JOIN note_tags nt ON nt.note_id = n.id JOIN tags t ON t.id = nt.tag_id WHERE t.name = ?', (tag,),
+            order_by='n.title')
+
+    def find_notes_by_tags(self, query: str) -> List[Note]:
+        ids = evaluate_boolean_query(query, self._tag_note_ids,
+                                     lambda: {note_id for (note_id,) in self._conn.execute('SELECT id FROM notes')})
+        if not ids:
+            return []
+        # The ids are passed as one JSON array parameter, a search doesn't write anything.
+        return self._select_notes('WHERE n.id IN (SELECT value FROM json_each(?))', (json.dumps(sorted(ids)),),
+                                  order_by='n.title')
+
+    def _tag_note_ids(self, tag_name: str) -> set:
+        return {note_id for (note_id,) in self._conn.execute(
+            'SELECT nt.note_id FROM note_tags nt JOIN tags t ON t.id = nt.tag_id WHERE t.name = ?', (tag_name,))}
+
+    def link_note_to_record(self, name: str, note: str) -> None:
+        rec_id = self._record_id(name)
+        note_id = self._note_id(note)
+        with self._write():
+            cur = self._conn.execute(
+                'INSERT INTO record_notes (record_id, title, content, created_at, modified_at) '
+                'SELECT ?, title, content, created_at, modified_at FROM notes WHERE id = ?', (rec_id, note_id))
+            self._conn.execute(
+                'INSERT INTO record_note_tags (record_note_id, tag_id) SELECT ?, tag_id FROM note_tags WHERE note_id = ?',
+                (cur.lastrowid, note_id))
+
+    def get_record_notes(self, name: str) -> List[Note]:
+        rec = self.get_record(name)
+        return rec.notes
+
+    def count_notes_by_tag(self, tag_name: str) -> int:
+        return self._scalar(
+            'SELECT COUNT(*) FROM note_tags nt JOIN tags t ON t.id = nt.tag_id WHERE t.name = ?', tag_name)
+
+    def get_sorted_notes_by_tag(self, tag_name: str, offset: int = 0, limit: int = None) -> List[Note]:
+        return self._select_notes(
+            'JOIN note_tags nt ON nt.note_id = n.id JOIN tags t ON t.id = nt.tag_id WHERE t.name = ?', (tag_name,),
+            order_by='n.title', offset=offset, limit=limit)
+
+    def create_table_with_note_titles(self) -> 'PrettyTable | None':
+        from prettytable import PrettyTable
+
+        titles = [title for (title,) in self._conn.execute('SELECT title FROM notes ORDER BY id')]
+        if titles:
+            title_table = PrettyTable()
+            title_table.field_names = ["All notes titles"]
+            for title in titles:
+                title_table.add_row([title])
+            return title_table
+        return None
+
+    def create_tag(self, name: str) -> None:
+        with self._write():
+            self._conn.execute('INSERT OR IGNORE INTO tags (name) VALUES (?)', (name,))
+
+    def delete_tag(self, name: str) -> None:
+        with self._write():
+            self._conn.execute('DELETE FROM tags WHERE id = ?', (self._tag_id(name),))
+
+    def show_tags(self) -> 'PrettyTable | None':
+        from prettytable import PrettyTable
+
+        names = [name for (name,) in self._conn.execute('SELECT name FROM tags ORDER BY id')]
+        if not names:
+            return None
+
+        tag_table = PrettyTable()
+        tag_table.field_names = ["All tags"]
+        for name in names:
+            tag_table.add_row([name])
+        return tag_table
+
+    def edit_tag(self, name: str, new_name: str) -> None:
+        with self._write():
+            self._conn.execute('UPDATE tags SET name = ? WHERE id = ?', (new_name, self._tag_id(name)))
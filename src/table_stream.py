@@ -0,0 +1,76 @@
+import sys
+import textwrap
+from itertools import islice
+from typing import Iterable, List, Sequence, Tuple
+
+
+class StreamingTable:
+    """
+    Fixed-width table printed page by page while the rows are being produced.
+    Only the current page is kept in memory, so the first page appears before the rest is even read.
+    """
+
+    def __init__(self, columns: Sequence[Tuple[str, int]], out=None) -> None:
+        """
+        :param columns: (title, width) pairs. Longer cell values are wrapped to the column width.
+        :param out: stream to write to, stdout by default.
+        """
+        self._titles = [title for title, _ in columns]
+        self._widths = [max(width, len(title)) for title, width in columns]
+        self._out = out or sys.stdout
+        self._border = '+' + '+'.join('-' * (width + 2) for width in self._widths) + '+'
+
+    def render(self, rows: Iterable[Sequence], page: int = None, limit: int = 20, pager: bool = False,
+               total: int = None) -> int:
+        """
+        :param rows: iterable of rows, each a sequence of cell values.
+        :param page: print only one page labeled with this number (1-based), the rows must start at that page.
+                     All pages are printed by default.
+        :param limit: rows per page.
+        :param pager: ask before printing the next page.
+        :param total: number of rows if known, used for the 'Page N of M' footer.
+        :return: number of printed rows.
+        """
+        rows = iter(rows)
+        num = page or 1
+
+        printed = 0
+        pages = -(-total // limit) if total is not None else None
+        while True:
+            chunk = list(islice(rows, limit))
+            if not chunk:
+                break
+
+            self._write_page(chunk)
+            printed += len(chunk)
+            self._out.write(f"Page {num}" + (f" of {pages}" if pages else "") + "\n")
+            self._out.flush()
+
+            if page is not None or len(chunk) < limit or (pages is not None and num >= pages):
+                break
+            if pager and input("Press Enter for the next page or 'q' to stop: ").strip().lower() == 'q':
+                break
+            num += 1
+
+        return printed
+
+    def _write_page(self, chunk: List[Sequence]) -> None:
+        lines = [self._border, self._format_line(self._titles), self._border]
+        for row in chunk:
+            lines.extend(self._format_row(row))
+        lines.append(self._border)
+        self._out.write('\n'.join(lines) + '\n')
+
+    def _format_row(self, row: Sequence) -> List[str]:
+        cells = []
+        for value, width in zip(row, self._widths):
+            cell = []
+            for line in str(value).splitlines() or ['']:
+                cell.extend(textwrap.wrap(line, width) or [''])
+            cells.append(cell)
+
+        height = max(len(cell) for cell in cells)
+        return [self._format_line([cell[i] if i < len(cell) else '' for cell in cells]) for i in range(height)]
+
+    def _format_line(self, values: Sequence[str]) -> str:
+        return '| ' + ' | '.join(value.ljust(width) for value, width in zip(values, self._widths)) + ' |'
@@ -1,6 +1,21 @@
-class Tag:
-    def __init__(self, name: str) -> None:
-        self.name = name
+import sys
+
+from src.slotted import Slotted
+
+
+class Tag(Slotted):
+    __slots__ = ('name', 'id')
+
+    def __init__(self, name: str, tag_id: int = None) -> None:
+        # The same few tag names are repeated over many notes.
+        self.name = sys.intern(name)
+        self.id = tag_id
+
+    def __setstate__(self, state: dict) -> None:
+        # Tags pickled before ids were introduced get one assigned by the Assistant on load.
+        self.id = None
+        super().__setstate__(state)
+        self.name = sys.intern(self.name)
 
     def __str__(self) -> str:
         return self.name
@@ -0,0 +1,163 @@
+"""
+Data of many users loaded in one long running process.
+
+Every user has their own data files, the account index maps the user to them. TenantCache keeps the users'
+databases loaded between their sessions, the least recently used ones are saved and unloaded when the total goes
+over a memory budget.
+"""
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+
+from src.accounts import AccountIndex
+from src.assistant import Assistant
+from src.concurrency import SharedAssistant
+from src.data_manager import DataManager
+from src.sqlite_assistant import SQLiteAssistant
+
+
+class Tenant:
+    def __init__(self, identity: str, manager: DataManager, data: Assistant) -> None:
+        """
+        :param identity: name of the user's data file.
+        """
+        self.identity = identity
+        self.manager = manager
+        self.data = data
+        # Sessions of the user on several connections share the data through its locks.
+        self.shared = SharedAssistant(data)
+        # Open sessions, a tenant in use is never unloaded.
+        self.sessions = 0
+        self.email = None
+        self.verifier = None
+
+
+class TenantCache:
+    """
+    LRU cache of loaded user databases. Thread-safe: logins, unloading and stats take turns under a lock,
+    which is held while a user's password is checked and their data is loaded or saved. Commands on loaded data
+    don't take it, see Tenant.shared.
+    """
+
+    # Heap bytes measured by benchmarks.bench_memory, indexes included. A SQLite database is not held in memory.
+    record_bytes = 1100
+    note_bytes = 1600
+    tenant_bytes = 64 * 1024
+
+    def __init__(self, budget: int = None, storage: str = None, accounts: AccountIndex = None) -> None:
+        """
+        :param budget: bytes of loaded data to keep. Defaults to the ASSISTANT_TENANT_CACHE environment variable
+                       in MiB or 512 MiB.
+        :param storage: storage of the users' data, see DataManager.
+        :param accounts: index of the users' accounts, 'accounts.json' in the working directory by default.
+        """
+        if budget is None:
+            budget = int(float(os.environ.get('ASSISTANT_TENANT_CACHE', 512)) * 1024 * 1024)
+        self.budget = budget
+        self.storage = storage
+        self.accounts = accounts or AccountIndex(legacy_exists=DataManager.data_exists)
+        self._tenants: OrderedDict[str, Tenant] = OrderedDict()
+        # Loaded tenants by email. Their passwords are checked against a keyed hash instead of the slow
+        # password hash of the account index, the key never leaves the process.
+        self._by_email: Dict[str, Tenant] = {}
+        self._lock = threading.RLock()
+        self._verifier_key = os.urandom(32)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def acquire(self, email: str, password: str, create: bool = False) -> Tenant:
+        """
+        Open a session of the user, loading their data unless it is cached. Must be paired with release().
+        :param create: sign up a new user instead of logging in.
+        """
+        with self._lock:
+            return self._acquire(email, password, create)
+
+    def _acquire(self, email: str, password: str, create: bool) -> Tenant:
+        email = AccountIndex.normalize(email)
+        verifier = hmac.new(self._verifier_key, f"{email}\0{password}".encode(), hashlib.sha256).digest()
+        tenant = self._by_email.get(email)
+        if create or tenant is None or not hmac.compare_digest(tenant.verifier, verifier):
+            if create:
+                identity = self.accounts.signup(email, password)
+            else:
+                identity = self.accounts.authenticate(email, password)
+            tenant = self._tenants.get(identity)
+
+        if tenant is not None:
+            self.hits += 1
+            self._tenants.move_to_end(tenant.identity)
+        else:
+            self.misses += 1
+            manager = DataManager(self.storage, identity, password, self.accounts)
+            tenant = self._tenants[identity] = Tenant(identity, manager, manager.load_data())
+        tenant.email, tenant.verifier = email, verifier
+        self._by_email[email] = tenant
+
+        tenant.sessions += 1
+        self._evict()
+        return tenant
+
+    def release(self, tenant: Tenant) -> None:
+        with self._lock:
+            tenant.sessions -= 1
+            self._evict()
+
+    @contextmanager
+    def session(self, email: str, password: str, create: bool = False):
+        tenant = self.acquire(email, password, create)
+        try:
+            yield tenant
+        finally:
+            self.release(tenant)
+
+    def size(self) -> int:
+        """Estimated bytes of all loaded data."""
+        with self._lock:
+            return sum(map(self._size, self._tenants.values()))
+
+    def _size(self, tenant: Tenant) -> int:
+        if isinstance(tenant.data, SQLiteAssistant):
+            return self.tenant_bytes
+        return (self.tenant_bytes + tenant.data.count_records() * self.record_bytes
+                + tenant.data.count_notes() * self.note_bytes)
+
+    def _evict(self) -> None:
+        # Least recently used first. Tenants with open sessions stay, the cache may go over the budget for them.
+        size = self.size()
+        for tenant in list(self._tenants.values()):
+            if size <= self.budget:
+                break
+            if tenant.sessions:
+                continue
+            size -= self._size(tenant)
+            del self._tenants[tenant.identity]
+            self._by_email.pop(tenant.email, None)
+            tenant.manager.close(tenant.data)
+            self.evictions += 1
+
+    def close(self) -> None:
+        """Save and unload all data."""
+        with self._lock:
+            self._by_email.clear()
+            while self._tenants:
+                _, tenant = self._tenants.popitem(last=False)
+                tenant.manager.close(tenant.data)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'tenants': len(self._tenants),
+                'size': self.size(),
+                'budget': self.budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
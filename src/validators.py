@@ -0,0 +1,127 @@
+import re
+import time
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Sequence
+
+PHONE_DIGITS = 10
+
+# Patterns are compiled once at import instead of on every validated value.
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_birthday_re = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$')
+_iso_date_re = re.compile(r'^(\d{4})-?(\d{2})-?(\d{2})$')
+
+
+_today = None
+_today_until = 0.0
+
+
+def current_date() -> date:
+    """Today's date, looked up from the calendar once a day instead of on every validated birthday."""
+    global _today, _today_until
+    now = time.time()
+    if now >= _today_until:
+        _today = date.today()
+        _today_until = datetime.combine(_today + timedelta(days=1), datetime.min.time()).timestamp()
+    return _today
+
+
+def validate_phone(value: str) -> str:
+    # The fast path is a length check and C-level scans of the characters. isdigit() alone also accepts
+    # digits of other scripts and superscripts such as '²', which are not phone digits.
+    if len(value) == PHONE_DIGITS and value.isascii() and value.isdigit():
+        return value
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError("All characters are not digits")
+    raise ValueError(f"Phone number must be {PHONE_DIGITS} digits long")
+
+
+def is_valid_email(value: str) -> bool:
+    return EMAIL_RE.match(value) is not None
+
+
+def validate_email(value: str) -> str:
+    if EMAIL_RE.match(value) is None:
+        raise ValueError(f"{value} - email address format is invalid")
+    return value
+
+
+@lru_cache(maxsize=65536)
+def _parse_date(value: str, allow_iso: bool) -> date:
+    """
+    Cached: there are only so many distinct birthdays in a big address book.
+    Whether the date is in the future is checked by the callers, "today" changes.
+    """
+    match = _birthday_re.match(value)
+    try:
+        if match:
+            return date(int(match[3]), int(match[2]), int(match[1]))
+        if allow_iso:
+            match = _iso_date_re.match(value)
+            if match:
+                return date(int(match[1]), int(match[2]), int(match[3]))
+    except ValueError:
+        pass
+    raise ValueError("Invalid date format. Use DD.MM.YYYY")
+
+
+def parse_birthday(value: str, allow_iso: bool = False, today: date = None) -> date:
+    """
+    :param value: date in the DD.MM.YYYY format.
+    :param allow_iso: also accept YYYY-MM-DD and YYYYMMDD, the formats of vCards and exports.
+    :param today: date to compare with, batches pass it once instead of asking the clock per value.
+    """
+    birthday = _parse_date(value, allow_iso)
+    if birthday > (today or current_date()):
+        raise ValueError("Birthdate is from the future")
+    return birthday
+
+
+def validate_phones(values: Sequence[str]) -> List[str | ValueError]:
+    """
+    Validate a column of phones at once.
+    :return: list of the same length: the phone if it is valid, the ValueError describing the problem otherwise.
+    """
+    digits = PHONE_DIGITS
+    result = [value if len(value) == digits and value.isascii() and value.isdigit() else None for value in values]
+    # Only the rare invalid values go through the slow path that builds the error.
+    for idx, value in enumerate(result):
+        if value is None:
+            try:
+                validate_phone(values[idx])
+            except ValueError as e:
+                result[idx] = e
+    return result
+
+
+def validate_emails(values: Sequence[str], allow_empty: bool = False) -> List[str | ValueError]:
+    """
+    Validate a column of emails at once.
+    :param allow_empty: empty values are missing emails, returned as they are.
+    :return: list of the same length: the email if it is valid, the ValueError describing the problem otherwise.
+    """
+    match = EMAIL_RE.match
+    return [value if (allow_empty and not value) or match(value) is not None
+            else ValueError(f"{value} - email address format is invalid")
+            for value in values]
+
+
+def parse_birthdays(values: Sequence[str], allow_iso: bool = False, allow_empty: bool = False
+                    ) -> List[date | None | ValueError]:
+    """
+    Parse a column of birthdays at once, asking the clock for today's date once for the whole column.
+    :param allow_empty: empty values are missing birthdays, returned as None.
+    :return: list of the same length: the date if it is valid, the ValueError describing the problem otherwise.
+    """
+    today = current_date()
+    result = []
+    append = result.append
+    for value in values:
+        if allow_empty and not value:
+            append(None)
+            continue
+        try:
+            append(parse_birthday(value, allow_iso, today))
+        except ValueError as e:
+            append(e)
+    return result
@@ -0,0 +1,83 @@
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.accounts import AccountIndex, legacy_filename
+from src.data_manager import DataManager
+from src.exceptions import AuthenticationError
+
+# Cheap enough for tests.
+SCRYPT = {'name': 'scrypt', 'n': 2 ** 10, 'r': 8, 'p': 1}
+PBKDF2 = {'name': 'pbkdf2', 'iterations': 1000}
+PASSWORD = 'correct horse battery'
+
+
+class AccountIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.filename = os.path.join(self.dir.name, 'accounts.json')
+
+    def index(self, kdf: dict = None, legacy: set = ()) -> AccountIndex:
+        return AccountIndex(self.filename, kdf or SCRYPT, legacy_exists=legacy.__contains__)
+
+    def stored(self, email: str) -> dict:
+        with open(self.filename, encoding='utf-8') as f:
+            return json.load(f)['accounts'][email]
+
+    def test_signup_and_login(self) -> None:
+        data_file = self.index().signup('Ann@Example.com ', PASSWORD)
+        # Another process reading the index finds the account, whatever case the email is typed in.
+        self.assertEqual(self.index().authenticate('ann@example.com', PASSWORD), data_file)
+        self.assertNotIn(PASSWORD, json.dumps(self.stored('ann@example.com')))
+        self.assertEqual(os.stat(self.filename).st_mode & 0o777, 0o600)
+
+        with self.assertRaises(ValueError):
+            self.index().signup('ANN@example.com', 'another password')
+        for email, password in (('ann@example.com', 'wrong password'), ('bob@example.com', PASSWORD)):
+            with self.subTest(email=email, password=password):
+                with self.assertRaises(AuthenticationError):
+                    self.index().authenticate(email, password)
+
+    def test_rehash_with_new_cost(self) -> None:
+        data_file = self.index().signup('ann@example.com', PASSWORD)
+        old_hash = self.stored('ann@example.com')['hash']
+
+        self.assertEqual(self.index(PBKDF2).authenticate('ann@example.com', PASSWORD), data_file)
+        account = self.stored('ann@example.com')
+        self.assertEqual(account['kdf'], PBKDF2)
+        self.assertNotEqual(account['hash'], old_hash)
+        self.assertEqual(self.index(PBKDF2).authenticate('ann@example.com', PASSWORD), data_file)
+
+    def test_legacy_account(self) -> None:
+        data_file = legacy_filename('ann@example.com', PASSWORD)
+        with self.assertRaises(AuthenticationError):
+            self.index().authenticate('ann@example.com', PASSWORD)
+
+        self.assertEqual(self.index(legacy={data_file}).authenticate('ann@example.com', PASSWORD), data_file)
+        # From now on it is an indexed account.
+        self.assertEqual(self.index().authenticate('ann@example.com', PASSWORD), data_file)
+        with self.assertRaises(AuthenticationError):
+            self.index().authenticate('ann@example.com', 'wrong password')
+
+    def test_login_prompts_without_recursion(self) -> None:
+        accounts = self.index({'name': 'pbkdf2', 'iterations': 1})
+        data_file = accounts.signup('ann@example.com', PASSWORD)
+        # More failed logins in a row than the interpreter could nest calls.
+        attempts = sys.getrecursionlimit() + 10
+        answers = iter(['2', 'ann@example.com'] * attempts)
+        passwords = iter(['wrong password'] * (attempts - 1) + [PASSWORD])
+
+        with mock.patch('builtins.input', lambda prompt='': next(answers)), \
+                mock.patch('getpass.getpass', lambda prompt='': next(passwords)), \
+                mock.patch('sys.stdout', io.StringIO()):
+            manager = DataManager('journal', accounts=accounts)
+        self.assertEqual(manager.filename, data_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+import os
+import pickle
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+from src.assistant import Assistant
+from src.fields import Birthday, Email, Name, Phone
+from src.journal import Journal
+
+
+def rebuilt(data: Assistant) -> Assistant:
+    """Copy of the data with the indexes built from scratch."""
+    return pickle.loads(pickle.dumps(data))
+
+
+def reloaded(data: Assistant, directory: str) -> Assistant:
+    """The data saved as a segmented snapshot and loaded back lazily."""
+    filename = os.path.join(directory, 'data')
+    with open(filename, 'wb') as f:
+        data.dump_segments(f, {})
+    return Assistant.load_segments(filename)[1]
+
+
+class IndexTestCase(unittest.TestCase):
+    """Indexes kept up to date by the changes of a test answer the same as indexes built from scratch."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.journal = Journal(os.path.join(self.dir.name, 'data.journal'))
+        self.addCleanup(self.journal.close)
+        self.data = Assistant()
+        self.data.attach_journal(self.journal)
+
+    def replayed(self) -> Assistant:
+        """The changes made so far applied from the journal to an empty database."""
+        self.journal.flush()
+        data = Assistant()
+        Journal(self.journal.filename).replay(data)
+        return data
+
+    def assert_consistent(self, query) -> None:
+        """The query gives the same answer with the maintained indexes, rebuilt ones, after a reload and a replay."""
+        expected = query(rebuilt(self.data))
+        self.assertEqual(query(self.data), expected)
+        self.assertEqual(query(reloaded(self.data, self.dir.name)), expected)
+        self.assertEqual(query(self.replayed()), expected)
+
+
+class PhoneIndexTest(IndexTestCase):
+    def names(self, data: Assistant, phone: str) -> list:
+        return [record.name for record in data.find_records_by_phone(phone)]
+
+    def test_changes(self) -> None:
+        self.data.add_record(Name('John'), Phone('0123456789'))
+        self.data.add_record(Name('Ann'), Phone('0123456789'))
+        self.data.add_phone('John', '0123456788')
+        self.data.edit_record_phone('Ann', '0123456789', '0123456787')
+        self.data.edit_record_name('John', 'Johnny')
+        self.data.add_record(Name('Kate'), Phone('0123456786'))
+        self.data.remove_phone('Kate', '0123456786')
+        self.data.add_record(Name('Bob'), Phone('0123456785'))
+        self.data.remove_record('Bob')
+
+        expected = {'0123456789': ['Johnny'], '0123456788': ['Johnny'], '0123456787': ['Ann'],
+                    '0123456786': [], '0123456785': []}
+        for phone, names in expected.items():
+            with self.subTest(phone=phone):
+                self.assertEqual(self.names(self.data, phone), names)
+                self.assertEqual(self.data.phone_exists(phone), bool(names))
+                self.assert_consistent(lambda data: self.names(data, phone))
+
+    def test_replaced_record(self) -> None:
+        self.data.add_record(Name('John'), Phone('0123456789'))
+        self.data.add_record(Name('John'), Phone('0123456788'))
+        self.assertFalse(self.data.phone_exists('0123456789'))
+        self.assert_consistent(lambda data: self.names(data, '0123456788'))
+
+
+def birthday_in(days: int) -> str:
+    """Birthday of someone celebrating in that many days, born in a leap year so the 29th of February exists."""
+    day = date.today() + timedelta(days=days)
+    return f"{day.day:02d}.{day.month:02d}.1992"
+
+
+class BirthdayIndexTest(IndexTestCase):
+    @staticmethod
+    def upcoming(data: Assistant) -> list:
+        return [name for name, _ in data.get_records_with_upcoming_birthday(30)]
+
+    def test_changes(self) -> None:
+        for name, days in (('Ann', 3), ('John', 10), ('Kate', 20), ('Bob', 40)):
+            self.data.add_record(Name(name), Phone('0123456789'), birthday=Birthday(birthday_in(days)))
+        self.data.edit_record_birthday('Bob', birthday_in(1))
+        self.data.edit_record_birthday('Ann', birthday_in(50))
+        self.data.edit_record_name('John', 'Johnny')
+        self.data.remove_record('Kate')
+
+        self.assertEqual(self.upcoming(self.data), ['Bob', 'Johnny'])
+        self.assert_consistent(self.upcoming)
+
+
+class TextIndexTest(IndexTestCase):
+    queries = ('call', 'plan*', '"call john"', 'john OR ann', 'milk eggs', 'trip')
+
+    def search(self, data: Assistant) -> dict:
+        return {query: [note.title for note in data.search_notes(query)] for query in self.queries}
+
+    def test_changes(self) -> None:
+        self.data.add_note('Plans', 'Call John about the trip')
+        self.data.add_note('Shopping', 'Milk and eggs')
+        self.data.add_note('Ideas', 'Call Ann')
+        self.data.edit_notes_content('Ideas', 'Plan a party, then call John')
+        self.data.edit_notes_title('Plans', 'Calls')
+        self.data.add_note('Shopping', 'Bread')
+        self.data.add_note('Old', 'Call John')
+        self.data.remove_note('Old')
+
+        self.assertEqual(self.search(self.data), {
+            'call': ['Calls', 'Ideas'], 'plan*': ['Ideas'], '"call john"': ['Calls', 'Ideas'],
+            'john OR ann': ['Calls', 'Ideas'], 'milk eggs': [], 'trip': ['Calls'],
+        })
+        self.assert_consistent(self.search)
+
+
+class TagPostingsTest(IndexTestCase):
+    def tagged(self, data: Assistant) -> dict:
+        return {
+            'work': [note.title for note in data.get_sorted_notes_by_tag('work')],
+            'jobs': [note.title for note in data.get_sorted_notes_by_tag('jobs')],
+            'page': [note.title for note in data.get_sorted_notes_by_tag('jobs', offset=1, limit=1)],
+            'count': data.count_notes_by_tag('jobs'),
+            'query': [note.title for note in data.find_notes_by_tags('jobs AND NOT home')],
+            'tags': {note.title: [tag.name for tag in note.tags] for note in data.get_notes()},
+        }
+
+    def test_changes(self) -> None:
+        for tag in ('work', 'home', 'old'):
+            self.data.create_tag(tag)
+        for title in ('Plans', 'Ideas', 'Calls', 'Shopping'):
+            self.data.add_note(title, f'{title} content')
+            self.data.add_tag_to_note(title, 'work')
+        self.data.add_tag_to_note('Ideas', 'home')
+        self.data.add_tag_to_note('Shopping', 'old')
+        self.data.edit_tag('work', 'jobs')
+        self.data.edit_notes_title('Plans', 'Agenda')
+        self.data.remove_note('Calls')
+        self.data.delete_tag('old')
+        # A new tag gets a new id, notes of the deleted one don't get it.
+        self.data.create_tag('old')
+
+        expected = {'work': [], 'jobs': ['Agenda', 'Ideas', 'Shopping'], 'page': ['Ideas'], 'count': 3,
+                    'query': ['Agenda', 'Shopping'],
+                    'tags': {'Agenda': ['jobs'], 'Ideas': ['jobs', 'home'], 'Shopping': ['jobs']}}
+        self.assertEqual(self.tagged(self.data), expected)
+        self.assert_consistent(self.tagged)
+
+    def test_rename_after_reload(self) -> None:
+        self.data.create_tag('work')
+        self.data.add_note('Plans', 'Call John')
+        self.data.add_tag_to_note('Plans', 'work')
+
+        data = reloaded(self.data, self.dir.name)
+        data.edit_tag('work', 'jobs')
+        # Notes loaded after the rename refer to the tag by its id.
+        self.assertEqual([tag.name for tag in data.get_note('Plans').tags], ['jobs'])
+        self.assertEqual([note.title for note in data.get_sorted_notes_by_tag('jobs')], ['Plans'])
+
+
+class ContactColumnsTest(IndexTestCase):
+    @staticmethod
+    def filtered(data: Assistant) -> dict:
+        return {
+            'domain': [rec.name for rec in data.find_records_by_email_domain('Example.com')],
+            'born': [rec.name for rec in data.find_records_born_between(date(1990, 1, 1), date(1990, 12, 31))],
+            'duplicates': data.get_duplicate_phones(),
+        }
+
+    def test_changes(self) -> None:
+        for num in range(5):
+            self.data.add_record(Name(f'Contact {num}'), Phone(f'012345678{num}'), Email(f'c{num}@example.com'),
+                                 birthday=Birthday(f'0{num + 1}.02.1990'))
+        # Built by the first query, kept up to date by the changes after it.
+        self.filtered(self.data)
+
+        self.data.edit_record_email('Contact 0', 'c0@other.com')
+        self.data.edit_record_birthday('Contact 1', '01.01.1991')
+        self.data.add_phone('Contact 2', '0123456783')
+        self.data.edit_record_phone('Contact 3', '0123456783', '0123456784')
+        self.data.edit_record_name('Contact 4', 'Renamed')
+        self.data.add_records([(Name('Bulk'), [Phone('0123456780')], Email('bulk@EXAMPLE.com'), None, None)])
+        self.data.remove_phone('Contact 2', '0123456782')
+
+        self.assertEqual(self.filtered(self.data), {
+            'domain': ['Bulk', 'Contact 1', 'Contact 2', 'Contact 3', 'Renamed'],
+            'born': ['Contact 0', 'Contact 2', 'Contact 3', 'Renamed'],
+            'duplicates': [('0123456780', ['Bulk', 'Contact 0']), ('0123456784', ['Contact 3', 'Renamed'])],
+        })
+        self.assert_consistent(self.filtered)
+
+    def test_compaction(self) -> None:
+        # Enough removed rows to compact the columns.
+        for num in range(3000):
+            self.data.add_record(Name(f'Contact {num}'), Phone(f'0{num:09d}'), Email(f'c{num}@example.com'))
+        self.filtered(self.data)
+        for num in range(0, 3000, 3):
+            self.data.remove_record(f'Contact {num}')
+            self.data.remove_record(f'Contact {num + 1}')
+        self.data.add_phone('Contact 2', '0000000005')
+
+        self.assertEqual(self.filtered(self.data)['duplicates'], [('0000000005', ['Contact 2', 'Contact 5'])])
+        self.assertEqual(len(self.filtered(self.data)['domain']), 1000)
+        self.assertEqual(self.filtered(self.data), self.filtered(rebuilt(self.data)))
+
+
+class DeleteTagTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = Assistant()
+        for name in ('Ann', 'John', 'Kate'):
+            self.data.add_record(Name(name), Phone('0123456789'))
+        self.data.create_tag('work')
+        self.data.add_note('Plans', 'Call John')
+        self.data.add_tag_to_note('Plans', 'work')
+        self.data.link_note_to_record('John', 'Plans')
+
+    def tags(self, name: str) -> list:
+        return [[tag.name for tag in note.tags] for note in self.data.get_record_notes(name)]
+
+    def test_linked_after_rename(self) -> None:
+        self.data.edit_record_name('John', 'Johnny')
+        self.data.delete_tag('work')
+        self.assertEqual(self.tags('Johnny'), [[]])
+        self.assertEqual(self.data._tag_records, {})
+
+    def test_removed_record(self) -> None:
+        self.data.remove_record('John')
+        self.assertEqual(self.data._tag_records, {})
+        self.data.delete_tag('work')
+
+    def test_copy_keeps_its_tags(self) -> None:
+        self.data.create_tag('home')
+        self.data.add_tag_to_note('Plans', 'home')
+        self.assertEqual(self.tags('John'), [['work']])
+
+    def test_touches_linked_records_only(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'data')
+            with open(filename, 'wb') as f:
+                self.data.dump_segments(f, {})
+            _, data = Assistant.load_segments(filename)
+
+            data.delete_tag('work')
+            self.assertEqual(data._records._changed, {'John'})
+            self.assertEqual([[tag.name for tag in note.tags] for note in data.get_record_notes('John')], [[]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import io
+import os
+import tempfile
+import unittest
+
+from src.assistant import Assistant
+from src.batch import run_batch
+from src.journal import Journal
+
+
+class RunBatchTest(unittest.TestCase):
+    def test_commands(self) -> None:
+        data = Assistant()
+        out = io.StringIO()
+        result = run_batch([
+            '# contacts',
+            'add-record --name John --phone 0123456789',
+            '',
+            'add-record --name Ann --phone 12',
+            'bogus',
+            'add-phone --name John --phone 0123456788 --typo x',
+            'add-note --title Plans --content "Call John" --tag work --create-tag y',
+            'exit',
+            'add-record --name Kate --phone 0123456787',
+        ], data, out)
+
+        self.assertEqual((result.executed, result.failed), (6, 3))
+        self.assertEqual([rec.name for rec in data.get_records()], ['John'])
+        self.assertEqual([tag.name for tag in data.get_note('Plans').tags], ['work'])
+        self.assertEqual([line.split(':')[0] for line in out.getvalue().splitlines() if line.startswith('Line')],
+                         ['Line 4', 'Line 5', 'Line 6'])
+
+    def test_journal_flushed_once(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = Journal(os.path.join(tmp, 'data.journal'))
+            data = Assistant()
+            data.attach_journal(journal)
+            run_batch([f'add-record --name Contact{num} --phone 0{num:09d}' for num in range(3)], data, io.StringIO())
+            self.assertTrue(journal.autoflush)
+            journal.close()
+
+            replayed = Assistant()
+            Journal(journal.filename).replay(replayed)
+            self.assertEqual(replayed.count_records(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
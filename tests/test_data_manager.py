@@ -0,0 +1,193 @@
+import os
+import pickle
+import tempfile
+import unittest
+from array import array
+from itertools import repeat
+from unittest import mock
+
+from src import segments
+from src.accounts import AccountIndex
+from src.assistant import Assistant
+from src.data_manager import DataManager
+from src.exceptions import DataFileError
+from src.fields import Name, Phone
+from src.journal import Journal
+
+PASSWORD = 'correct horse battery'
+
+
+def dump_v1(f, header, meta, sections, codec=None) -> None:
+    """segments.dump of version 1 snapshots: no blocks, no compression, no encryption."""
+    f.write(segments.MAGIC_V1)
+    index = {'header': header}
+
+    start = f.tell()
+    pickle.dump(meta, f, protocol=pickle.HIGHEST_PROTOCOL)
+    index['meta'] = (start, f.tell())
+
+    pickler = segments._SegmentPickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+    key_indexes = {}
+    for section, mapping in sections.items():
+        keys, offsets = [], array('Q')
+        for key, _ in zip(mapping, repeat(None)):
+            keys.append(key)
+            offsets.append(f.tell())
+            pickler.dump(mapping[key])
+            pickler.clear_memo()
+        offsets.append(f.tell())
+        key_indexes[section] = (keys, offsets, array('L', sorted(range(len(keys)), key=keys.__getitem__)))
+
+    for section, key_index in key_indexes.items():
+        start = f.tell()
+        pickle.dump(key_index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        index[section] = (start, f.tell())
+
+    start = f.tell()
+    pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    f.write(segments._footer.pack(start, f.tell() - start, segments.MAGIC_V1))
+
+
+class MigrationTest(unittest.TestCase):
+    """Data files of earlier versions are loaded, changed and saved with the current format and encryption."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.filename = os.path.join(self.dir.name, 'data')
+        self.accounts = AccountIndex(os.path.join(self.dir.name, 'accounts.json'))
+        self.data = Assistant()
+        self.data.add_record(Name('John'), Phone('0123456789'))
+        self.data.add_note('Plans', 'Call John')
+
+    def manager(self) -> DataManager:
+        return DataManager('journal', self.filename, PASSWORD, self.accounts)
+
+    def assert_migrates(self) -> None:
+        manager = self.manager()
+        data = manager.load_data()
+        data.add_record(Name('Ann'), Phone('0123456788'))
+        manager.save_data(data)
+        manager.close(data)
+
+        for _ in range(2):
+            manager = self.manager()
+            data = manager.load_data()
+            self.assertEqual(sorted(record.name for record in data.get_records()), ['Ann', 'John'])
+            self.assertEqual(data.get_note('Plans').content, 'Call John')
+            self.assertEqual(manager.codec.descriptor['cipher'], 'shake256-hmac-sha256')
+            manager.close(data)
+
+    def test_plain_pickle(self) -> None:
+        with open(self.filename, 'wb') as f:
+            pickle.dump(self.data, f)
+        self.assert_migrates()
+
+    def test_pickle_with_header(self) -> None:
+        with open(self.filename, 'wb') as f:
+            pickle.dump({'version': 1, 'seq': 0}, f)
+            pickle.dump(self.data, f)
+        self.assert_migrates()
+
+    def test_plaintext_journal(self) -> None:
+        with open(self.filename, 'wb') as f:
+            pickle.dump({'version': 1, 'seq': 0}, f)
+            pickle.dump(self.data, f)
+        journal = Journal(self.filename + '.journal')
+        journal.append('add_note', ('Ideas', 'Write them down'))
+        journal.close()
+
+        self.assert_migrates()
+        manager = self.manager()
+        data = manager.load_data()
+        self.assertEqual(data.get_note('Ideas').content, 'Write them down')
+        manager.close(data)
+
+    def test_segments_v1(self) -> None:
+        with open(self.filename, 'wb') as f, mock.patch('src.segments.dump', dump_v1):
+            self.data.dump_segments(f, {'version': 2, 'seq': 0})
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(len(segments.MAGIC_V1)), segments.MAGIC_V1)
+        self.assert_migrates()
+
+    def test_unencrypted_snapshot(self) -> None:
+        # Current snapshots are only written unencrypted without a password, not for an account.
+        manager = DataManager('journal', self.filename, None, self.accounts)
+        manager.close(manager.load_data())
+        with open(self.filename, 'rb') as f:
+            snapshot = f.read()
+
+        with self.assertRaises(DataFileError):
+            self.manager().load_data()
+        with open(self.filename, 'rb') as f:
+            self.assertEqual(f.read(), snapshot)
+
+    def test_new_account(self) -> None:
+        manager = self.manager()
+        data = manager.load_data()
+        data.add_record(Name('John'), Phone('0123456789'))
+        data.add_note('Plans', 'Call John')
+        manager.close(data)
+        self.assert_migrates()
+
+
+class LazyLoadTest(unittest.TestCase):
+    """A lazily loaded snapshot reads only what is used and saves changes made before its indexes are built."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.filename = os.path.join(self.dir.name, 'data')
+        self.accounts = AccountIndex(os.path.join(self.dir.name, 'accounts.json'))
+        # The same changes are made to an in-memory twin.
+        self.expected = Assistant()
+        manager, data = self.open()
+        for target in (data, self.expected):
+            for num in range(50):
+                target.add_record(Name(f'Contact {num}'), Phone(f'0{num:09d}'))
+                target.add_note(f'Note {num}', f'Content {num}')
+        manager.compact(data)
+        manager.close(data)
+
+    def open(self):
+        manager = DataManager('journal', self.filename, PASSWORD, self.accounts)
+        return manager, manager.load_data()
+
+    @staticmethod
+    def contents(data: Assistant) -> tuple:
+        return ({rec.name: ([str(phone) for phone in rec.phones], rec.email) for rec in data.get_records()},
+                {note.title: note.content for note in data.get_notes()})
+
+    def test_loads_on_demand(self) -> None:
+        manager, data = self.open()
+        self.addCleanup(manager.close, data)
+        self.assertIsInstance(data._records, segments.SegmentMap)
+        self.assertTrue(data.record_exists('Contact 7'))
+        self.assertEqual(data._records._cache, {})
+        self.assertEqual(str(data.get_record('Contact 7').phones[0]), '0000000007')
+        self.assertEqual(list(data._records._cache), ['Contact 7'])
+        self.assertEqual(data._notes._cache, {})
+
+    def test_changes_survive_compaction(self) -> None:
+        manager, data = self.open()
+        for target in (data, self.expected):
+            target.edit_record_email('Contact 3', 'contact3@example.com')
+            target.edit_record_name('Contact 4', 'Renamed')
+            target.remove_record('Contact 5')
+            target.add_phone('Contact 6', '0999999999')
+            target.edit_notes_content('Note 1', 'Changed')
+            target.remove_note('Note 2')
+        # Indexes of the lazily loaded data are built from its current state.
+        self.assertEqual([rec.name for rec in data.find_records_by_phone('0000000004')], ['Renamed'])
+        self.assertFalse(data.phone_exists('0000000005'))
+        manager.compact(data)
+        manager.close(data)
+
+        manager, data = self.open()
+        self.addCleanup(manager.close, data)
+        self.assertEqual(self.contents(data), self.contents(self.expected))
+        self.assertEqual([rec.name for rec in data.find_records_by_phone('0999999999')], ['Contact 6'])
+
+
+if __name__ == '__main__':
+    unittest.main()
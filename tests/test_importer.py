@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from src.assistant import Assistant
+from src.importer import import_contacts
+
+
+class ImportTest(unittest.TestCase):
+    def test_parallel_rejects_match_sequential(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'contacts.csv')
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write('name,phones,email,address,birthday\n')
+                for i in range(300):
+                    # Duplicate names and phones are found after validation, in the importing process.
+                    f.write(f"Contact {i % 250},0{i % 280:09d},C{i}@Example.com,Main Street {i},"
+                            f"{'01.02.1990' if i % 3 else ''}\n")
+                f.write('No phone,,,,\n')
+
+            rejects = []
+            for workers in (1, 2):
+                rejects_filename = os.path.join(tmp, f'rejects{workers}.jsonl')
+                result = import_contacts(Assistant(), filename, rejects_filename=rejects_filename, chunk_size=50,
+                                         workers=workers)
+                self.assertEqual((result.imported, result.rejected), (250, 51))
+                with open(rejects_filename, encoding='utf-8') as f:
+                    rejects.append(f.read())
+            self.assertEqual(rejects[0], rejects[1])
+
+    def test_unreadable_file_imports_nothing(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'contacts.csv')
+            with open(filename, 'wb') as f:
+                f.write(b'name,phones\n')
+                # Past the first chunks and the decoder's first read.
+                for i in range(1000):
+                    f.write(f"Contact {i},0{i:09d}\n".encode())
+                f.write(b'Broken \xff,0999999999\n')
+
+            data = Assistant()
+            with self.assertRaises(UnicodeDecodeError):
+                import_contacts(data, filename, chunk_size=50)
+            self.assertEqual(data.count_records(), 0)
+            self.assertFalse(data.dirty)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest
+from datetime import date
+
+from src.indexes import BirthdayIndex
+
+
+class BirthdayIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.index = BirthdayIndex()
+        self.index.add('Eve', date(1990, 1, 10))
+        self.index.add('Leap', date(1992, 2, 29))
+        self.index.add('March', date(1990, 3, 1))
+
+    def test_whole_leap_year(self) -> None:
+        # 2024 has 366 days, the 365th day after the 11th of January is the 10th of January 2025.
+        self.assertEqual(list(self.index.upcoming(date(2024, 1, 11), 365)), [
+            ('Leap', date(2024, 2, 29)), ('March', date(2024, 3, 1)), ('Eve', date(2025, 1, 10))])
+
+    def test_longer_than_a_year(self) -> None:
+        self.assertEqual(list(self.index.upcoming(date(2023, 1, 1), 400)), [
+            ('Eve', date(2023, 1, 10)), ('March', date(2023, 3, 1)), ('Leap', date(2023, 3, 1))])
+
+    def test_leap_day_listed_once(self) -> None:
+        # From the 1st of March of a non-leap year the window reaches the 29th of February of the next one.
+        self.assertEqual(list(self.index.upcoming(date(2023, 3, 1), 366)), [
+            ('March', date(2023, 3, 1)), ('Leap', date(2023, 3, 1)), ('Eve', date(2024, 1, 10))])
+        self.assertEqual([name for name, _ in self.index.upcoming(date(2024, 2, 29), 400)], ['Leap', 'March', 'Eve'])
+
+
+if __name__ == '__main__':
+    unittest.main()
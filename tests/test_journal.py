@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from src.assistant import Assistant
+from src.codec import Codec, derive_key
+from src.exceptions import DataFileError
+from src.fields import Name, Phone
+from src.journal import Journal
+
+KDF = {'name': 'scrypt', 'n': 2 ** 10, 'r': 8, 'p': 1}
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.filename = os.path.join(self.dir.name, 'data.journal')
+        salt = os.urandom(16)
+        self.codec = Codec('none', derive_key('correct horse battery', salt, KDF), salt, KDF)
+
+        journal = Journal(self.filename, codec=self.codec)
+        data = Assistant()
+        data.attach_journal(journal)
+        for num in range(3):
+            data.add_record(Name(f'Contact {num}'), Phone(f'0{num:09d}'))
+        journal.close()
+
+    def frames(self) -> list:
+        frames = []
+        with open(self.filename, 'rb') as f:
+            while header := f.read(Journal._frame_header.size):
+                size, _ = Journal._frame_header.unpack(header)
+                frames.append(header + f.read(size))
+        return frames
+
+    def replay(self, after_seq: int = 0) -> list:
+        data = Assistant()
+        Journal(self.filename, codec=self.codec).replay(data, after_seq)
+        return [record.name for record in data.get_records()]
+
+    def test_replay(self) -> None:
+        self.assertEqual(self.replay(), ['Contact 0', 'Contact 1', 'Contact 2'])
+        self.assertEqual(self.replay(after_seq=2), ['Contact 2'])
+
+    def test_moved_or_dropped_entries(self) -> None:
+        first, second, third = self.frames()
+        for name, frames in {'moved': [first, third, second], 'dropped': [first, third],
+                             'replayed': [first, second, first, third]}.items():
+            with self.subTest(name):
+                with open(self.filename, 'wb') as f:
+                    f.write(b''.join(frames))
+                with self.assertRaises(DataFileError):
+                    self.replay()
+
+    def test_plaintext_entry(self) -> None:
+        first, second, _ = self.frames()
+        plaintext = Journal(os.path.join(self.dir.name, 'plaintext.journal'))
+        plaintext.seq = 2
+        plaintext.append('remove_record', ('Contact 0',))
+        plaintext.close()
+        with open(plaintext.filename, 'rb') as f:
+            third = f.read()
+
+        with open(self.filename, 'wb') as f:
+            f.write(first + second + third)
+        with self.assertRaises(DataFileError):
+            self.replay()
+
+
+if __name__ == '__main__':
+    unittest.main()
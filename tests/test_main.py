@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from src.accounts import AccountIndex
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASSWORD = 'correct horse battery'
+COMMANDS = 'add-record --name John --phone 0123456789\n'
+
+
+class BatchLoginTest(unittest.TestCase):
+    """main.py --batch logs in without prompting."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        self.env = dict(os.environ, PYTHONPATH=ROOT, ASSISTANT_KDF_COST='1024')
+        for name in ('ASSISTANT_EMAIL', 'ASSISTANT_PASSWORD'):
+            self.env.pop(name, None)
+        AccountIndex(os.path.join(self.dir.name, 'accounts.json'), {'name': 'scrypt', 'n': 1024, 'r': 8, 'p': 1}
+                     ).signup('ann@example.com', PASSWORD)
+
+    def run_batch(self, *args: str, env: dict = None) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--batch', '-', *args],
+                              input=COMMANDS, cwd=self.dir.name, env=dict(self.env, **(env or {})),
+                              capture_output=True, text=True, timeout=60)
+
+    def test_no_terminal(self) -> None:
+        result = self.run_batch()
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('--password-file', result.stderr)
+
+    def test_password_file(self) -> None:
+        password_file = os.path.join(self.dir.name, 'password')
+        with open(password_file, 'w', encoding='utf-8') as f:
+            f.write(PASSWORD + '\n')
+        result = self.run_batch('--email', 'ann@example.com', '--password-file', password_file)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Executed 1 commands, 0 failed.', result.stdout)
+
+    def test_environment(self) -> None:
+        result = self.run_batch(env={'ASSISTANT_EMAIL': 'ann@example.com', 'ASSISTANT_PASSWORD': PASSWORD})
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Executed 1 commands, 0 failed.', result.stdout)
+
+        result = self.run_batch(env={'ASSISTANT_EMAIL': 'ann@example.com', 'ASSISTANT_PASSWORD': 'wrong password'})
+        self.assertNotEqual(result.returncode, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+
+from src import segments
+from src.assistant import Assistant
+from src.codec import Codec, derive_key
+from src.exceptions import DataFileError
+from src.fields import Name, Phone
+
+PASSWORD = 'correct horse battery'
+KDF = {'name': 'scrypt', 'n': 2 ** 10, 'r': 8, 'p': 1}
+
+
+class EncryptedSnapshotTest(unittest.TestCase):
+    """Changes of an encrypted snapshot are reported, including blocks that were moved or copied."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        salt = os.urandom(16)
+        self.codec = Codec('none', derive_key(PASSWORD, salt, KDF), salt, KDF)
+        self.data = Assistant()
+        for num in range(2000):
+            self.data.add_record(Name(f'Contact {num}'), Phone(f'0{num:09d}'))
+
+    def dump(self, name: str) -> str:
+        filename = os.path.join(self.dir.name, name)
+        with open(filename, 'wb') as f:
+            self.data.dump_segments(f, {'version': 3, 'seq': 0}, self.codec)
+        return filename
+
+    def load(self, filename: str) -> list:
+        _, data = Assistant.load_segments(filename, lambda descriptor: Codec.from_descriptor(descriptor, PASSWORD))
+        return [record.name for record in data.get_records()]
+
+    def blocks(self, filename: str) -> list:
+        return list(segments.SegmentFile(filename, lambda descriptor: self.codec)._blocks)
+
+    def rewrite(self, filename: str, offset: int, data: bytes) -> None:
+        with open(filename, 'r+b') as f:
+            f.seek(offset)
+            f.write(data)
+
+    def test_unchanged(self) -> None:
+        self.assertEqual(len(self.load(self.dump('data'))), 2000)
+
+    def test_swapped_blocks(self) -> None:
+        filename = self.dump('data')
+        blocks = self.blocks(filename)
+        self.assertGreater(len(blocks), 3)
+        with open(filename, 'rb') as f:
+            content = f.read()
+        first, second = content[blocks[0]:blocks[1]], content[blocks[1]:blocks[2]]
+        self.assertEqual(len(first), len(second))
+        self.rewrite(filename, blocks[0], second + first)
+        with self.assertRaises(DataFileError):
+            self.load(filename)
+
+    def test_block_of_another_file(self) -> None:
+        filename, other = self.dump('data'), self.dump('other')
+        blocks = self.blocks(filename)
+        with open(other, 'rb') as f:
+            f.seek(blocks[1])
+            block = f.read(blocks[2] - blocks[1])
+        self.rewrite(filename, blocks[1], block)
+        with self.assertRaises(DataFileError):
+            self.load(filename)
+
+    def test_changed_trailer(self) -> None:
+        filename = self.dump('data')
+        size = os.path.getsize(filename)
+        with open(filename, 'rb') as f:
+            f.seek(size - segments._footer.size)
+            trailer_offset, _, _ = segments._footer.unpack(f.read())
+        regions = {'descriptor': trailer_offset + 30, 'trailer': size - segments._footer.size - 40,
+                   'tag': size - segments._footer.size - 5, 'footer': size - segments._footer.size + 9}
+        for region, offset in regions.items():
+            with self.subTest(region=region):
+                filename = self.dump('data')
+                with open(filename, 'rb') as f:
+                    f.seek(offset)
+                    byte = f.read(1)
+                self.rewrite(filename, offset, bytes([byte[0] ^ 1]))
+                with self.assertRaises(DataFileError):
+                    self.load(filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
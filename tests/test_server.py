@@ -0,0 +1,80 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from src.assistant import Assistant
+from src.cmd_handlers import BaseCommandHandler, HandlerResponse
+from src.commands import command
+from src.fields import Name, Phone
+from src.server import CommandServer
+
+
+class CommandServerTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.data = Assistant()
+        self.data.add_record(Name('John'), Phone('0123456789'))
+        self.server = CommandServer(self.data)
+
+    def test_file_commands_refused(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, 'accounts.json')
+            for cmd in (f'export --file {filename}', f'import --file {filename}'):
+                with self.subTest(cmd):
+                    result = self.server.execute(cmd)
+                    self.assertFalse(result['ok'])
+                    self.assertIn("network clients can't run it", result['message'])
+            self.assertFalse(os.path.exists(filename))
+
+    def test_command(self) -> None:
+        result = self.server.execute('find-by-phone --phone 0123456789')
+        self.assertTrue(result['ok'], result['message'])
+        self.assertIn('John', result['output'])
+
+    def test_after_command_of_changes(self) -> None:
+        saves = []
+        # Called holding the write lock.
+        server = CommandServer(self.data, lambda: saves.append(server._shared._lock._writer is not None))
+        server.execute('show-all-records')
+        server.execute('add-phone --name John --phone 0123456788')
+        self.assertEqual(saves, [True])
+
+
+@command('test-slow-query', query=True)
+class SlowQueryCommandHandler(BaseCommandHandler):
+    def handle_input(self) -> HandlerResponse:
+        time.sleep(0.3)
+        return HandlerResponse(HandlerResponse.Status.CONTINUE, str(self._data.count_records()))
+
+
+class ServeTest(unittest.IsolatedAsyncioTestCase):
+    async def test_commands_dont_block_the_loop(self) -> None:
+        data = Assistant()
+        data.add_record(Name('John'), Phone('0123456789'))
+        with tempfile.TemporaryDirectory() as tmp:
+            address = os.path.join(tmp, 'server.sock')
+            ready = asyncio.Event()
+            serving = asyncio.create_task(CommandServer(data).serve(address, lambda _: ready.set()))
+            await ready.wait()
+
+            async def request(cmd: str) -> dict:
+                reader, writer = await asyncio.open_unix_connection(address)
+                writer.write(cmd.encode() + b'\n')
+                reply = json.loads(await reader.readline())
+                writer.close()
+                return reply
+
+            started = time.monotonic()
+            replies = await asyncio.gather(*(request('test-slow-query') for _ in range(3)))
+            elapsed = time.monotonic() - started
+            serving.cancel()
+
+        self.assertEqual([reply['message'] for reply in replies], ['1', '1', '1'])
+        # Run side by side in worker threads instead of one after another on the event loop.
+        self.assertLess(elapsed, 0.8)
+
+
+if __name__ == '__main__':
+    unittest.main()
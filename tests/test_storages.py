@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from src.assistant import Assistant
+from src.fields import Name, Phone
+from src.indexes import NameIndex
+from src.sqlite_assistant import SQLiteAssistant
+
+
+class StoragesTest(unittest.TestCase):
+    """The in-memory and the 'sqlite' storage give the same answers."""
+
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        sqlite = SQLiteAssistant(os.path.join(self.dir.name, 'test.sqlite3'))
+        self.addCleanup(self.dir.cleanup)
+        self.addCleanup(sqlite.close)
+        self.storages = {'memory': Assistant(), 'sqlite': sqlite}
+        for data in self.storages.values():
+            data.add_record(Name('John'), Phone('0123456789'))
+            data.create_tag('work')
+            data.create_tag('home')
+            for title in ('Plans', 'Ideas'):
+                data.add_note(title, f'{title} content')
+                data.add_tag_to_note(title, 'work')
+            data.add_tag_to_note('Plans', 'home')
+            data.link_note_to_record('John', 'Plans')
+
+    def test_delete_tag(self) -> None:
+        for storage, data in self.storages.items():
+            with self.subTest(storage=storage):
+                data.delete_tag('work')
+                self.assertFalse(data.tag_exists('work'))
+                self.assertEqual([[t.name for t in note.tags] for note in data.get_notes()], [['home'], []])
+                self.assertEqual([[t.name for t in note.tags] for note in data.get_record_notes('John')], [['home']])
+
+    def test_find_notes_by_tags(self) -> None:
+        for storage, data in self.storages.items():
+            with self.subTest(storage=storage):
+                self.assertEqual([note.title for note in data.find_notes_by_tags('work')], ['Ideas', 'Plans'])
+                self.assertEqual([note.title for note in data.find_notes_by_tags('work NOT home')], ['Ideas'])
+
+    def test_search_notes(self) -> None:
+        for storage, data in self.storages.items():
+            with self.subTest(storage=storage):
+                data.edit_notes_content('Ideas', 'Call John')
+                data.edit_notes_title('Plans', 'Schedule')
+                self.assertEqual([note.title for note in data.search_notes('call john')], ['Ideas'])
+                self.assertEqual([note.title for note in data.search_notes('plans OR schedule')], ['Schedule'])
+                data.remove_note('Ideas')
+                self.assertEqual(data.search_notes('call'), [])
+
+    def test_search_doesnt_write(self) -> None:
+        sqlite = self.storages['sqlite']
+        changes = sqlite._conn.total_changes
+        sqlite.find_notes_by_tags('work OR home')
+        self.assertEqual(sqlite._conn.total_changes, changes)
+        self.assertFalse(sqlite._conn.in_transaction)
+
+    def test_backfill_once(self) -> None:
+        sqlite = self.storages['sqlite']
+        # A database of a version without the full-text and trigram tables filled.
+        with sqlite._conn:
+            sqlite._conn.execute('DELETE FROM notes_fts')
+            sqlite._conn.execute('DELETE FROM record_grams')
+            sqlite._conn.execute('PRAGMA user_version = 0')
+        sqlite.close()
+
+        def counts(data):
+            return [data._scalar(f'SELECT count(*) FROM {table}') for table in ('notes_fts', 'record_grams')]
+
+        reopened = SQLiteAssistant(sqlite.filename)
+        self.assertEqual(counts(reopened), [2, len(NameIndex.grams('john'))])
+        self.assertEqual(reopened._scalar('PRAGMA user_version'), SQLiteAssistant._schema_version)
+        with reopened._conn:
+            reopened._conn.execute('DELETE FROM record_grams')
+        reopened.close()
+
+        reopened = SQLiteAssistant(sqlite.filename)
+        self.addCleanup(reopened.close)
+        self.assertEqual(counts(reopened), [2, 0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from src.accounts import AccountIndex
+from src.exceptions import AuthenticationError
+from src.fields import Name, Phone
+from src.server import CommandServer
+from src.tenancy import TenantCache
+
+KDF = {'name': 'scrypt', 'n': 2 ** 10, 'r': 8, 'p': 1}
+PASSWORD = 'correct horse battery'
+
+
+class TenantCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        cwd = os.getcwd()
+        # Data files are named relative to the working directory.
+        os.chdir(self.dir.name)
+        self.addCleanup(os.chdir, cwd)
+        self.accounts = AccountIndex('accounts.json', KDF)
+
+    def cache(self, budget: int = 2 ** 30) -> TenantCache:
+        cache = TenantCache(budget, 'journal', self.accounts)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_reuse_and_isolation(self) -> None:
+        cache = self.cache()
+        with cache.session('ann@example.com', PASSWORD, create=True) as ann:
+            ann.data.add_record(Name('John'), Phone('0123456789'))
+        with cache.session('bob@example.com', PASSWORD, create=True) as bob:
+            self.assertFalse(bob.data.record_exists('John'))
+
+        with cache.session('ANN@example.com', PASSWORD) as tenant:
+            self.assertIs(tenant, ann)
+        self.assertEqual(cache.stats()['hits'], 1)
+        # A loaded user's password is still checked.
+        with self.assertRaises(AuthenticationError):
+            cache.acquire('ann@example.com', 'wrong password')
+
+    def test_eviction_saves(self) -> None:
+        cache = self.cache(budget=TenantCache.tenant_bytes)
+        with cache.session('ann@example.com', PASSWORD, create=True) as ann:
+            ann.data.add_record(Name('John'), Phone('0123456789'))
+        with cache.session('bob@example.com', PASSWORD, create=True):
+            pass
+        self.assertGreaterEqual(cache.stats()['evictions'], 1)
+
+        with self.cache().session('ann@example.com', PASSWORD) as tenant:
+            self.assertIsNot(tenant, ann)
+            self.assertTrue(tenant.data.record_exists('John'))
+
+    def test_server_sessions(self) -> None:
+        server = CommandServer(tenants=self.cache())
+        result, tenant = server._session_command('find-by-phone --phone 0123456789', None)
+        self.assertEqual((result['ok'], tenant), (False, None))
+
+        result, tenant = server._session_command(f'signup --email ann@example.com --password "{PASSWORD}"', None)
+        self.assertTrue(result['ok'], result['message'])
+        self.assertTrue(server.execute('add-record --name John --phone 0123456789', tenant.shared)['ok'])
+        self.assertIn('John', server.execute('find-by-phone --phone 0123456789', tenant.shared)['output'])
+        self.assertFalse(server.execute('export --file accounts.json', tenant.shared)['ok'])
+        server._tenants.release(tenant)
+
+
+if __name__ == '__main__':
+    unittest.main()
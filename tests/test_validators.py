@@ -0,0 +1,25 @@
+import unittest
+
+from src.fields import Phone
+from src.validators import validate_phone, validate_phones
+
+
+class PhoneTest(unittest.TestCase):
+    def test_ascii_digits_only(self) -> None:
+        for value in ('012345678²', '０１２３４５６７８９', '٠١٢٣٤٥٦٧٨٩'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    validate_phone(value)
+                with self.assertRaises(ValueError):
+                    Phone(value)
+                self.assertIsInstance(validate_phones([value])[0], ValueError)
+
+    def test_valid(self) -> None:
+        valid, short = validate_phones(['0123456789', '123'])
+        self.assertEqual(valid, '0123456789')
+        self.assertIsInstance(short, ValueError)
+        self.assertEqual(str(Phone('0123456789')), '0123456789')
+
+
+if __name__ == '__main__':
+    unittest.main()